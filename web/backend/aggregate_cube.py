@@ -0,0 +1,391 @@
+"""
+Rollup cube agregat penjualan, dibangun sekali per snapshot data.
+
+Cube menyimpan jumlah Total Sales, Units Sold, Price per Unit dan jumlah transaksi untuk setiap
+kombinasi Year x Month x Region x State x Retailer x Product x Sales Method (plus flag outlier),
+sehingga setiap endpoint analisis cukup menjumlahkan sel cube alih-alih memindai seluruh baris.
+Setiap sel juga menyimpan statistik cukup harga (x) vs unit terjual (y) - n, Σx, Σy, Σxy, Σx², Σy² -
+sehingga korelasi Pearson untuk filter apa pun didapat dari penjumlahan sel, serta min/max
+measure per sel untuk query agregasi generik (/query).
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from sales_table import DAY_COLUMN, FILTER_DIMENSIONS, days_to_dates, filter_months, normalize_filter_value
+
+CUBE_DIMENSIONS = ['Year', 'Month', 'Region', 'State', 'Retailer', 'Product', 'Sales Method']
+
+# Ukuran maksimum array bincount untuk rollup multi-dimensi sebelum beralih ke np.unique
+DENSE_ROLLUP_LIMIT = 1 << 22
+
+# Jumlah mask filter yang diingat per cube (dipakai bersama oleh semua view)
+FILTER_MASK_CACHE_SIZE = 256
+
+# Statistik cukup korelasi harga (x) vs unit terjual (y) per sel
+MOMENT_NAMES = ('n', 'x', 'y', 'xy', 'xx', 'yy')
+
+# Kolom yang nilai minimum/maksimumnya disimpan per sel (untuk /query)
+EXTREME_COLUMNS = {'sales': 'Total Sales', 'units': 'Units Sold', 'price': 'Price per Unit'}
+EXTREME_NAMES = tuple(f'{kind}:{name}' for name in EXTREME_COLUMNS for kind in ('min', 'max'))
+
+
+def valid_sales_mask(df: pd.DataFrame) -> pd.Series:
+    """Batas realistis transaksi retail sesuai notebook (buang outlier sales/units)"""
+    return ((df['Total Sales'] > 0) & (df['Total Sales'] < 100000) &
+            (df['Units Sold'] > 0) & (df['Units Sold'] < 1000))
+
+
+def correlation_rows_mask(df: pd.DataFrame) -> pd.Series:
+    """Baris yang dipakai korelasi harga vs unit: harga dan unit realistis untuk produk retail"""
+    return ((df['Price per Unit'] > 0) & (df['Price per Unit'] < 200) &
+            (df['Units Sold'] > 0) & (df['Units Sold'] < 1000))
+
+
+def row_moments(df: pd.DataFrame, inverse: np.ndarray, n_cells: int) -> Dict[str, np.ndarray]:
+    """Σ momen harga/unit per sel (`inverse` = sel tiap baris) atas baris korelasi"""
+    included = correlation_rows_mask(df).to_numpy()
+    x = np.where(included, df['Price per Unit'].to_numpy(np.float64), 0.0)
+    y = np.where(included, df['Units Sold'].to_numpy(np.float64), 0.0)
+    weights = {'n': included.astype(np.float64), 'x': x, 'y': y, 'xy': x * y, 'xx': x * x, 'yy': y * y}
+    return {name: np.bincount(inverse, weights=weights[name], minlength=n_cells) for name in MOMENT_NAMES}
+
+
+def pearson(moments: Dict[str, float]) -> float:
+    """Korelasi Pearson dari statistik cukup; NaN jika kurang dari 2 baris atau variansi nol"""
+    n = float(moments['n'])
+    if n < 2:
+        return float('nan')
+    cov = moments['xy'] - moments['x'] * moments['y'] / n
+    var_x = moments['xx'] - moments['x'] ** 2 / n
+    var_y = moments['yy'] - moments['y'] ** 2 / n
+    if var_x <= 0 or var_y <= 0:
+        return float('nan')
+    return float(min(1.0, max(-1.0, cov / np.sqrt(var_x * var_y))))
+
+
+class SalesCube:
+    """Cube agregat sparse: satu sel per kombinasi dimensi yang benar-benar muncul di data"""
+
+    def __init__(self, df: pd.DataFrame):
+        valid = valid_sales_mask(df).to_numpy()
+
+        row_codes = []
+        self.categories: Dict[str, np.ndarray] = {}
+        self.na_codes: Dict[str, int] = {}
+        for dim in CUBE_DIMENSIONS:
+            # Nilai kosong jadi kategori sendiri (terakhir) dan dikecualikan saat rollup, seperti groupby
+            codes, categories = pd.factorize(df[dim], sort=True, use_na_sentinel=False)
+            categories = np.asarray(categories)
+            row_codes.append(codes)
+            self.categories[dim] = categories
+            if len(categories) and pd.isna(categories[-1]):
+                self.na_codes[dim] = len(categories) - 1
+        row_codes.append(valid.astype(np.int8))
+
+        shape = tuple(len(self.categories[dim]) for dim in CUBE_DIMENSIONS) + (2,)
+        cells, inverse = np.unique(np.ravel_multi_index(row_codes, shape), return_inverse=True)
+        cell_codes = np.unravel_index(cells, shape)
+
+        self.codes: Dict[str, np.ndarray] = {
+            dim: cell_codes[i].astype(np.int32) for i, dim in enumerate(CUBE_DIMENSIONS)
+        }
+        self.valid = cell_codes[-1].astype(bool)
+
+        n_cells = len(cells)
+        self.measures: Dict[str, np.ndarray] = {
+            'sales': np.bincount(inverse, weights=df['Total Sales'].to_numpy(np.float64), minlength=n_cells),
+            'units': np.bincount(inverse, weights=df['Units Sold'].to_numpy(np.float64), minlength=n_cells),
+            'price_sum': np.bincount(inverse, weights=df['Price per Unit'].to_numpy(np.float64), minlength=n_cells),
+            'count': np.bincount(inverse, minlength=n_cells).astype(np.int64),
+            # Σ harga x unit, untuk harga rata-rata tertimbang unit
+            'price_units': np.bincount(inverse, weights=df['Price per Unit'].to_numpy(np.float64) *
+                                       df['Units Sold'].to_numpy(np.float64), minlength=n_cells),
+        }
+        # Jumlah kolom integer dikembalikan sebagai int64 agar output sama dengan groupby
+        self.measure_dtypes = {
+            'sales': np.int64 if pd.api.types.is_integer_dtype(df['Total Sales']) else np.float64,
+            'units': np.int64 if pd.api.types.is_integer_dtype(df['Units Sold']) else np.float64,
+            'price_sum': np.float64,
+            'count': np.int64,
+            'price_units': np.int64 if (pd.api.types.is_integer_dtype(df['Price per Unit']) and
+                                        pd.api.types.is_integer_dtype(df['Units Sold'])) else np.float64,
+        }
+        self.moments = row_moments(df, inverse, n_cells)
+
+        # Rentang tanggal per sel (untuk summary yang difilter) dan min/max measure per sel
+        order = np.argsort(inverse, kind='stable')
+        starts = np.concatenate(([0], np.cumsum(self.measures['count'])[:-1]))
+        days = df[DAY_COLUMN].to_numpy(np.int64)[order]
+        self.day_min = np.minimum.reduceat(days, starts) if n_cells else days
+        self.day_max = np.maximum.reduceat(days, starts) if n_cells else days
+        self.extremes: Dict[str, np.ndarray] = {}
+        for name, column in EXTREME_COLUMNS.items():
+            dtype = np.int64 if pd.api.types.is_integer_dtype(df[column]) else np.float64
+            values = df[column].to_numpy(dtype)[order]
+            self.extremes[f'min:{name}'] = np.minimum.reduceat(values, starts) if n_cells else values
+            self.extremes[f'max:{name}'] = np.maximum.reduceat(values, starts) if n_cells else values
+
+        # Region per State (aggregasi 'first' pada data valid, sesuai notebook)
+        self.state_region = df.loc[valid].groupby('State', sort=False, observed=True)['Region'].first().to_dict()
+        self.date_min = pd.Timestamp(days_to_dates([df[DAY_COLUMN].min()])[0])
+        self.date_max = pd.Timestamp(days_to_dates([df[DAY_COLUMN].max()])[0])
+        self.row_count = len(df)
+        self._init_lookups()
+
+    def _init_lookups(self):
+        self._value_codes = {
+            dim: {normalize_filter_value(v): i for i, v in enumerate(self.categories[dim])}
+            for dim in CUBE_DIMENSIONS
+        }
+        self._mask_cache: 'OrderedDict[str, Optional[np.ndarray]]' = OrderedDict()
+        self._mask_lock = threading.Lock()
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Array + metadata cube untuk SnapshotStore.store_arrays"""
+        arrays = {'valid': self.valid, 'day_min': self.day_min, 'day_max': self.day_max}
+        arrays.update({f'codes:{dim}': self.codes[dim] for dim in CUBE_DIMENSIONS})
+        arrays.update({f'measure:{name}': values for name, values in self.measures.items()})
+        arrays.update({f'moment:{name}': values for name, values in self.moments.items()})
+        arrays.update({f'extreme:{name}': values for name, values in self.extremes.items()})
+        meta = {
+            'categories': {
+                dim: {'values': values.tolist(), 'dtype': str(values.dtype)}
+                for dim, values in self.categories.items()
+            },
+            'na_codes': self.na_codes,
+            'measure_dtypes': {name: np.dtype(dtype).name for name, dtype in self.measure_dtypes.items()},
+            'state_region': self.state_region,
+            'date_min': self.date_min.isoformat(),
+            'date_max': self.date_max.isoformat(),
+            'row_count': self.row_count,
+        }
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> 'SalesCube':
+        """Cube dari array yang disimpan (biasanya memory-mapped, tanpa salinan)"""
+        cube = cls.__new__(cls)
+        cube.categories = {
+            dim: np.asarray(saved['values'], dtype=saved['dtype'])
+            for dim, saved in meta['categories'].items()
+        }
+        cube.na_codes = meta['na_codes']
+        cube.codes = {dim: arrays[f'codes:{dim}'] for dim in CUBE_DIMENSIONS}
+        cube.valid = arrays['valid']
+        cube.measures = {name: arrays[f'measure:{name}'] for name in meta['measure_dtypes']}
+        cube.measure_dtypes = {name: np.dtype(dtype).type for name, dtype in meta['measure_dtypes'].items()}
+        cube.moments = {name: arrays[f'moment:{name}'] for name in MOMENT_NAMES}
+        cube.extremes = {name: arrays[f'extreme:{name}'] for name in EXTREME_NAMES}
+        cube.day_min, cube.day_max = arrays['day_min'], arrays['day_max']
+        cube.state_region = meta['state_region']
+        cube.date_min = pd.Timestamp(meta['date_min'])
+        cube.date_max = pd.Timestamp(meta['date_max'])
+        cube.row_count = meta['row_count']
+        cube._init_lookups()
+        return cube
+
+    def merged(self, other: 'SalesCube') -> 'SalesCube':
+        """
+        Cube baru = cube ini + cube lain (mis. snapshot lama + batch invoice baru).
+        Hanya sel yang digabung (kategori disatukan, sel yang sama dijumlahkan), baris tidak dipindai ulang.
+        """
+        cubes = (self, other)
+        merged = SalesCube.__new__(SalesCube)
+        merged.categories, merged.na_codes = {}, {}
+        cell_codes = []
+        for dim in CUBE_DIMENSIONS:
+            values = [cube.categories[dim] for cube in cubes]
+            union = np.unique(np.concatenate([v[~pd.isna(v)] for v in values]))
+            has_na = any(dim in cube.na_codes for cube in cubes)
+            merged.categories[dim] = np.append(union.astype(object), np.nan) if has_na else union
+            if has_na:
+                merged.na_codes[dim] = len(union)
+            remapped = []
+            for cube, cube_values in zip(cubes, values):
+                # Kode lama -> posisi di kategori gabungan (nilai kosong tetap paling akhir)
+                is_na = pd.isna(cube_values)
+                remap = np.full(len(cube_values), len(union), dtype=np.int64)
+                remap[~is_na] = np.searchsorted(union, cube_values[~is_na])
+                remapped.append(remap[cube.codes[dim]])
+            cell_codes.append(np.concatenate(remapped))
+        cell_codes.append(np.concatenate([cube.valid for cube in cubes]).astype(np.int8))
+
+        shape = tuple(len(merged.categories[dim]) for dim in CUBE_DIMENSIONS) + (2,)
+        cells, inverse = np.unique(np.ravel_multi_index(cell_codes, shape), return_inverse=True)
+        codes = np.unravel_index(cells, shape)
+        merged.codes = {dim: codes[i].astype(np.int32) for i, dim in enumerate(CUBE_DIMENSIONS)}
+        merged.valid = codes[-1].astype(bool)
+
+        n_cells = len(cells)
+        merged.measures = {
+            name: np.bincount(inverse, weights=np.concatenate([cube.measures[name] for cube in cubes]),
+                              minlength=n_cells)
+            for name in self.measures
+        }
+        merged.measures['count'] = merged.measures['count'].astype(np.int64)
+        merged.moments = {
+            name: np.bincount(inverse, weights=np.concatenate([cube.moments[name] for cube in cubes]),
+                              minlength=n_cells)
+            for name in MOMENT_NAMES
+        }
+        merged.measure_dtypes = {
+            name: np.int64 if all(cube.measure_dtypes[name] == np.int64 for cube in cubes) else np.float64
+            for name in self.measure_dtypes
+        }
+
+        merged.day_min = np.full(n_cells, np.iinfo(np.int64).max, dtype=np.int64)
+        merged.day_max = np.full(n_cells, np.iinfo(np.int64).min, dtype=np.int64)
+        np.minimum.at(merged.day_min, inverse, np.concatenate([cube.day_min for cube in cubes]))
+        np.maximum.at(merged.day_max, inverse, np.concatenate([cube.day_max for cube in cubes]))
+        merged.extremes = {}
+        for name in EXTREME_NAMES:
+            values = np.concatenate([cube.extremes[name] for cube in cubes])
+            reduce = np.minimum if name.startswith('min:') else np.maximum
+            # Nilai awal = elemen identitas reduksi (seperti day_min/day_max), bukan nilai data
+            limits = np.iinfo(values.dtype) if np.issubdtype(values.dtype, np.integer) else None
+            if name.startswith('min:'):
+                seed = limits.max if limits is not None else np.inf
+            else:
+                seed = limits.min if limits is not None else -np.inf
+            extreme = np.full(n_cells, seed, dtype=values.dtype)
+            reduce.at(extreme, inverse, values)
+            merged.extremes[name] = extreme
+
+        # Region 'first': baris lama lebih dulu, jadi nilai dari cube ini yang dipakai
+        merged.state_region = {**other.state_region, **self.state_region}
+        merged.date_min = min(self.date_min, other.date_min)
+        merged.date_max = max(self.date_max, other.date_max)
+        merged.row_count = self.row_count + other.row_count
+        merged._init_lookups()
+        return merged
+
+    def __len__(self) -> int:
+        return len(self.valid)
+
+    def cardinality(self, dim: str) -> int:
+        return len(self.categories[dim])
+
+    def nunique(self, dim: str, cell_mask: Optional[np.ndarray] = None) -> int:
+        """Jumlah nilai unik (tanpa nilai kosong), seperti Series.nunique()"""
+        if cell_mask is None:
+            return self.cardinality(dim) - (1 if dim in self.na_codes else 0)
+        present = np.unique(self.codes[dim][cell_mask])
+        return int(np.count_nonzero(present != self.na_codes.get(dim, -1)))
+
+    def filter_mask(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """
+        Mask sel cube untuk spesifikasi filter (OR di dalam dimensi, AND antar dimensi,
+        plus rentang bulan month_from/month_to).
+        None berarti tanpa filter. Hasil diingat per cube agar bisa dipakai ulang oleh semua view.
+        """
+        active = {key: filters[key] for key in FILTER_DIMENSIONS if filters and filters.get(key)}
+        months = filter_months(filters)
+        if months is not None:
+            active['months'] = months
+        if not active:
+            return None
+
+        cache_key = json.dumps(active, sort_keys=True, default=str)
+        with self._mask_lock:
+            if cache_key in self._mask_cache:
+                self._mask_cache.move_to_end(cache_key)
+                return self._mask_cache[cache_key]
+
+        mask = np.ones(len(self), dtype=bool)
+        for key, values in active.items():
+            dim = FILTER_DIMENSIONS.get(key, 'Month')
+            lookup = self._value_codes[dim]
+            wanted = [lookup[v] for v in map(normalize_filter_value, values) if v in lookup]
+            mask &= np.isin(self.codes[dim], wanted)
+
+        with self._mask_lock:
+            self._mask_cache[cache_key] = mask
+            if len(self._mask_cache) > FILTER_MASK_CACHE_SIZE:
+                self._mask_cache.popitem(last=False)
+        return mask
+
+    def date_range(self, cell_mask: Optional[np.ndarray] = None) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        """Tanggal invoice pertama dan terakhir pada sel terpilih"""
+        if cell_mask is None:
+            return self.date_min, self.date_max
+        if not cell_mask.any():
+            return None, None
+        first, last = days_to_dates([self.day_min[cell_mask].min(), self.day_max[cell_mask].max()])
+        return pd.Timestamp(first), pd.Timestamp(last)
+
+    def moment_sums(self, cell_mask: Optional[np.ndarray] = None) -> Dict[str, float]:
+        """Statistik cukup harga vs unit atas sel terpilih (tanpa memindai baris)"""
+        if cell_mask is None:
+            return {name: float(values.sum()) for name, values in self.moments.items()}
+        return {name: float(values[cell_mask].sum()) for name, values in self.moments.items()}
+
+    def moment_counts(self, dim: str, cell_mask: Optional[np.ndarray] = None) -> Dict[Any, int]:
+        """Jumlah baris korelasi per nilai dimensi `dim` (untuk alokasi sampel terstratifikasi)"""
+        codes, counts = self.codes[dim], self.moments['n']
+        if cell_mask is not None:
+            codes, counts = codes[cell_mask], counts[cell_mask]
+        totals = np.bincount(codes, weights=counts, minlength=self.cardinality(dim))
+        return {
+            self.categories[dim][code]: int(total)
+            for code, total in enumerate(totals) if total > 0 and code != self.na_codes.get(dim, -1)
+        }
+
+    def rollup(self, dims: List[str], valid_only: bool = False,
+               cell_mask: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Jumlahkan sel cube sepanjang dimensi selain `dims`.
+
+        Hasil berupa dict array: satu entri per dimensi (nilai kategori) dan per measure
+        ('sales', 'units', 'price_sum', 'count', 'avg_price'), terurut seperti groupby(sort=True)
+        dan hanya berisi grup yang memiliki transaksi.
+        """
+        selected = self.valid if valid_only else None
+        if cell_mask is not None:
+            selected = cell_mask if selected is None else (selected & cell_mask)
+        for dim in dims:
+            if dim in self.na_codes:
+                not_na = self.codes[dim] != self.na_codes[dim]
+                selected = not_na if selected is None else (selected & not_na)
+
+        codes = [self.codes[dim] for dim in dims]
+        shape = tuple(self.cardinality(dim) for dim in dims)
+        measures = self.measures
+        if selected is not None:
+            codes = [c[selected] for c in codes]
+            measures = {name: values[selected] for name, values in measures.items()}
+
+        if not dims:
+            group = np.zeros(len(measures['count']), dtype=np.int64)
+            group_keys, n_groups = np.zeros(1, dtype=np.int64), 1
+        elif int(np.prod(shape)) <= DENSE_ROLLUP_LIMIT:
+            group = np.ravel_multi_index(codes, shape) if len(dims) > 1 else codes[0]
+            group_keys, n_groups = None, int(np.prod(shape))
+        else:
+            group_keys, group = np.unique(np.ravel_multi_index(codes, shape), return_inverse=True)
+            n_groups = len(group_keys)
+
+        result = {
+            name: np.bincount(group, weights=values, minlength=n_groups)
+            for name, values in measures.items()
+        }
+        present = result['count'] > 0
+        if group_keys is None:
+            group_keys = np.flatnonzero(present)
+        else:
+            group_keys = group_keys[present]
+        result = {
+            name: values[present].astype(self.measure_dtypes[name])
+            for name, values in result.items()
+        }
+        result['avg_price'] = result['price_sum'] / result['count']
+
+        if dims:
+            for dim, dim_codes in zip(dims, np.unravel_index(group_keys, shape)):
+                result[dim] = self.categories[dim][dim_codes]
+        return result
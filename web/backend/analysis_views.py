@@ -0,0 +1,352 @@
+"""
+Perhitungan setiap view analisis, sebagai fungsi sinkron atas sebuah snapshot.
+
+Fungsi di sini tidak menyentuh event loop: NikeDataProcessor menjalankannya di compute pool
+(thread atau proses, lihat compute_pool). `snapshot` adalah objek dengan atribut `key`, `df`,
+`cube`, `index`, `sample` dan `series` (DataSnapshot, atau snapshot yang di-attach dari cache di proses worker).
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from aggregate_cube import pearson
+from daily_series import SERIES_SPLITS, TOTAL, DailySeries, bucket_edges, prefix_plan
+from price_units import STRATUM_COLUMN, density_grid
+from row_export import decode_cursor, encode_cursor, frame_columns, frame_records
+from sales_table import format_days
+
+# Ukuran halaman /filtered-data untuk format JSON (records / columns)
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+
+# Mode data chart /price-correlation, jumlah titik scatter dan ukuran grid densitas
+PRICE_CORRELATION_MODES = ('sample', 'stratified', 'density')
+DEFAULT_SCATTER_POINTS = 200
+MAX_SCATTER_POINTS = 5000
+DEFAULT_DENSITY_BINS = 30
+MAX_DENSITY_BINS = 200
+
+
+def summary_statistics(snapshot, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Statistik summary sesuai notebook"""
+    cube = snapshot.cube
+    mask = cube.filter_mask(filters)
+    totals = cube.rollup([], cell_mask=mask)
+    start_date, end_date = cube.date_range(mask)
+    years = cube.categories['Year'] if mask is None else np.unique(cube.categories['Year'][cube.codes['Year'][mask]])
+
+    return {
+        "total_records": int(totals['count'].sum()),
+        "total_sales": float(totals['sales'].sum()),
+        "total_units": int(totals['units'].sum()),
+        "avg_price_per_unit": float(totals['avg_price'][0]) if len(totals['count']) else 0.0,
+        "unique_products": cube.nunique('Product', mask),
+        "unique_regions": cube.nunique('Region', mask),
+        "unique_retailers": cube.nunique('Retailer', mask),
+        "unique_states": cube.nunique('State', mask),
+        "data_period": {
+            "start_date": start_date.strftime('%Y-%m-%d') if start_date is not None else None,
+            "end_date": end_date.strftime('%Y-%m-%d') if end_date is not None else None,
+            "years": years.tolist()
+        }
+    }
+
+
+def monthly_trends(snapshot, year: Optional[int] = None,
+                   filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Analisis tren bulanan sesuai notebook (Visualisasi 1)"""
+    cube = snapshot.cube
+
+    # Outlier (sales/units tidak realistis) sudah ditandai di cube, cukup pakai valid_only
+    mask = cube.filter_mask(filters)
+    if year:
+        year_mask = cube.categories['Year'][cube.codes['Year']] == year
+        mask = year_mask if mask is None else (mask & year_mask)
+
+    monthly_data = cube.rollup(['Year', 'Month'], valid_only=True, cell_mask=mask)
+
+    # Format untuk chart
+    trends = {}
+    for year_val in np.unique(monthly_data['Year']):
+        in_year = monthly_data['Year'] == year_val
+        trends[str(year_val)] = {
+            'months': monthly_data['Month'][in_year].tolist(),
+            'sales': monthly_data['sales'][in_year].tolist(),
+            'units': monthly_data['units'][in_year].tolist(),
+            'avg_price': monthly_data['avg_price'][in_year].tolist()
+        }
+
+    return trends
+
+
+def time_series(snapshot, start: Optional[str] = None, end: Optional[str] = None, granularity: str = 'month',
+                split: Optional[str] = None, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Time series penjualan (baris valid) untuk rentang tanggal [start, end] per bucket hari,
+    minggu, bulan atau kuartal, opsional dipecah per nilai dimensi `split`.
+    """
+    series = snapshot.series
+    dim = SERIES_SPLITS[split] if split else None
+    first = series.day_start if start is None else max(series.day_start, int(np.datetime64(start, 'D').astype(np.int64)))
+    last = series.day_end if end is None else min(series.day_end, int(np.datetime64(end, 'D').astype(np.int64)))
+
+    plan = prefix_plan(filters, dim)
+    source = 'prefix'
+    if plan is None:
+        # Kombinasi filter lain: prefix sum sementara atas baris terfilter saja
+        rows = snapshot.index.rows(snapshot.index.filter(filters or {}))
+        series = DailySeries(snapshot.df.take(rows), [dim] if dim else [])
+        plan, source = (None, None), 'scan'
+    filtered, values = plan
+
+    if last < first:
+        edges, labels = np.zeros(1, dtype=np.int64), []
+    else:
+        edges, labels = bucket_edges(first, last, granularity)
+
+    if dim is not None:
+        rows = series.value_rows(dim, values) if filtered else np.arange(len(series.categories[dim]))
+        sums = series.sums(dim, edges, rows)
+        names = series.categories[dim][rows]
+        # Hanya nilai yang punya transaksi di rentang ini
+        present = sums['count'].sum(axis=1) > 0
+        sums = {name: totals[present] for name, totals in sums.items()}
+        names = names[present]
+    elif filtered:
+        sums = {name: totals.sum(axis=0, keepdims=True)
+                for name, totals in series.sums(filtered, edges, series.value_rows(filtered, values)).items()}
+        names = [TOTAL]
+    else:
+        sums, names = series.sums(TOTAL, edges), [TOTAL]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_price = np.where(sums['count'] > 0, sums['price_sum'] / sums['count'], 0.0)
+
+    return {
+        'granularity': granularity,
+        'split': split,
+        'start_date': format_days([first])[0] if labels else None,
+        'end_date': format_days([last])[0] if labels else None,
+        'buckets': labels,
+        'bucket_start': format_days(edges[:-1]).tolist(),
+        'bucket_end': format_days(edges[1:] - 1).tolist(),
+        'series': [
+            {
+                'name': name,
+                'sales': sums['sales'][i].tolist(),
+                'units': sums['units'][i].tolist(),
+                'transactions': sums['count'][i].tolist(),
+                'avg_price': avg_price[i].tolist(),
+            }
+            for i, name in enumerate(names)
+        ],
+        'source': source,
+    }
+
+
+def top_products(snapshot, limit: int = 10, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Analisis top produk sesuai notebook (Visualisasi 2)"""
+    cube = snapshot.cube
+
+    product_performance = cube.rollup(['Product'], valid_only=True, cell_mask=cube.filter_mask(filters))
+
+    # Urutkan berdasarkan penjualan dan ambil top produk (stabil seperti nlargest)
+    top = np.argsort(-product_performance['sales'], kind='stable')[:max(limit, 0)]
+
+    # Hitung persentase distribusi
+    total_sales_all = product_performance['sales'].sum()
+    top_sales = product_performance['sales'][top].sum()
+    percentage = (top_sales / total_sales_all) * 100 if total_sales_all else 0.0
+
+    return {
+        'top_products': [
+            {
+                'product': product_performance['Product'][i],
+                'total_sales': float(product_performance['sales'][i]),
+                'units_sold': int(product_performance['units'][i]),
+                'avg_price': float(product_performance['avg_price'][i]),
+                'transactions': int(product_performance['count'][i])
+            }
+            for i in top
+        ],
+        'summary': {
+            'total_products': len(product_performance['Product']),
+            'total_sales_all': float(total_sales_all),
+            'top_products_sales': float(top_sales),
+            'top_products_percentage': float(percentage),
+            'analysis': f'Top {limit} produk menyumbang {percentage:.1f}% dari total penjualan'
+        }
+    }
+
+
+def region_distribution(snapshot, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Distribusi wilayah sesuai notebook (Visualisasi 3)"""
+    cube = snapshot.cube
+
+    region_stats = cube.rollup(['Region'], cell_mask=cube.filter_mask(filters))
+
+    return {
+        'regions': region_stats['Region'].tolist(),
+        'sales': region_stats['sales'].tolist(),
+        'units': region_stats['units'].tolist(),
+        'avg_price': region_stats['avg_price'].tolist(),
+        'transactions': region_stats['count'].tolist(),
+        'sales_percentage': (region_stats['sales'] / region_stats['sales'].sum() * 100).tolist()
+    }
+
+
+def price_correlation(snapshot, filters: Optional[Dict[str, Any]] = None, mode: str = 'sample',
+                      points: int = DEFAULT_SCATTER_POINTS, bins: int = DEFAULT_DENSITY_BINS) -> Dict[str, Any]:
+    """
+    Korelasi harga vs unit terjual sesuai notebook (Visualisasi 4).
+
+    Korelasi Pearson dihitung dari statistik cukup di cube. Data chart sesuai `mode`: 'sample'
+    (titik acak seperti notebook), 'stratified' (sampel per Product yang sudah dihitung per
+    snapshot) atau 'density' (histogram 2D `bins` x `bins` atas semua baris terfilter).
+    """
+    cube, index = snapshot.cube, snapshot.index
+    mask = cube.filter_mask(filters)
+    moments = cube.moment_sums(mask)
+    correlation = pearson(moments)
+    result = {
+        'correlation': correlation if not np.isnan(correlation) else 0.0,
+        'mode': mode,
+        'total_points': int(moments['n']),
+        'interpretation': 'Korelasi Pearson antara harga per unit dan jumlah unit terjual'
+    }
+
+    bits = index.filter(filters or {})
+    if mode == 'stratified':
+        columns, products, strata = snapshot.sample.select(snapshot.df, index, bits, points,
+                                                           cube.moment_counts(STRATUM_COLUMN, mask))
+        result.update({
+            'price_per_unit': columns['price'].tolist(),
+            'units_sold': columns['units'].tolist(),
+            'total_sales': columns['total'].tolist(),
+            'products': products.tolist(),
+            'sample_size': len(products),
+            'strata': strata,
+        })
+        return result
+
+    # Baris korelasi yang lolos filter (hanya kolom harga/unit yang disentuh)
+    rows = index.rows(bits)
+    price = snapshot.df['Price per Unit'].to_numpy()[rows]
+    units = snapshot.df['Units Sold'].to_numpy()[rows]
+    if mode == 'density':
+        result.update(density_grid(price, units, snapshot.sample, bins))
+        return result
+
+    rows = rows[(price > 0) & (price < 200) & (units > 0) & (units < 1000)]
+    # Sampel acak untuk scatter plot, sama seperti df.sample(n, random_state=42)
+    size = min(points, len(rows))
+    sample_data = snapshot.df.take(rows[np.random.RandomState(42).choice(len(rows), size=size, replace=False)])
+    result.update({
+        'price_per_unit': sample_data['Price per Unit'].tolist(),
+        'units_sold': sample_data['Units Sold'].tolist(),
+        'total_sales': sample_data['Total Sales'].tolist(),
+        'products': sample_data['Product'].tolist(),
+        'sample_size': len(sample_data),
+    })
+    return result
+
+
+def state_analysis(snapshot, limit: int = 15, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Analisis per negara bagian sesuai notebook (Visualisasi 5)"""
+    cube = snapshot.cube
+
+    state_stats = cube.rollup(['State'], valid_only=True, cell_mask=cube.filter_mask(filters))
+    top = np.argsort(-state_stats['sales'], kind='stable')[:max(limit, 0)]
+
+    # Hitung persentase dan harga per unit
+    total_sales_all = state_stats['sales'].sum()
+
+    state_analysis = []
+    for i in top:
+        state = state_stats['State'][i]
+        sales = state_stats['sales'][i]
+        units = state_stats['units'][i]
+        state_analysis.append({
+            'state': state,
+            'total_sales': float(sales),
+            'units_sold': int(units),
+            'region': cube.state_region.get(state),
+            'avg_price': float(state_stats['avg_price'][i]),
+            'transactions': int(state_stats['count'][i]),
+            'sales_percentage': float((sales / total_sales_all) * 100),
+            'avg_price_per_unit': float(sales / units) if units > 0 else 0.0
+        })
+
+    return {
+        'state_analysis': state_analysis,
+        'summary': {
+            'total_states_analyzed': len(state_analysis),
+            'total_sales_all': float(total_sales_all),
+            'analysis': f'Analisis penjualan untuk {len(state_analysis)} negara bagian teratas'
+        }
+    }
+
+
+def retailer_analysis(snapshot, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Analisis performa retailer"""
+    cube = snapshot.cube
+
+    retailer_stats = cube.rollup(['Retailer'], cell_mask=cube.filter_mask(filters))
+
+    return {
+        'retailers': retailer_stats['Retailer'].tolist(),
+        'sales': retailer_stats['sales'].tolist(),
+        'units': retailer_stats['units'].tolist(),
+        'avg_price': retailer_stats['avg_price'].tolist(),
+        'transactions': retailer_stats['count'].tolist()
+    }
+
+
+def sales_method_analysis(snapshot, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Analisis metode penjualan"""
+    cube = snapshot.cube
+
+    method_stats = cube.rollup(['Sales Method'], cell_mask=cube.filter_mask(filters))
+
+    return {
+        'methods': method_stats['Sales Method'].tolist(),
+        'sales': method_stats['sales'].tolist(),
+        'units': method_stats['units'].tolist(),
+        'avg_price': method_stats['avg_price'].tolist(),
+        'transactions': method_stats['count'].tolist()
+    }
+
+
+def filtered_rows(snapshot, filters: Dict[str, Any], cursor: Optional[str] = None,
+                  page_size: Optional[int] = None):
+    """Posisi baris halaman ini + total record + cursor halaman berikutnya"""
+    after = decode_cursor(cursor, snapshot.key, snapshot.index.row_count) if cursor else -1
+
+    # Filter lewat bitmap index: OR per dimensi, AND antar dimensi (years, regions,
+    # states, products, retailers, sales_methods); hanya baris halaman ini yang dibentuk
+    bits = snapshot.index.filter(filters)
+    rows = snapshot.index.rows(bits, after, None if page_size is None else page_size + 1)
+
+    next_cursor = None
+    if page_size is not None and len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(snapshot.key, rows[-1])
+
+    return rows, snapshot.index.count(bits), next_cursor
+
+
+def filtered_page(snapshot, filters: Dict[str, Any], cursor: Optional[str] = None,
+                  page_size: int = DEFAULT_PAGE_SIZE, output_format: str = 'records') -> Dict[str, Any]:
+    """Data dengan filter untuk frontend (format records atau columns)"""
+    rows, total_records, next_cursor = filtered_rows(snapshot, filters, cursor, page_size)
+    page = snapshot.df.take(rows)
+
+    return {
+        'filtered_data': frame_columns(page) if output_format == 'columns' else frame_records(page),
+        'total_records': total_records,
+        'page_size': page_size,
+        'next_cursor': next_cursor,
+        'applied_filters': filters
+    }
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+Benchmark backend yang bisa diulang: data sintetis berbentuk Nike Dataset (lihat synthetic_data)
+dari puluhan ribu sampai puluhan juta baris.
+
+Untuk setiap ukuran data, satu proses terpisah (agar peak RSS tidak tercampur) mengukur:
+- tahap pipeline: ingestion per chunk, parse vs preprocessing satu chunk, pembangunan snapshot
+  (cube + bitmap index), tulis/baca cache kolumnar, refresh dingin dan start ulang dari cache;
+- setiap method NikeDataProcessor, tanpa filter dan dengan filter;
+- setiap route FastAPI lewat klien ASGI in-process (httpx) pada beberapa level konkurensi.
+
+Hasilnya (p50/p99 latency, throughput, peak RSS, metadata mesin dan commit) ditulis sebagai JSON
+sehingga dua run bisa dibandingkan dengan --compare.
+
+Jalankan: python benchmark.py --rows 10k,100k,1m --concurrency 1,8,32
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from synthetic_data import DEFAULT_SEED, parse_rows, write_csv
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_DATA_DIR = os.path.join(BASE_DIR, '.cache', 'bench')
+BENCH_RESULTS_DIR = os.path.join(BASE_DIR, 'bench-results')
+RESULT_SCHEMA_VERSION = 1
+
+DEFAULT_ROWS = '10k,100k,1m'
+DEFAULT_CONCURRENCY = '1,8,32'
+
+# Filter representatif: beberapa dimensi + rentang bulan
+BENCH_FILTERS = {'years': [2021], 'month_from': 3, 'month_to': 9,
+                 'regions': ['West', 'South'], 'sales_methods': ['Online', 'Outlet']}
+# Query /query representatif: dua dimensi, top-K dengan limit
+BENCH_QUERY = {'group_by': ['Retailer', 'Sales Method'], 'metrics': ['sum:Units Sold', 'weighted_price'],
+               'order_by': ['-sum:Units Sold'], 'limit': 5}
+
+PROCESSOR_METHODS = [
+    'get_summary_statistics', 'get_monthly_trends', 'get_top_products', 'get_region_distribution',
+    'get_price_correlation', 'get_state_analysis', 'get_retailer_analysis', 'get_sales_method_analysis',
+    'get_filtered_data',
+]
+
+# (nama, method HTTP, path, apakah menerima filter)
+ROUTES = [
+    ('summary', 'GET', '/summary', True),
+    ('monthly-trends', 'GET', '/monthly-trends', True),
+    ('top-products', 'GET', '/top-products', True),
+    ('region-distribution', 'GET', '/region-distribution', True),
+    ('price-correlation', 'GET', '/price-correlation', True),
+    ('state-analysis', 'GET', '/state-analysis', True),
+    ('retailer-analysis', 'GET', '/retailer-analysis', True),
+    ('sales-method-analysis', 'GET', '/sales-method-analysis', True),
+    ('dashboard', 'POST', '/dashboard', True),
+    ('query', 'POST', '/query', True),
+    ('filtered-data', 'POST', '/filtered-data', True),
+    ('health', 'GET', '/health', False),
+]
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """Peak RSS proses ini dan proses anak (mis. process pool ingestion) dalam MB"""
+    # ru_maxrss dalam KB di Linux, bytes di macOS
+    unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        'self': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit, 1),
+        'children': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit, 1),
+    }
+
+
+def latency_stats(seconds: List[float], wall: Optional[float] = None) -> Dict[str, Any]:
+    """p50/p99/mean (ms) dan throughput; `wall` = durasi total jika sampel berjalan bersamaan"""
+    samples = np.asarray(seconds, dtype=float) * 1000
+    wall = wall if wall is not None else float(np.sum(seconds))
+    return {
+        'n': len(samples),
+        'p50_ms': round(float(np.percentile(samples, 50)), 3),
+        'p99_ms': round(float(np.percentile(samples, 99)), 3),
+        'mean_ms': round(float(samples.mean()), 3),
+        'min_ms': round(float(samples.min()), 3),
+        'max_ms': round(float(samples.max()), 3),
+        'throughput_per_s': round(len(samples) / wall, 2) if wall > 0 else None,
+    }
+
+
+def with_rows(stats: Dict[str, Any], rows: int) -> Dict[str, Any]:
+    """Tambahkan jumlah baris yang diproses dan throughput baris per detik"""
+    stats['rows'] = rows
+    stats['rows_per_s'] = round(rows / (stats['mean_ms'] / 1000)) if stats['mean_ms'] else None
+    return stats
+
+
+def _time(fn: Callable, repeats: int) -> List[float]:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def bench_stages(csv_path: str, work_dir: str, repeats: int) -> Dict[str, Any]:
+    """Waktu setiap tahap pipeline data, dari CSV mentah sampai snapshot siap dari cache"""
+    import pandas as pd
+
+    from data_source import make_source
+    from ingest import INGEST_CHUNK_BYTES, ChunkedIngestor, iter_csv_chunks, preprocess_sales
+    from data_processor import DataSnapshot, NikeDataProcessor
+    from snapshot_store import SnapshotStore
+
+    stages: Dict[str, Any] = {}
+    ingestor = ChunkedIngestor()
+    frames = {}
+
+    def ingest():
+        frames['df'] = ingestor.ingest(make_source(csv_path).fetch().open_parts())
+    timings = _time(ingest, repeats)
+    df = frames.pop('df')
+    stages['ingest'] = with_rows(latency_stats(timings), len(df))
+    stages['ingest']['peak_rss_mb'] = peak_rss_mb()
+
+    # Parse CSV vs preprocessing pada satu chunk ingestion (pekerjaan satu task di process pool)
+    with open(csv_path, 'rb') as f:
+        header, body = next(iter_csv_chunks(csv_path, f, INGEST_CHUNK_BYTES))
+    raw = {}
+
+    def parse():
+        raw['df'] = pd.read_csv(io.BytesIO(header + body), encoding='utf-8-sig')
+    timings = _time(parse, repeats)
+    chunk_rows = len(raw['df'])
+    stages['parse_chunk'] = with_rows(latency_stats(timings), chunk_rows)
+    # preprocess_sales mengubah frame input, jadi setiap pengulangan memakai salinan sendiri
+    copies = [raw['df'].copy() for _ in range(repeats)]
+    del raw['df']
+    stages['preprocess_chunk'] = with_rows(
+        latency_stats(_time(lambda: preprocess_sales(copies.pop()), repeats)), chunk_rows)
+
+    snapshots = {}
+
+    def build():
+        snapshots['built'] = DataSnapshot(df, 'bench', 1)
+    stages['snapshot_build'] = with_rows(latency_stats(_time(build, repeats)), len(df))
+    snapshot = snapshots['built']
+
+    store = SnapshotStore(os.path.join(work_dir, 'stages'))
+    key = store.snapshot_key('bench')
+
+    def store_write():
+        store.store(key, snapshot.df)
+        store.store_arrays(key, 'cube', *snapshot.cube.to_arrays())
+        store.store_arrays(key, 'index', *snapshot.index.to_arrays())
+    stages['store_write'] = latency_stats(_time(store_write, repeats))
+
+    # Baca ulang dari cache: kolom di-memory-map, agregat tidak dibangun ulang
+    loader = NikeDataProcessor(csv_path, os.path.join(work_dir, 'stages'))
+
+    def store_load():
+        snapshots['loaded'] = loader._snapshot_from_store(key, store.load(key), 1, {})
+    stages['store_load'] = latency_stats(_time(store_load, repeats))
+    loader.compute.shutdown()
+    return stages
+
+
+async def bench_refresh(csv_path: str, cache_dir: str) -> Dict[str, Any]:
+    """Refresh pertama tanpa cache (end-to-end) dan start ulang dari cache yang sudah ditulis"""
+    from data_processor import NikeDataProcessor
+
+    results = {}
+    for name in ('cold_refresh', 'warm_start'):
+        processor = NikeDataProcessor(csv_path, cache_dir)
+        started = time.perf_counter()
+        await processor.refresh()
+        results[name] = latency_stats([time.perf_counter() - started])
+        processor.compute.shutdown()
+    return results
+
+
+async def bench_cold_start(app, processor) -> Dict[str, Any]:
+    """Warm-up dari snapshot yang sudah dipublish (seperti startup hook) lalu request pertama"""
+    import httpx
+
+    started = time.perf_counter()
+    await processor.warm_up('artifact')
+    results = {'artifact_warmup': latency_stats([time.perf_counter() - started])}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+        started = time.perf_counter()
+        await client.post('/dashboard')
+        results['first_request'] = latency_stats([time.perf_counter() - started])
+    return results
+
+
+async def bench_methods(processor, iterations: int) -> Dict[str, Any]:
+    """Setiap method NikeDataProcessor, berurutan, tanpa filter dan dengan BENCH_FILTERS"""
+    results = {}
+    for name in PROCESSOR_METHODS:
+        method = getattr(processor, name)
+        for variant, filters in (('all', {} if name == 'get_filtered_data' else None), ('filtered', BENCH_FILTERS)):
+            await method(filters=filters)
+            timings = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                await method(filters=filters)
+                timings.append(time.perf_counter() - started)
+            results[f"{name}[{variant}]"] = latency_stats(timings)
+    return results
+
+
+def _route_request(method: str, path: str, filtered: bool) -> Dict[str, Any]:
+    if not filtered:
+        return {'method': method, 'url': path}
+    if path == '/dashboard':
+        return {'method': method, 'url': path, 'json': {'filters': BENCH_FILTERS}}
+    if path == '/query':
+        return {'method': method, 'url': path, 'json': {**BENCH_QUERY, 'filters': BENCH_FILTERS}}
+    if path == '/filtered-data':
+        return {'method': method, 'url': path, 'json': BENCH_FILTERS}
+    return {'method': method, 'url': path, 'params': BENCH_FILTERS}
+
+
+async def _load(client, request: Dict[str, Any], total: int, concurrency: int) -> Dict[str, Any]:
+    """Kirim `total` request dengan `concurrency` request berjalan bersamaan"""
+    timings: List[float] = []
+    statuses: Counter = Counter()
+    remaining = [total]
+
+    async def worker():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            started = time.perf_counter()
+            response = await client.request(**request)
+            timings.append(time.perf_counter() - started)
+            statuses[str(response.status_code)] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    stats = latency_stats(timings, wall=time.perf_counter() - started)
+    stats['status'] = dict(statuses)
+    return stats
+
+
+async def bench_routes(app, concurrency: List[int], requests: int) -> Dict[str, Any]:
+    """Setiap route lewat klien ASGI in-process, per level konkurensi"""
+    import httpx
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+        for name, method, path, accepts_filters in ROUTES:
+            for variant in (('all', 'filtered') if accepts_filters else ('all',)):
+                request = _route_request(method, path, variant == 'filtered')
+                await client.request(**request)
+                for level in concurrency:
+                    total = max(requests, level)
+                    results[f"{name}[{variant}]@c{level}"] = await _load(client, request, total, level)
+    return results
+
+
+def run_worker(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Benchmark satu ukuran data (dijalankan di proses terpisah)"""
+    work_dir = tempfile.mkdtemp(prefix='nike-bench-')
+    cache_dir = os.path.join(work_dir, 'cache')
+    # Konfigurasi dibaca saat main di-import, jadi harus diset sebelumnya
+    os.environ['NIKE_DATA_SOURCE'] = config['csv_path']
+    os.environ['NIKE_CACHE_DIR'] = cache_dir
+    os.environ['NIKE_REFRESH_INTERVAL'] = os.environ['NIKE_MAX_STALENESS'] = str(10 ** 9)
+    if not config['response_cache']:
+        os.environ['NIKE_RESPONSE_CACHE_BYTES'] = '0'
+
+    started = time.perf_counter()
+    import main
+    result: Dict[str, Any] = {'import_main_ms': round((time.perf_counter() - started) * 1000, 1)}
+
+    result['stages'] = bench_stages(config['csv_path'], work_dir, config['stage_repeats'])
+
+    async def serve():
+        result['stages'].update(await bench_refresh(config['csv_path'], cache_dir))
+        result['stages'].update(await bench_cold_start(main.app, main.processor))
+        await main.processor.refresh()
+        result['methods'] = await bench_methods(main.processor, config['iterations'])
+        result['routes'] = await bench_routes(main.app, config['concurrency'], config['requests'])
+        result['compute_pool'] = main.processor.compute.stats()
+        main.processor.compute.shutdown()
+    asyncio.run(serve())
+
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=BASE_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata() -> Dict[str, Any]:
+    """Informasi mesin dan versi agar hasil dua run bisa dibandingkan dengan adil"""
+    import fastapi
+    import httpx
+    import pandas as pd
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'packages': {'pandas': pd.__version__, 'numpy': np.__version__,
+                     'fastapi': fastapi.__version__, 'httpx': httpx.__version__},
+        'env': {k: v for k, v in sorted(os.environ.items()) if k.startswith('NIKE_')},
+    }
+
+
+def ensure_dataset(data_dir: str, rows: int, seed: int) -> Dict[str, Any]:
+    """CSV sintetis untuk ukuran ini; dibuat sekali lalu dipakai ulang antar run"""
+    path = os.path.join(data_dir, f"nike-{rows}-s{seed}.csv")
+    info = {'rows': rows, 'seed': seed, 'csv_path': path, 'generated': False}
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        write_csv(path, rows, seed)
+        info['generated'] = True
+        info['generate_seconds'] = round(time.perf_counter() - started, 2)
+    info['csv_bytes'] = os.path.getsize(path)
+    return info
+
+
+def run_size(dataset: Dict[str, Any], args) -> Dict[str, Any]:
+    """Jalankan benchmark satu ukuran di proses Python baru dan ambil hasil JSON-nya"""
+    config = {
+        'csv_path': dataset['csv_path'],
+        'concurrency': args.concurrency,
+        'requests': args.requests,
+        'iterations': args.iterations,
+        'stage_repeats': args.stage_repeats,
+        'response_cache': args.response_cache,
+    }
+    with tempfile.TemporaryDirectory(prefix='nike-bench-run-') as tmp:
+        config_path = os.path.join(tmp, 'config.json')
+        output_path = os.path.join(tmp, 'result.json')
+        with open(config_path, 'w') as f:
+            json.dump(config, f)
+        process = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', config_path, output_path],
+                                 cwd=BASE_DIR)
+        if process.returncode != 0 or not os.path.exists(output_path):
+            return {**dataset, 'error': f"proses benchmark keluar dengan kode {process.returncode}"}
+        with open(output_path) as f:
+            return {**dataset, **json.load(f)}
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Rasio p50/p99 (current / baseline) untuk setiap metrik yang ada di kedua run"""
+    rows = []
+    old_runs = {run['rows']: run for run in baseline.get('runs', [])}
+    for run in current.get('runs', []):
+        old = old_runs.get(run['rows'])
+        if old is None or 'error' in run or 'error' in old:
+            continue
+        for section in ('stages', 'methods', 'routes'):
+            for name, stats in run.get(section, {}).items():
+                before = old.get(section, {}).get(name)
+                if not isinstance(stats, dict) or not isinstance(before, dict) or 'p50_ms' not in stats:
+                    continue
+                rows.append({
+                    'rows': run['rows'], 'section': section, 'name': name,
+                    'p50_ratio': round(stats['p50_ms'] / before['p50_ms'], 3) if before['p50_ms'] else None,
+                    'p99_ratio': round(stats['p99_ms'] / before['p99_ms'], 3) if before['p99_ms'] else None,
+                })
+    return rows
+
+
+def print_summary(result: Dict[str, Any]):
+    for run in result['runs']:
+        print(f"\n== {run['rows']} baris ({run['csv_bytes'] / 1024 / 1024:.1f} MB CSV) ==")
+        if 'error' in run:
+            print(f"  GAGAL: {run['error']}")
+            continue
+        for section in ('stages', 'methods', 'routes'):
+            for name, stats in run[section].items():
+                if isinstance(stats, dict):
+                    print(f"  {section:<8} {name:<48} p50 {stats['p50_ms']:>10.2f} ms  "
+                          f"p99 {stats['p99_ms']:>10.2f} ms  {stats['throughput_per_s'] or 0:>9.1f}/s")
+        print(f"  import main: {run['import_main_ms']} ms")
+        print(f"  peak RSS: {run['peak_rss_mb']['self']} MB (anak: {run['peak_rss_mb']['children']} MB)")
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark backend Nike Sales Data dengan data sintetis")
+    parser.add_argument("--rows", default=DEFAULT_ROWS,
+                        type=lambda v: [parse_rows(r) for r in v.split(',') if r.strip()],
+                        help="Ukuran data dipisah koma, mis. 10k,100k,1m,10m,50m")
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY, type=_int_list,
+                        help="Level konkurensi request ke route, dipisah koma")
+    parser.add_argument("--requests", type=int, default=200, help="Jumlah request per route per level konkurensi")
+    parser.add_argument("--iterations", type=int, default=20, help="Jumlah panggilan per method processor")
+    parser.add_argument("--stage-repeats", type=int, default=1, help="Pengulangan setiap tahap pipeline")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed data sintetis")
+    parser.add_argument("--data-dir", default=BENCH_DATA_DIR, help="Lokasi CSV sintetis (dipakai ulang antar run)")
+    parser.add_argument("--output", help="File JSON hasil (default: bench-results/benchmark-<waktu>.json)")
+    parser.add_argument("--compare", help="File JSON hasil run sebelumnya untuk dibandingkan")
+    parser.add_argument("--response-cache", action="store_true",
+                        help="Aktifkan cache respons (default mati agar setiap request benar-benar dihitung)")
+    parser.add_argument("--worker", nargs=2, metavar=('CONFIG', 'OUTPUT'), help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.worker:
+        config_path, output_path = args.worker
+        with open(config_path) as f:
+            config = json.load(f)
+        result = run_worker(config)
+        with open(output_path, 'w') as f:
+            json.dump(result, f)
+        return
+
+    result = {
+        'schema_version': RESULT_SCHEMA_VERSION,
+        'meta': run_metadata(),
+        'config': {
+            'rows': args.rows, 'concurrency': args.concurrency, 'requests': args.requests,
+            'iterations': args.iterations, 'stage_repeats': args.stage_repeats, 'seed': args.seed,
+            'response_cache': args.response_cache, 'filters': BENCH_FILTERS,
+        },
+        'runs': [],
+    }
+    for rows in args.rows:
+        print(f"Menyiapkan data sintetis {rows} baris...")
+        dataset = ensure_dataset(args.data_dir, rows, args.seed)
+        print(f"Benchmark {rows} baris...")
+        result['runs'].append(run_size(dataset, args))
+
+    output = args.output or os.path.join(
+        BENCH_RESULTS_DIR, f"benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    if args.compare:
+        with open(args.compare) as f:
+            result['comparison'] = {'baseline': args.compare, 'metrics': compare_results(json.load(f), result)}
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+
+    print_summary(result)
+    for metric in result.get('comparison', {}).get('metrics', []):
+        print(f"  {metric['rows']:>10} {metric['section']:<8} {metric['name']:<48} "
+              f"p50 x{metric['p50_ratio']}  p99 x{metric['p99_ratio']}")
+    print(f"\nHasil ditulis ke {output}")
+
+
+if __name__ == "__main__":
+    main()
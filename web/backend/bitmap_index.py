@@ -0,0 +1,176 @@
+"""
+Inverted index bitmap per snapshot untuk filter multi-dimensi di /filtered-data.
+
+Setiap nilai unik dari setiap dimensi punya satu bitset terkompresi (1 bit per baris, disimpan
+sebagai word uint64). Filter = OR di dalam satu dimensi, AND antar dimensi, dan total record
+dihitung dengan popcount tanpa membentuk ulang baris.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from sales_table import FILTER_DIMENSIONS, filter_months, normalize_filter_value
+
+_BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+# Kolom yang diindeks: semua dimensi filter + Month (untuk rentang bulan)
+INDEX_COLUMNS = list(FILTER_DIMENSIONS.values()) + ['Month']
+
+
+def popcount(words: np.ndarray) -> int:
+    """Jumlah bit 1 dalam array word"""
+    if hasattr(np, 'bitwise_count'):
+        return int(np.bitwise_count(words).sum(dtype=np.int64))
+    return int(_BYTE_POPCOUNT[words.view(np.uint8)].sum(dtype=np.int64))
+
+
+def _value_masks(series: pd.Series) -> Iterator[Tuple[Any, np.ndarray]]:
+    """(nilai, mask baris) untuk setiap nilai unik kolom"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, values = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, values = pd.factorize(series, sort=True)
+    for i, value in enumerate(values):
+        yield normalize_filter_value(value), codes == i
+
+
+class BitmapIndex:
+    """Satu bitset per nilai dimensi; dibangun sekali per snapshot"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.row_count = len(df)
+        self.n_words = (self.row_count + 63) // 64
+        self.bitmaps: Dict[str, Dict[Any, np.ndarray]] = {}
+
+        for column in INDEX_COLUMNS:
+            self.bitmaps[column] = {
+                value: self._pack(mask) for value, mask in _value_masks(df[column])
+            }
+
+    def _pack(self, mask: np.ndarray) -> np.ndarray:
+        packed = np.packbits(mask)
+        padded = np.zeros(self.n_words * 8, dtype=np.uint8)
+        padded[:len(packed)] = packed
+        return padded.view(np.uint64)
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Satu matriks (nilai x word) per kolom + daftar nilai, untuk SnapshotStore.store_arrays"""
+        arrays = {
+            column: np.stack(list(bitmaps.values())) if bitmaps else np.zeros((0, self.n_words), dtype=np.uint64)
+            for column, bitmaps in self.bitmaps.items()
+        }
+        meta = {
+            'row_count': self.row_count,
+            'values': {column: list(bitmaps) for column, bitmaps in self.bitmaps.items()},
+        }
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> 'BitmapIndex':
+        """Index dari matriks yang disimpan; setiap bitset adalah view baris (tanpa salinan)"""
+        index = cls.__new__(cls)
+        index.row_count = meta['row_count']
+        index.n_words = (index.row_count + 63) // 64
+        index.bitmaps = {
+            column: {value: arrays[column][i] for i, value in enumerate(values)}
+            for column, values in meta['values'].items()
+        }
+        return index
+
+    def appended(self, df: pd.DataFrame) -> 'BitmapIndex':
+        """
+        Index baru untuk baris lama + batch `df` (diletakkan setelah baris lama). Bitset lama
+        disalin apa adanya; hanya baris batch yang dihitung.
+        """
+        index = BitmapIndex.__new__(BitmapIndex)
+        index.row_count = self.row_count + len(df)
+        index.n_words = (index.row_count + 63) // 64
+        index.bitmaps = {}
+        for column in INDEX_COLUMNS:
+            batch = dict(_value_masks(df[column]))
+            old = self.bitmaps[column]
+            empty = np.zeros(len(df), dtype=bool)
+            index.bitmaps[column] = {
+                value: index._append_bits(old.get(value), self.row_count, batch.get(value, empty))
+                for value in list(old) + [v for v in batch if v not in old]
+            }
+        return index
+
+    def _append_bits(self, old: Optional[np.ndarray], old_rows: int, mask: np.ndarray) -> np.ndarray:
+        full_bytes, tail_bits = divmod(old_rows, 8)
+        out = np.zeros(self.n_words * 8, dtype=np.uint8)
+        tail = np.zeros(tail_bits, dtype=bool)
+        if old is not None:
+            old_bytes = old.view(np.uint8)
+            out[:full_bytes] = old_bytes[:full_bytes]
+            if tail_bits:
+                tail = np.unpackbits(old_bytes[full_bytes:full_bytes + 1], count=tail_bits).astype(bool)
+        packed = np.packbits(np.concatenate([tail, mask]))
+        out[full_bytes:full_bytes + len(packed)] = packed
+        return out.view(np.uint64)
+
+    def _dimension_bits(self, column: str, values: Iterable[Any]) -> np.ndarray:
+        bitmaps = self.bitmaps[column]
+        selected = [bitmaps[v] for v in map(normalize_filter_value, values) if v in bitmaps]
+        if not selected:
+            return np.zeros(self.n_words, dtype=np.uint64)
+        if len(selected) == 1:
+            return selected[0]
+        return np.bitwise_or.reduce(selected)
+
+    def filter(self, filters: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Bitset baris yang lolos filter (termasuk rentang bulan); None jika tidak ada filter aktif"""
+        result = None
+        for key, column in FILTER_DIMENSIONS.items():
+            values = filters.get(key)
+            if not values:
+                continue
+            bits = self._dimension_bits(column, values)
+            result = bits.copy() if result is None else np.bitwise_and(result, bits, out=result)
+        months = filter_months(filters)
+        if months is not None:
+            bits = self._dimension_bits('Month', months)
+            result = bits.copy() if result is None else np.bitwise_and(result, bits, out=result)
+        return result
+
+    def to_mask(self, bits: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Bitset ke mask boolean per baris (None tetap None)"""
+        if bits is None:
+            return None
+        return np.unpackbits(bits.view(np.uint8), count=self.row_count).astype(bool)
+
+    def contains(self, bits: Optional[np.ndarray], positions: np.ndarray) -> np.ndarray:
+        """Mask boolean: apakah setiap posisi baris lolos filter (tanpa unpack seluruh bitset)"""
+        if bits is None:
+            return np.ones(len(positions), dtype=bool)
+        as_bytes = bits.view(np.uint8)
+        # packbits: bit pertama tiap byte ada di posisi paling signifikan
+        return ((as_bytes[positions >> 3] >> (7 - (positions & 7)).astype(np.uint8)) & 1).astype(bool)
+
+    def count(self, bits: Optional[np.ndarray]) -> int:
+        return self.row_count if bits is None else popcount(bits)
+
+    def rows(self, bits: Optional[np.ndarray], after: int = -1, limit: Optional[int] = None) -> np.ndarray:
+        """
+        Posisi baris yang lolos filter, mulai setelah baris `after` (keyset), maksimal `limit`.
+        Hanya byte yang dibutuhkan untuk halaman ini yang di-unpack.
+        """
+        start = after + 1
+        if bits is None:
+            end = self.row_count if limit is None else min(self.row_count, start + limit)
+            return np.arange(start, max(start, end))
+
+        as_bytes = bits.view(np.uint8)
+        first_byte = start // 8
+        nonzero = np.flatnonzero(as_bytes[first_byte:]) + first_byte
+        if limit is not None:
+            # +8: bit di byte pertama sebelum `start` bisa ikut terhitung
+            cumulative = np.cumsum(_BYTE_POPCOUNT[as_bytes[nonzero]], dtype=np.int64)
+            nonzero = nonzero[:int(np.searchsorted(cumulative, limit + 8)) + 1]
+        unpacked = np.unpackbits(as_bytes[nonzero]).reshape(-1, 8)
+        byte_idx, bit_idx = np.nonzero(unpacked)
+        positions = nonzero[byte_idx] * 8 + bit_idx
+        positions = positions[positions >= start]
+        return positions if limit is None else positions[:limit]
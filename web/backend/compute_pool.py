@@ -0,0 +1,167 @@
+"""
+Pool komputasi untuk view analisis: thread atau proses, dengan deadline dan admission control.
+
+Setiap view dijalankan di luar event loop sehingga /health dan request lain tetap responsif.
+Jumlah task (berjalan + antre) dibatasi; jika penuh, request langsung ditolak (PoolSaturated,
+dipetakan ke 503 + Retry-After) alih-alih menumpuk. Task yang melewati deadline dibatalkan jika
+belum mulai; task yang sudah berjalan tidak bisa dihentikan paksa, tapi hasilnya diabaikan dan
+slot-nya tetap terhitung sampai selesai agar admission control tidak kebobolan.
+
+Di mode proses, snapshot tidak dikirim ke worker: worker meng-attach snapshot yang sama dari
+cache kolumnar (memory-map, lihat SnapshotStore) berdasarkan key-nya.
+"""
+
+import asyncio
+import math
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from aggregate_cube import SalesCube
+from bitmap_index import BitmapIndex
+from daily_series import DailySeries
+from price_units import PriceUnitsSample
+from snapshot_store import SnapshotStore
+
+POOL_KINDS = ('thread', 'process')
+
+# Jumlah snapshot yang diingat per proses worker (lama + baru saat pergantian versi)
+WORKER_SNAPSHOT_CACHE = 2
+
+
+class PoolSaturated(RuntimeError):
+    """Semua worker sibuk dan antrean penuh"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Server sedang sibuk, coba lagi dalam {retry_after} detik")
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(TimeoutError):
+    """Task tidak selesai sebelum deadline request"""
+
+
+class StoredSnapshot:
+    """Snapshot read-only yang di-attach dari cache kolumnar (dipakai di proses worker)"""
+
+    __slots__ = ('key', 'df', 'cube', 'index', 'sample', 'series')
+
+    def __init__(self, store: SnapshotStore, key: str):
+        df = store.load(key)
+        if df is None:
+            raise LookupError(f"Snapshot {key} tidak ditemukan di cache")
+        cube = store.load_arrays(key, 'cube')
+        index = store.load_arrays(key, 'index')
+        sample = store.load_arrays(key, 'sample')
+        series = store.load_arrays(key, 'series')
+        self.key = key
+        self.df = df
+        self.cube = SalesCube.from_arrays(*cube) if cube is not None else SalesCube(df)
+        self.index = BitmapIndex.from_arrays(*index) if index is not None else BitmapIndex(df)
+        self.sample = PriceUnitsSample.from_arrays(*sample) if sample is not None else PriceUnitsSample(df)
+        self.series = DailySeries.from_arrays(*series) if series is not None else DailySeries(df)
+
+
+_worker_snapshots: 'OrderedDict[str, StoredSnapshot]' = OrderedDict()
+
+
+def _run_stored(cache_dir: str, key: str, fn: Callable, params: Dict[str, Any]) -> Any:
+    """Entry point task di proses worker: attach snapshot (sekali per key) lalu hitung view"""
+    snapshot = _worker_snapshots.get(key)
+    if snapshot is None:
+        snapshot = StoredSnapshot(SnapshotStore(cache_dir), key)
+        _worker_snapshots[key] = snapshot
+        while len(_worker_snapshots) > WORKER_SNAPSHOT_CACHE:
+            _worker_snapshots.popitem(last=False)
+    return fn(snapshot, **params)
+
+
+class ComputePool:
+    """Executor view analisis dengan batas antrean dan deadline per task"""
+
+    def __init__(self, kind: str = 'thread', workers: int = 4, queue_size: int = 32,
+                 timeout: Optional[float] = None, cache_dir: Optional[str] = None):
+        if kind not in POOL_KINDS:
+            raise ValueError(f"Jenis pool tidak dikenal: {kind} (pilih {', '.join(POOL_KINDS)})")
+        self.kind = kind
+        self.workers = max(workers, 1)
+        self.capacity = self.workers + max(queue_size, 0)
+        self.timeout = timeout
+        # Mode proses: lokasi cache kolumnar tempat worker meng-attach snapshot
+        self.cache_dir = cache_dir
+        self.pending = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._avg_seconds = 0.0
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        # Dibuat saat task pertama agar import modul tidak men-spawn proses
+        if self._executor is None:
+            if self.kind == 'process':
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='compute')
+        return self._executor
+
+    def retry_after(self) -> int:
+        """Perkiraan detik sampai antrean saat ini habis (minimal 1)"""
+        return max(1, math.ceil(self._avg_seconds * self.pending / self.workers))
+
+    async def run(self, fn: Callable, snapshot: Any, timeout: Optional[float] = None, **params) -> Any:
+        """Jalankan `fn(snapshot, **params)` di pool; PoolSaturated / DeadlineExceeded jika gagal"""
+        with self._lock:
+            if self.pending >= self.capacity:
+                self.rejected += 1
+                raise PoolSaturated(self.retry_after())
+            self.pending += 1
+
+        started = time.perf_counter()
+        try:
+            if self.kind == 'process':
+                future = self._get_executor().submit(_run_stored, self.cache_dir, snapshot.key, fn, params)
+            else:
+                future = self._get_executor().submit(fn, snapshot, **params)
+        except BaseException:
+            self._task_done(None, started)
+            raise
+        future.add_done_callback(lambda f: self._task_done(f, started))
+
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise DeadlineExceeded(f"Perhitungan melewati batas waktu {timeout:g} detik") from None
+        finally:
+            # Request selesai/dibatalkan: task yang belum mulai tidak perlu dijalankan
+            future.cancel()
+
+    def _task_done(self, future, started: float):
+        with self._lock:
+            self.pending -= 1
+            if future is not None and not future.cancelled():
+                elapsed = time.perf_counter() - started
+                self._avg_seconds = elapsed if not self._avg_seconds else 0.8 * self._avg_seconds + 0.2 * elapsed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'kind': self.kind,
+            'workers': self.workers,
+            'capacity': self.capacity,
+            'pending': self.pending,
+            'rejected': self.rejected,
+            'timed_out': self.timed_out,
+            'avg_task_seconds': round(self._avg_seconds, 4),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,197 @@
+"""
+Prefix sum harian untuk time series dengan rentang tanggal dan granularitas bebas.
+
+Untuk setiap nilai dimensi (Region, State, Retailer, Product, Sales Method) dan untuk total,
+snapshot menyimpan jumlah kumulatif per hari dari sales, units, price_sum dan jumlah transaksi
+(baris valid saja, seperti /monthly-trends). Agregat satu bucket [awal, akhir] cukup
+P[akhir + 1] - P[awal], sehingga biayanya O(1) per bucket berapa pun jumlah barisnya.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from aggregate_cube import valid_sales_mask
+from sales_table import DAY_COLUMN, FILTER_DIMENSIONS, filter_months, format_days, normalize_filter_value
+
+# Nilai parameter `split` -> kolom dimensi
+SERIES_SPLITS = {
+    'region': 'Region',
+    'state': 'State',
+    'retailer': 'Retailer',
+    'product': 'Product',
+    'sales_method': 'Sales Method',
+}
+SERIES_DIMENSIONS = list(SERIES_SPLITS.values())
+GRANULARITIES = ('day', 'week', 'month', 'quarter')
+
+# Kunci prefix sum untuk seluruh data (tanpa split)
+TOTAL = 'Total'
+
+MEASURES = {'sales': 'Total Sales', 'units': 'Units Sold', 'price_sum': 'Price per Unit', 'count': None}
+
+
+def _codes(series: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    # Kode -1 (nilai kosong) tidak masuk series per nilai, tapi tetap dihitung di total
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), np.asarray(series.cat.categories, dtype=object)
+    codes, categories = pd.factorize(series, sort=True)
+    return codes, np.asarray(categories, dtype=object)
+
+
+def _cumulative(daily: np.ndarray) -> np.ndarray:
+    """Jumlah per hari (nilai x hari) -> prefix sum dengan kolom nol di depan"""
+    prefix = np.zeros((daily.shape[0], daily.shape[1] + 1), dtype=daily.dtype)
+    np.cumsum(daily, axis=1, out=prefix[:, 1:])
+    return prefix
+
+
+def bucket_edges(first: int, last: int, granularity: str) -> Tuple[np.ndarray, List[str]]:
+    """
+    Batas bucket (offset hari) untuk rentang [first, last] inklusif: bucket ke-i adalah
+    [edges[i], edges[i + 1]). Bucket pertama/terakhir dipotong ke rentang; label mengikuti
+    awal bucket penuh (tanggal, awal minggu Senin, YYYY-MM atau YYYY-Qn).
+    """
+    if granularity == 'day':
+        starts = np.arange(first, last + 1, dtype=np.int64)
+        labels = format_days(starts).tolist()
+    elif granularity == 'week':
+        # 1970-01-05 (offset 4) adalah hari Senin
+        week_start = first - (first - 4) % 7
+        starts = np.arange(week_start, last + 1, 7, dtype=np.int64)
+        labels = format_days(starts).tolist()
+    else:
+        step = 1 if granularity == 'month' else 3
+        month_first = np.datetime64(int(first), 'D').astype('datetime64[M]').astype(np.int64)
+        month_last = np.datetime64(int(last), 'D').astype('datetime64[M]').astype(np.int64)
+        months = np.arange(month_first - month_first % step, month_last + 1, step)
+        starts = months.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+        if granularity == 'month':
+            labels = np.datetime_as_string(months.astype('datetime64[M]'), unit='M').tolist()
+        else:
+            labels = [f"{1970 + m // 12}-Q{m % 12 // 3 + 1}" for m in months.tolist()]
+    edges = np.append(np.maximum(starts, first), last + 1)
+    return edges, labels
+
+
+class DailySeries:
+    """Prefix sum harian per nilai dimensi; dibangun sekali per snapshot"""
+
+    def __init__(self, df: pd.DataFrame, dims: Sequence[str] = SERIES_DIMENSIONS):
+        valid = valid_sales_mask(df).to_numpy()
+        days = df[DAY_COLUMN].to_numpy(np.int64)[valid]
+        self.day_start = int(days.min()) if len(days) else 0
+        self.n_days = int(days.max()) - self.day_start + 1 if len(days) else 0
+        day = days - self.day_start
+        # Measure integer tetap integer (int64) agar output sama dengan rollup cube
+        weights = {
+            name: (df[column].to_numpy(np.float64)[valid], pd.api.types.is_integer_dtype(df[column]))
+            if column else (None, True)
+            for name, column in MEASURES.items()
+        }
+
+        self.categories: Dict[str, np.ndarray] = {TOTAL: np.array([TOTAL], dtype=object)}
+        self.prefix: Dict[str, Dict[str, np.ndarray]] = {TOTAL: self._build(np.zeros(len(day), np.int64), 1, day, weights)}
+        for dim in dims:
+            codes, categories = _codes(df[dim])
+            codes = codes[valid]
+            present = codes >= 0
+            self.categories[dim] = categories
+            self.prefix[dim] = self._build(
+                codes[present].astype(np.int64), len(categories), day[present],
+                {name: (w[present] if w is not None else None, integer) for name, (w, integer) in weights.items()})
+
+    def _build(self, codes: np.ndarray, n_values: int, day: np.ndarray,
+               weights: Dict[str, Tuple[Optional[np.ndarray], bool]]) -> Dict[str, np.ndarray]:
+        flat = codes * self.n_days + day
+        size = n_values * self.n_days
+        prefix = {}
+        for name, (w, integer) in weights.items():
+            daily = np.bincount(flat, weights=w, minlength=size)
+            daily = np.rint(daily).astype(np.int64) if integer else daily
+            prefix[name] = _cumulative(daily.reshape(n_values, self.n_days))
+        return prefix
+
+    @property
+    def day_end(self) -> int:
+        """Offset hari terakhir yang tercakup (inklusif)"""
+        return self.day_start + self.n_days - 1
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Matriks prefix (nilai x hari+1) per dimensi dan measure, untuk SnapshotStore.store_arrays"""
+        arrays = {
+            f'prefix:{dim}:{name}': values
+            for dim, measures in self.prefix.items() for name, values in measures.items()
+        }
+        meta = {
+            'day_start': self.day_start,
+            'n_days': self.n_days,
+            'categories': {dim: values.tolist() for dim, values in self.categories.items()},
+        }
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> 'DailySeries':
+        series = cls.__new__(cls)
+        series.day_start, series.n_days = meta['day_start'], meta['n_days']
+        series.categories = {dim: np.asarray(values, dtype=object) for dim, values in meta['categories'].items()}
+        series.prefix = {
+            dim: {name: arrays[f'prefix:{dim}:{name}'] for name in MEASURES}
+            for dim in series.categories
+        }
+        return series
+
+    def merged(self, other: 'DailySeries') -> 'DailySeries':
+        """Series untuk gabungan dua snapshot (rentang hari dan kategori digabung)"""
+        parts = [part for part in (self, other) if part.n_days] or [self]
+        day_start = min(part.day_start for part in parts)
+        day_end = max(part.day_end for part in parts)
+
+        merged = DailySeries.__new__(DailySeries)
+        merged.day_start, merged.n_days = day_start, day_end - day_start + 1
+        merged.categories, merged.prefix = {}, {}
+        for dim in self.categories:
+            categories = np.unique(np.concatenate([part.categories[dim].astype(str) for part in parts]))
+            merged.categories[dim] = categories.astype(object)
+            merged.prefix[dim] = {}
+            for name in MEASURES:
+                dtype = np.result_type(*(part.prefix[dim][name].dtype for part in parts))
+                daily = np.zeros((len(categories), merged.n_days), dtype=dtype)
+                for part in parts:
+                    rows = np.searchsorted(categories, part.categories[dim].astype(str))
+                    offset = part.day_start - day_start
+                    daily[rows, offset:offset + part.n_days] += np.diff(part.prefix[dim][name], axis=1)
+                merged.prefix[dim][name] = _cumulative(daily)
+        return merged
+
+    def sums(self, dim: str, edges: np.ndarray, rows: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """Jumlah per (nilai, bucket) untuk batas bucket `edges`; `rows` memilih nilai dimensi"""
+        index = np.clip(edges - self.day_start, 0, self.n_days)
+        result = {}
+        for name, prefix in self.prefix[dim].items():
+            prefix = prefix if rows is None else prefix[rows]
+            result[name] = prefix[:, index[1:]] - prefix[:, index[:-1]]
+        return result
+
+    def value_rows(self, dim: str, values) -> np.ndarray:
+        """Baris matriks prefix untuk daftar nilai filter"""
+        lookup = {normalize_filter_value(v): i for i, v in enumerate(self.categories[dim])}
+        return np.array(sorted({lookup[v] for v in map(normalize_filter_value, values) if v in lookup}), dtype=np.int64)
+
+
+def prefix_plan(filters: Optional[Dict[str, Any]], dim: Optional[str]) -> Optional[Tuple[Optional[str], Any]]:
+    """
+    (dimensi yang difilter, nilai filter) jika filter bisa dijawab langsung dari prefix sum
+    snapshot: tanpa filter, atau hanya satu dimensi series yang difilter dan sama dengan split
+    `dim` (atau tanpa split). None berarti baris terfilter harus dipindai.
+    """
+    active = {FILTER_DIMENSIONS[key]: filters[key] for key in FILTER_DIMENSIONS if filters and filters.get(key)}
+    if filter_months(filters) is not None or len(active) > 1:
+        return None
+    if not active:
+        return None, None
+    (filtered, values), = active.items()
+    if filtered not in SERIES_DIMENSIONS or dim not in (None, filtered):
+        return None
+    return filtered, values
@@ -0,0 +1,466 @@
+"""
+Snapshot data Nike dan NikeDataProcessor: mengambil sumber, membangun / memuat snapshot dari
+cache kolumnar, mem-publish snapshot dan menjalankan view analisis di compute pool.
+
+Dipisah dari main.py agar proses lain (snapshot_loader, benchmark) bisa membuat processor
+sendiri tanpa meng-import aplikasi FastAPI beserta processor global-nya.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+from fastapi import HTTPException
+
+import analysis_views
+from aggregate_cube import SalesCube
+from analysis_views import (DEFAULT_DENSITY_BINS, DEFAULT_PAGE_SIZE, DEFAULT_SCATTER_POINTS, MAX_DENSITY_BINS,
+                            MAX_SCATTER_POINTS, PRICE_CORRELATION_MODES)
+from bitmap_index import BitmapIndex
+from compute_pool import ComputePool, DeadlineExceeded, PoolSaturated
+from daily_series import GRANULARITIES, SERIES_SPLITS, DailySeries
+from data_source import SourceUnavailable, make_source
+from ingest import ChunkedIngestor
+from metrics import REGISTRY, stage
+from price_units import PriceUnitsSample
+from query_engine import run_query
+from sales_table import concat_sales_frames, memory_report
+from snapshot_store import SnapshotStore
+
+# Constants sesuai dengan Jupyter Notebook
+CSV_URL = "https://raw.githubusercontent.com/ham407/Analisis-Penjualan-Produk-Nike-U.S.-Tahun-2020---2021/main/Nike%20Dataset.csv"
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LOCAL_CSV_PATH = os.path.join(BASE_DIR, '..', '..', 'Data', 'Nike Dataset.csv')
+
+# Sumber data: path file CSV, direktori berisi file CSV, atau URL HTTP.
+# Default ke dataset lokal agar server tetap jalan tanpa jaringan.
+DATA_SOURCE = os.getenv('NIKE_DATA_SOURCE') or (LOCAL_CSV_PATH if os.path.exists(LOCAL_CSV_PATH) else CSV_URL)
+CACHE_DIR = os.getenv('NIKE_CACHE_DIR', os.path.join(BASE_DIR, '.cache', 'snapshots'))
+
+# Interval refresh di background dan batas umur snapshot (detik). Request hanya menunggu
+# refresh jika snapshot belum ada atau sudah lebih tua dari MAX_STALENESS.
+REFRESH_INTERVAL = float(os.getenv('NIKE_REFRESH_INTERVAL', '300'))
+MAX_STALENESS = float(os.getenv('NIKE_MAX_STALENESS', '3600'))
+
+# Peran proses terhadap snapshot: 'load' (ambil sumber, bangun dan publish snapshot) atau
+# 'attach' (worker multi-proses: hanya memory-map snapshot yang dipublish proses loader)
+SNAPSHOT_MODE = os.getenv('NIKE_SNAPSHOT_MODE', 'load')
+SNAPSHOT_MODES = ('load', 'attach')
+# Interval (detik) worker attach memeriksa versi snapshot yang dipublish
+ATTACH_POLL_INTERVAL = float(os.getenv('NIKE_ATTACH_POLL_INTERVAL', '2'))
+
+# Pool untuk perhitungan view: 'thread' atau 'process', jumlah worker, panjang antrean
+# maksimum (di luar task yang sedang berjalan) dan deadline per perhitungan (detik)
+COMPUTE_POOL = os.getenv('NIKE_COMPUTE_POOL', 'thread')
+COMPUTE_WORKERS = int(os.getenv('NIKE_COMPUTE_WORKERS', '4'))
+COMPUTE_QUEUE = int(os.getenv('NIKE_COMPUTE_QUEUE', '32'))
+REQUEST_TIMEOUT = float(os.getenv('NIKE_REQUEST_TIMEOUT', '15'))
+
+# Warm-up snapshot saat startup, sebelum menerima traffic: 'artifact' (snapshot prebuilt yang
+# dipublish di NIKE_CACHE_DIR jika ada), 'full' (artifact, atau ingestion penuh dari sumber) atau 'off'
+WARMUP_MODE = os.getenv('NIKE_WARMUP', 'artifact')
+WARMUP_MODES = ('off', 'artifact', 'full')
+
+# View yang bisa diminta lewat /dashboard (nama = path endpoint tunggalnya) -> method NikeDataProcessor
+DASHBOARD_VIEWS = {
+    'summary': 'get_summary_statistics',
+    'monthly-trends': 'get_monthly_trends',
+    'time-series': 'get_time_series',
+    'top-products': 'get_top_products',
+    'region-distribution': 'get_region_distribution',
+    'price-correlation': 'get_price_correlation',
+    'state-analysis': 'get_state_analysis',
+    'retailer-analysis': 'get_retailer_analysis',
+    'sales-method-analysis': 'get_sales_method_analysis',
+}
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_LOADS = REGISTRY.counter(
+    'nike_snapshot_loads_total', 'Snapshot dimuat menurut asalnya (unchanged, store, append, ingest, attach, artifact)', ['source'])
+SNAPSHOT_LOOKUPS = REGISTRY.counter(
+    'nike_snapshot_requests_total',
+    'Lookup snapshot per request: fresh, stale (disajikan + refresh background), miss (menunggu load)', ['result'])
+QUERY_EXECUTIONS = REGISTRY.counter(
+    'nike_query_executions_total', 'Eksekusi /query menurut plan yang dipilih (cube, scan)', ['plan'])
+
+class DataSnapshot:
+    """Snapshot data; df tidak pernah diubah, snapshot baru menggantikan yang lama secara atomik"""
+    
+    __slots__ = ('df', 'key', 'version', 'parts', 'cube', 'index', 'sample', 'series', 'memory', 'loaded_at',
+                 'checked_at')
+    
+    def __init__(self, df: pd.DataFrame, key: str, version: int, parts: Optional[Dict[str, str]] = None,
+                 cube: Optional[SalesCube] = None, index: Optional[BitmapIndex] = None,
+                 sample: Optional[PriceUnitsSample] = None, series: Optional[DailySeries] = None):
+        self.df = df
+        self.key = key
+        self.version = version
+        # Hash per file sumber yang sudah masuk ke snapshot ini
+        self.parts = parts or {}
+        # Agregat turunan dibangun sekali per snapshot
+        self.cube = cube if cube is not None else SalesCube(df)
+        self.index = index if index is not None else BitmapIndex(df)
+        self.sample = sample if sample is not None else PriceUnitsSample(df)
+        self.series = series if series is not None else DailySeries(df)
+        self.memory = memory_report(df)
+        self.loaded_at = datetime.now()
+        self.checked_at = time.monotonic()
+    
+    def appended(self, batch: pd.DataFrame, key: str, version: int, parts: Dict[str, str]) -> 'DataSnapshot':
+        """Snapshot baru = snapshot ini + batch invoice baru; agregat digabung, bukan dibangun ulang"""
+        return DataSnapshot(
+            concat_sales_frames([self.df, batch]), key, version, parts,
+            cube=self.cube.merged(SalesCube(batch)),
+            index=self.index.appended(batch),
+            sample=self.sample.appended(batch),
+            series=self.series.merged(DailySeries(batch)),
+        )
+    
+    @property
+    def age(self) -> float:
+        """Detik sejak sumber data terakhir diperiksa"""
+        return time.monotonic() - self.checked_at
+
+class NikeDataProcessor:
+    """Processor data Nike sesuai dengan logika dan spesifikasi Jupyter Notebook"""
+    
+    def __init__(self, source_spec: str = DATA_SOURCE, cache_dir: str = CACHE_DIR,
+                 refresh_interval: float = REFRESH_INTERVAL, max_staleness: float = MAX_STALENESS,
+                 mode: str = SNAPSHOT_MODE):
+        if mode not in SNAPSHOT_MODES:
+            raise ValueError(f"Mode snapshot tidak dikenal: {mode} (pilih {', '.join(SNAPSHOT_MODES)})")
+        self.snapshot: Optional[DataSnapshot] = None
+        self.mode = mode
+        self.refresh_interval = refresh_interval if mode == 'load' else min(refresh_interval, ATTACH_POLL_INTERVAL)
+        self.max_staleness = max_staleness
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        # Perhitungan view berjalan di pool terpisah agar event loop (dan /health) tetap bebas
+        self.compute = ComputePool(COMPUTE_POOL, COMPUTE_WORKERS, COMPUTE_QUEUE, REQUEST_TIMEOUT, cache_dir)
+        # Worker attach tidak pernah membaca sumber data sendiri
+        self.source = make_source(source_spec, state_dir=cache_dir) if mode == 'load' else None
+        self.store = SnapshotStore(cache_dir)
+        self.ingestor = ChunkedIngestor()
+        self._inflight: Optional[asyncio.Future] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Dipanggil dengan (snapshot_lama, snapshot_baru) setiap kali snapshot diganti
+        self.snapshot_listeners: List[Callable[[DataSnapshot, DataSnapshot], None]] = []
+    
+    async def load_data(self) -> pd.DataFrame:
+        """Data dari snapshot saat ini (stale-while-revalidate)"""
+        snapshot = await self.get_snapshot()
+        return snapshot.df
+    
+    async def get_snapshot(self) -> DataSnapshot:
+        """Snapshot saat ini; hanya menunggu jika belum ada atau melewati max staleness"""
+        snapshot = self.snapshot
+        if snapshot is None or snapshot.age >= self.max_staleness:
+            SNAPSHOT_LOOKUPS.inc(result='miss')
+            with stage('snapshot_wait'):
+                return await self.refresh()
+        if snapshot.age >= self.refresh_interval:
+            # Sajikan snapshot lama, refresh berjalan di background
+            SNAPSHOT_LOOKUPS.inc(result='stale')
+            self._start_refresh()
+        else:
+            SNAPSHOT_LOOKUPS.inc(result='fresh')
+        return snapshot
+    
+    async def refresh(self) -> DataSnapshot:
+        """Refresh snapshot; pemanggil yang bersamaan berbagi satu proses load (single-flight)"""
+        return await asyncio.shield(self._start_refresh())
+    
+    def _start_refresh(self) -> asyncio.Future:
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._build_snapshot())
+            self._inflight.add_done_callback(self._clear_inflight)
+        return self._inflight
+    
+    def _clear_inflight(self, future: asyncio.Future):
+        self._inflight = None
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning("Refresh data gagal: %s", getattr(future.exception(), 'detail', future.exception()))
+    
+    async def _build_snapshot(self) -> DataSnapshot:
+        current = self.snapshot
+        try:
+            loop = asyncio.get_running_loop()
+            version = (current.version + 1) if current else 1
+            # Parse/agregasi di executor, lalu swap atomik: request yang sedang berjalan
+            # tetap memegang snapshot lama
+            snapshot = await loop.run_in_executor(self.executor, self._load_snapshot, current, version)
+            if snapshot is current:
+                current.checked_at = time.monotonic()
+                return current
+        except HTTPException:
+            raise
+        except SourceUnavailable as e:
+            raise HTTPException(status_code=503, detail=f"Gagal mengambil data: {str(e)}")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error processing data: {str(e)}")
+        
+        self.snapshot = snapshot
+        if current is not None:
+            for listener in self.snapshot_listeners:
+                listener(current, snapshot)
+        return snapshot
+    
+    def start_background_refresh(self):
+        """Jalankan task refresh periodik (dipanggil saat startup aplikasi)"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh_loop())
+    
+    async def stop_background_refresh(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+    
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except HTTPException:
+                # Sudah dicatat di _clear_inflight; snapshot lama tetap disajikan
+                pass
+    
+    def _load_snapshot(self, current: Optional[DataSnapshot], version: int) -> DataSnapshot:
+        """
+        Snapshot untuk isi sumber saat ini: snapshot lama jika tidak berubah, cache kolumnar,
+        append batch invoice baru ke snapshot lama, atau ingestion penuh per chunk.
+        Snapshot baru selalu dipublish agar bisa di-attach worker lain.
+        """
+        if self.mode == 'attach':
+            return self._attach_snapshot(current)
+        
+        with stage('fetch'):
+            content = self.source.fetch()
+        ingested = None
+        if content.content_hash is None:
+            # Isi baru di-stream (HTTP): parse berjalan selagi download, hash baru diketahui di akhir
+            with stage('ingest'):
+                ingested = self.ingestor.ingest(content.open_parts())
+        key = self.store.snapshot_key(content.content_hash)
+        if current is not None and current.key == key:
+            SNAPSHOT_LOADS.inc(source='unchanged')
+            return current
+        
+        with stage('store_load'):
+            df = self.store.load(key)
+        if df is not None:
+            snapshot = self._snapshot_from_store(key, df, version, content.part_hashes)
+            SNAPSHOT_LOADS.inc(source='store')
+        else:
+            new_parts = self._appended_parts(current, content.part_hashes) if ingested is None else []
+            if new_parts:
+                with stage('ingest'):
+                    batch = self.ingestor.ingest(content.open_parts(new_parts))
+                with stage('snapshot_build'):
+                    snapshot = current.appended(batch, key, version, content.part_hashes)
+                SNAPSHOT_LOADS.inc(source='append')
+            else:
+                if ingested is None:
+                    with stage('ingest'):
+                        ingested = self.ingestor.ingest(content.open_parts())
+                with stage('snapshot_build'):
+                    snapshot = DataSnapshot(ingested, key, version, content.part_hashes)
+                SNAPSHOT_LOADS.inc(source='ingest')
+            with stage('store_write'):
+                self.store.store(key, snapshot.df)
+        with stage('publish'):
+            self._publish(snapshot)
+        return snapshot
+    
+    def _snapshot_from_store(self, key: str, df: pd.DataFrame, version: int,
+                             parts: Dict[str, str]) -> DataSnapshot:
+        """Snapshot dari cache kolumnar; agregat yang sudah dipublish ikut di-memory-map"""
+        cube = self.store.load_arrays(key, 'cube')
+        index = self.store.load_arrays(key, 'index')
+        sample = self.store.load_arrays(key, 'sample')
+        series = self.store.load_arrays(key, 'series')
+        return DataSnapshot(
+            df, key, version, parts,
+            cube=SalesCube.from_arrays(*cube) if cube is not None else None,
+            index=BitmapIndex.from_arrays(*index) if index is not None else None,
+            sample=PriceUnitsSample.from_arrays(*sample) if sample is not None else None,
+            series=DailySeries.from_arrays(*series) if series is not None else None,
+        )
+    
+    def _publish(self, snapshot: DataSnapshot):
+        """Simpan agregat snapshot di samping kolom tabel lalu naikkan versi pointer CURRENT"""
+        if not self.store.has_arrays(snapshot.key, 'cube'):
+            self.store.store_arrays(snapshot.key, 'cube', *snapshot.cube.to_arrays())
+        if not self.store.has_arrays(snapshot.key, 'index'):
+            self.store.store_arrays(snapshot.key, 'index', *snapshot.index.to_arrays())
+        if not self.store.has_arrays(snapshot.key, 'sample'):
+            self.store.store_arrays(snapshot.key, 'sample', *snapshot.sample.to_arrays())
+        if not self.store.has_arrays(snapshot.key, 'series'):
+            self.store.store_arrays(snapshot.key, 'series', *snapshot.series.to_arrays())
+        self.store.publish(snapshot.key, snapshot.parts)
+    
+    async def warm_up(self, mode: str = WARMUP_MODE) -> Optional[str]:
+        """
+        Muat snapshot sebelum aplikasi menerima traffic. Kembalikan asal snapshot: 'artifact'
+        (snapshot yang sudah dipublish di cache, cukup memory-map) atau 'source' (refresh penuh);
+        None jika tidak ada yang dimuat dan snapshot pertama dimuat saat request pertama.
+        """
+        if mode not in WARMUP_MODES:
+            raise ValueError(f"Mode warm-up tidak dikenal: {mode} (pilih {', '.join(WARMUP_MODES)})")
+        if mode == 'off' or self.snapshot is not None:
+            return None
+        loop = asyncio.get_running_loop()
+        snapshot = await loop.run_in_executor(self.executor, self._load_artifact)
+        if snapshot is not None:
+            self.snapshot = snapshot
+            if self.mode == 'load':
+                # Artifact bisa lebih lama dari sumber: periksa sumber di background
+                self._start_refresh()
+            return 'artifact'
+        if mode == 'full':
+            await self.refresh()
+            return 'source'
+        return None
+    
+    def _load_artifact(self) -> Optional[DataSnapshot]:
+        """Snapshot yang terakhir dipublish di cache (tanpa menyentuh sumber data); None jika tidak ada"""
+        published = self.store.read_published()
+        if published is None:
+            return None
+        with stage('store_load'):
+            df = self.store.load(published['key'])
+        if df is None:
+            return None
+        SNAPSHOT_LOADS.inc(source='artifact')
+        return self._snapshot_from_store(published['key'], df, published['version'], published.get('parts', {}))
+    
+    def _attach_snapshot(self, current: Optional[DataSnapshot]) -> DataSnapshot:
+        """Mode attach: pakai snapshot yang dipublish loader (read-only, tanpa salinan)"""
+        published = self.store.read_published()
+        if published is None:
+            raise HTTPException(status_code=503, detail="Snapshot data belum dipublish oleh proses loader")
+        if current is not None and current.key == published['key']:
+            return current
+        with stage('store_load'):
+            df = self.store.load(published['key'])
+        if df is None:
+            raise HTTPException(status_code=503, detail=f"Snapshot {published['key']} tidak ditemukan di cache")
+        SNAPSHOT_LOADS.inc(source='attach')
+        return self._snapshot_from_store(published['key'], df, published['version'], {})
+    
+    @staticmethod
+    def _appended_parts(current: Optional[DataSnapshot], part_hashes: Dict[str, str]) -> List[str]:
+        """File baru jika sumber hanya bertambah file (file lama tidak berubah); selain itu kosong"""
+        if current is None or not current.parts:
+            return []
+        if any(part_hashes.get(name) != digest for name, digest in current.parts.items()):
+            return []
+        return [name for name in part_hashes if name not in current.parts]
+    
+    async def run_view(self, view: Callable, **params) -> Any:
+        """Hitung view analisis (fungsi di analysis_views) atas snapshot saat ini di compute pool"""
+        return await self._compute(view, await self.get_snapshot(), **params)
+    
+    async def _compute(self, view: Callable, snapshot: DataSnapshot, **params) -> Any:
+        # Pool penuh -> 503 + Retry-After, melewati deadline -> 504
+        try:
+            # Span mencakup antrean pool + perhitungan (groupby/rollup) view
+            with stage(f'view.{view.__name__}'):
+                return await self.compute.run(view, snapshot, **params)
+        except PoolSaturated as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={'Retry-After': str(e.retry_after)})
+        except DeadlineExceeded as e:
+            raise HTTPException(status_code=504, detail=str(e))
+    
+    async def get_summary_statistics(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Statistik summary sesuai notebook"""
+        return await self.run_view(analysis_views.summary_statistics, filters=filters)
+    
+    async def get_monthly_trends(self, year: Optional[int] = None,
+                                 filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Analisis tren bulanan sesuai notebook (Visualisasi 1)"""
+        return await self.run_view(analysis_views.monthly_trends, year=year, filters=filters)
+    
+    async def get_time_series(self, start: Optional[str] = None, end: Optional[str] = None,
+                              granularity: str = 'month', split: Optional[str] = None,
+                              filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Time series untuk rentang tanggal dan granularitas bebas (prefix sum harian)"""
+        if granularity not in GRANULARITIES:
+            raise HTTPException(status_code=400, detail=f"Granularitas tidak dikenal: {granularity} (pilihan: {', '.join(GRANULARITIES)})")
+        if split is not None and split not in SERIES_SPLITS:
+            raise HTTPException(status_code=400, detail=f"Split tidak dikenal: {split} (pilihan: {', '.join(SERIES_SPLITS)})")
+        try:
+            dates = [datetime.strptime(value, '%Y-%m-%d') for value in (start, end) if value is not None]
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="start dan end harus berformat YYYY-MM-DD")
+        if start is not None and end is not None and dates[0] > dates[1]:
+            raise HTTPException(status_code=400, detail="start harus sebelum atau sama dengan end")
+        return await self.run_view(analysis_views.time_series, start=start, end=end, granularity=granularity,
+                                   split=split, filters=filters)
+    
+    async def get_top_products(self, limit: int = 10, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Analisis top produk sesuai notebook (Visualisasi 2)"""
+        return await self.run_view(analysis_views.top_products, limit=limit, filters=filters)
+    
+    async def get_region_distribution(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Distribusi wilayah sesuai notebook (Visualisasi 3)"""
+        return await self.run_view(analysis_views.region_distribution, filters=filters)
+    
+    async def get_price_correlation(self, mode: str = 'sample', points: int = DEFAULT_SCATTER_POINTS,
+                                    bins: int = DEFAULT_DENSITY_BINS,
+                                    filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Korelasi harga vs unit terjual sesuai notebook (Visualisasi 4)"""
+        # Divalidasi di sini agar /dashboard mendapat pesan yang sama seperti endpoint tunggal
+        if mode not in PRICE_CORRELATION_MODES:
+            raise HTTPException(status_code=400, detail=f"Mode tidak dikenal: {mode} (pilihan: {', '.join(PRICE_CORRELATION_MODES)})")
+        if not 1 <= points <= MAX_SCATTER_POINTS or not 1 <= bins <= MAX_DENSITY_BINS:
+            raise HTTPException(status_code=400, detail=f"points harus 1-{MAX_SCATTER_POINTS} dan bins 1-{MAX_DENSITY_BINS}")
+        return await self.run_view(analysis_views.price_correlation, mode=mode, points=points, bins=bins,
+                                   filters=filters)
+    
+    async def get_state_analysis(self, limit: int = 15, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Analisis per negara bagian sesuai notebook (Visualisasi 5)"""
+        return await self.run_view(analysis_views.state_analysis, limit=limit, filters=filters)
+    
+    async def get_retailer_analysis(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Analisis performa retailer"""
+        return await self.run_view(analysis_views.retailer_analysis, filters=filters)
+    
+    async def get_sales_method_analysis(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Analisis metode penjualan"""
+        return await self.run_view(analysis_views.sales_method_analysis, filters=filters)
+    
+    def dashboard_view(self, view: str) -> Callable:
+        """Method view untuk nama di DASHBOARD_VIEWS (dipakai /dashboard dan export_static)"""
+        return getattr(self, DASHBOARD_VIEWS[view])
+    
+    async def run_query(self, group_by: List[str], metrics: List[str], filters: Optional[Dict[str, Any]] = None,
+                        order_by: Optional[List[str]] = None, limit: Optional[int] = None,
+                        valid_only: bool = False, plan: str = 'auto') -> Dict[str, Any]:
+        """Query agregasi generik (spesifikasi sudah dinormalisasi parse_query)"""
+        result = await self.run_view(run_query, group_by=group_by, metrics=metrics, filters=filters,
+                                     order_by=order_by, limit=limit, valid_only=valid_only, plan=plan)
+        QUERY_EXECUTIONS.inc(plan=result['plan']['plan'])
+        return result
+    
+    async def select_filtered_rows(self, filters: Dict[str, Any], cursor: Optional[str] = None,
+                                   page_size: Optional[int] = None):
+        """Snapshot + posisi baris halaman ini + total record + cursor halaman berikutnya"""
+        snapshot = await self.get_snapshot()
+        rows, total_records, next_cursor = await self._compute(
+            analysis_views.filtered_rows, snapshot, filters=filters, cursor=cursor, page_size=page_size)
+        return snapshot, rows, total_records, next_cursor
+    
+    async def get_filtered_data(self, filters: Dict[str, Any], cursor: Optional[str] = None,
+                                page_size: int = DEFAULT_PAGE_SIZE, output_format: str = 'records') -> Dict[str, Any]:
+        """Data dengan filter untuk frontend (format records atau columns)"""
+        return await self.run_view(analysis_views.filtered_page, filters=filters, cursor=cursor,
+                                   page_size=page_size, output_format=output_format)
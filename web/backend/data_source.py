@@ -0,0 +1,144 @@
+"""
+Sumber data untuk NikeDataProcessor: file CSV lokal, URL HTTP, atau direktori berisi file CSV.
+
+Setiap sumber mengembalikan SourceContent yang berisi content hash (kunci cache snapshot)
+dan fungsi untuk membaca isi file mentah hanya jika benar-benar dibutuhkan. Sumber HTTP ada di
+http_source.py.
+"""
+
+import hashlib
+import io
+import os
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+class SourceUnavailable(Exception):
+    """Sumber data tidak bisa diambil (jaringan / HTTP error)"""
+
+
+class SourceContent:
+    """Hasil fetch dari sebuah sumber: content hash + pembaca isi mentah (lazy)"""
+
+    def __init__(self, content_hash: Optional[str], read_parts: Callable[[], List[Tuple[str, bytes]]], label: str,
+                 part_hashes: Optional[Dict[str, str]] = None,
+                 open_part: Optional[Callable[[str], BinaryIO]] = None):
+        # None: isi baru masih di-stream (HTTP); hash terisi setelah body habis dibaca lewat open_parts()
+        self.content_hash = content_hash
+        self.label = label
+        self._part_hashes = part_hashes
+        self._read_parts = read_parts
+        self._open_part = open_part
+
+    @property
+    def part_hashes(self) -> Dict[str, str]:
+        """Hash per file CSV; dipakai untuk mendeteksi batch invoice yang baru ditambahkan"""
+        return self._part_hashes or {self.label: self.content_hash}
+
+    def read_parts(self) -> List[Tuple[str, bytes]]:
+        """Daftar (nama, isi bytes) untuk setiap file CSV dari sumber"""
+        return self._read_parts()
+
+    def open_parts(self, names: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, BinaryIO]]:
+        """
+        (nama, file object biner) untuk file CSV terpilih (default semua), dibuka satu per satu
+        agar isi file bisa dibaca bertahap tanpa dimuat utuh ke memori.
+        """
+        wanted = list(self.part_hashes) if names is None else list(names)
+        if self._open_part is None:
+            bodies = dict(self.read_parts())
+            for name in wanted:
+                yield name, io.BytesIO(bodies[name])
+            return
+        for name in wanted:
+            with self._open_part(name) as f:
+                yield name, f
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class LocalFileSource:
+    """Sumber data berupa satu file CSV di disk"""
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self._stat_key = None
+        self._hash = None
+
+    def fetch(self) -> SourceContent:
+        # Hash ulang hanya jika ukuran atau mtime file berubah
+        st = os.stat(self.path)
+        stat_key = (st.st_size, st.st_mtime_ns)
+        if stat_key != self._stat_key:
+            self._hash = _hash_file(self.path)
+            self._stat_key = stat_key
+        name = os.path.basename(self.path)
+        return SourceContent(
+            self._hash,
+            lambda: [(name, _read_file(self.path))],
+            self.path,
+            part_hashes={name: self._hash},
+            open_part=lambda _: open(self.path, 'rb'),
+        )
+
+
+class DirectorySource:
+    """Sumber data berupa direktori berisi beberapa file CSV (mis. invoice harian)"""
+
+    def __init__(self, path: str, pattern_suffix: str = '.csv'):
+        self.path = os.path.abspath(path)
+        self.pattern_suffix = pattern_suffix
+        self._files: Dict[str, LocalFileSource] = {}
+
+    def _list_files(self) -> List[str]:
+        return sorted(
+            os.path.join(self.path, name)
+            for name in os.listdir(self.path)
+            if name.lower().endswith(self.pattern_suffix)
+        )
+
+    def fetch(self) -> SourceContent:
+        files = self._list_files()
+        if not files:
+            raise FileNotFoundError(f"Tidak ada file {self.pattern_suffix} di {self.path}")
+
+        digest = hashlib.blake2b(digest_size=16)
+        part_hashes: Dict[str, str] = {}
+        for path in files:
+            source = self._files.setdefault(path, LocalFileSource(path))
+            name = os.path.basename(path)
+            part_hashes[name] = source.fetch().content_hash
+            digest.update(name.encode())
+            digest.update(part_hashes[name].encode())
+        self._files = {path: self._files[path] for path in files}
+
+        return SourceContent(
+            digest.hexdigest(),
+            lambda: [(os.path.basename(path), _read_file(path)) for path in files],
+            self.path,
+            part_hashes=part_hashes,
+            open_part=lambda name: open(os.path.join(self.path, name), 'rb'),
+        )
+
+
+def make_source(spec: str, state_dir: Optional[str] = None):
+    """Buat sumber data dari string spesifikasi (path file, path direktori, atau URL)"""
+    if spec.startswith(('http://', 'https://')):
+        # Di-import saat dipakai: sumber lokal (default) tidak perlu membayar import httpx
+        from http_source import HttpSource
+        return HttpSource(spec, state_dir=state_dir)
+    if os.path.isdir(spec):
+        return DirectorySource(spec)
+    return LocalFileSource(spec)
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Export statis semua view dashboard saat build, untuk disajikan tanpa komputasi.
+
+Dataset dimuat sekali, lalu setiap view NikeDataProcessor dihitung untuk grid parameter yang
+dideklarasikan di bawah (tren bulanan per tahun, top produk / negara bagian pada limit umum,
+kombinasi filter, halaman /filtered-data, ...). Setiap hasil ditulis sebagai JSON dengan nama
+berisi hash konten (`<view>/<view>.<hash>.json`) beserta versi `.gz` dan `.br` yang sudah
+dikompres, sehingga server.js atau CDN bisa menyajikannya langsung dengan cache immutable.
+
+`manifest.json` memetakan kunci kanonik view + parameter ke file tersebut; frontend mencari
+kunci di manifest dan baru memanggil backend jika kombinasi tidak diekspor (query ad-hoc).
+
+Jalankan: python export_static.py [--output ../frontend/static-data] [--limits 5,10,15,20]
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import inspect
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from data_processor import NikeDataProcessor
+from json_response import brotli, dumps
+
+logger = logging.getLogger('export_static')
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT_DIR = os.path.join(BASE_DIR, '..', 'frontend', 'static-data')
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+# Grid parameter default
+DEFAULT_LIMITS = '5,10,15,20'
+DEFAULT_FILTER_DIMENSIONS = 'years,regions'
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_MAX_PAGES = 10
+
+# Panjang hash konten (hex) di nama file
+HASH_LENGTH = 16
+# Level kompresi maksimum: dikerjakan sekali saat build, bukan per request
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# Kunci filter -> atribut kategori cube untuk nilai yang diekspor
+FILTER_VALUES = {'years': 'Year', 'regions': 'Region', 'states': 'State', 'products': 'Product',
+                 'retailers': 'Retailer', 'sales_methods': 'Sales Method'}
+
+
+def view_grid(years: List[int], limits: List[int]) -> Dict[str, List[Dict[str, Any]]]:
+    """Parameter yang diekspor per view (di luar filter); sama dengan yang dipakai frontend"""
+    return {
+        'summary': [{}],
+        'monthly-trends': [{}] + [{'year': year} for year in years],
+        'time-series': [{'granularity': granularity} for granularity in ('day', 'week', 'month', 'quarter')],
+        'top-products': [{'limit': limit} for limit in limits],
+        'region-distribution': [{}],
+        'price-correlation': [{}, {'mode': 'stratified', 'points': 600}, {'mode': 'density'}],
+        'state-analysis': [{'limit': limit} for limit in limits],
+        'retailer-analysis': [{}],
+        'sales-method-analysis': [{}],
+    }
+
+
+def filter_grid(cube, dimensions: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """Semua kombinasi satu nilai (atau tanpa filter) per dimensi filter; None = tanpa filter"""
+    choices = []
+    for key in dimensions:
+        dim = FILTER_VALUES[key]
+        values = [v for v in cube.categories[dim].tolist() if v == v]
+        choices.append([None] + values)
+    grid = []
+    for combination in itertools.product(*choices):
+        filters = {key: [value] for key, value in zip(dimensions, combination) if value is not None}
+        grid.append(filters or None)
+    return grid
+
+
+def canonical_filters(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Filter kosong dibuang, nilai list jadi string terurut (frontend mengirim tahun sebagai string)"""
+    if not filters:
+        return None
+    result = {}
+    for key, value in filters.items():
+        if value is None or value == [] or value == '':
+            continue
+        result[key] = sorted(str(v) for v in value) if isinstance(value, list) else value
+    return result or None
+
+
+def static_key(view: str, params: Dict[str, Any], defaults: Dict[str, Any]) -> str:
+    """
+    Kunci kanonik `<view>:<json>`: parameter bernilai default/None dibuang dan kunci diurutkan.
+    Frontend membentuk kunci yang sama (dashboard.js, staticKey) untuk mencari di manifest.
+    """
+    explicit = {}
+    for name, value in params.items():
+        if name == 'filters':
+            value = canonical_filters(value)
+        if value is None or (name in defaults and value == defaults[name]):
+            continue
+        explicit[name] = value
+    return f"{view}:{json.dumps(explicit, sort_keys=True, separators=(',', ':'), ensure_ascii=False)}"
+
+
+def _defaults(method) -> Dict[str, Any]:
+    return {
+        name: parameter.default for name, parameter in inspect.signature(method).parameters.items()
+        if parameter.default is not inspect.Parameter.empty
+    }
+
+
+class StaticWriter:
+    """
+    Tulis body JSON dengan nama hash konten (file identik ditulis sekali). Versi gzip/brotli
+    dibuat belakangan oleh compress_pending di process pool, karena brotli kualitas maksimum
+    jauh lebih mahal daripada menghitung view-nya.
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self.files: Dict[str, Dict[str, int]] = {}
+
+    def write(self, view: str, body: bytes) -> str:
+        digest = hashlib.sha256(body).hexdigest()[:HASH_LENGTH]
+        name = f"{view}/{view}.{digest}.json"
+        if name in self.files:
+            return name
+        path = os.path.join(self.output_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Nama berisi hash konten: file yang sudah ada (export sebelumnya) pasti identik
+        if not os.path.exists(path):
+            _write_atomic(path, body)
+        self.files[name] = {'raw': len(body)}
+        return name
+
+    def compress_pending(self, workers: Optional[int] = None):
+        """Buat versi .gz / .br yang belum ada untuk semua file, paralel di process pool"""
+        paths = [os.path.join(self.output_dir, name) for name in self.files]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for name, sizes in zip(self.files, pool.map(_compress_file, paths)):
+                self.files[name].update(sizes)
+
+
+def _compress_file(path: str) -> Dict[str, int]:
+    """Tulis `path`.gz dan `path`.br (jika brotli terpasang) bila belum ada; kembalikan ukurannya"""
+    encoders = {'gz': lambda body: gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        encoders['br'] = lambda body: brotli.compress(body, quality=BROTLI_QUALITY)
+    body, sizes = None, {}
+    for suffix, encode in encoders.items():
+        target = f"{path}.{suffix}"
+        if not os.path.exists(target):
+            if body is None:
+                with open(path, 'rb') as f:
+                    body = f.read()
+            _write_atomic(target, encode(body))
+        sizes[suffix] = os.path.getsize(target)
+    return sizes
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def export_requests(snapshot, limits: List[int], filter_dimensions: List[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(view, parameter) untuk setiap view analisis x kombinasi filter"""
+    cube = snapshot.cube
+    years = [int(year) for year in cube.categories['Year'].tolist() if year == year]
+    grid = view_grid(years, limits)
+    for filters in filter_grid(cube, filter_dimensions):
+        for view, param_sets in grid.items():
+            for params in param_sets:
+                yield view, {**params, 'filters': filters}
+
+
+async def export_filtered_pages(processor: NikeDataProcessor, writer: StaticWriter, entries: Dict[str, str],
+                                filters: Optional[Dict[str, Any]], page_size: int, max_pages: int):
+    """Halaman /filtered-data berurutan (mengikuti next_cursor) untuk satu kombinasi filter"""
+    defaults = _defaults(processor.get_filtered_data)
+    cursor, pages = None, 0
+    while max_pages <= 0 or pages < max_pages:
+        params = {'filters': filters or {}, 'cursor': cursor, 'page_size': page_size, 'output_format': 'records'}
+        result = await processor.get_filtered_data(**params)
+        entries[static_key('filtered-data', params, defaults)] = writer.write('filtered-data', dumps(result))
+        pages += 1
+        cursor = result['next_cursor']
+        if cursor is None:
+            break
+
+
+async def export_all(processor: NikeDataProcessor, args) -> Dict[str, Any]:
+    started = time.perf_counter()
+    snapshot = await processor.get_snapshot()
+    logger.info("Snapshot %s dimuat (%d baris) dalam %.1f s", snapshot.key, len(snapshot.df),
+                time.perf_counter() - started)
+
+    writer = StaticWriter(args.output)
+    entries: Dict[str, str] = {}
+    # Jumlah view yang dihitung bersamaan dibatasi agar compute pool tidak menolak (503)
+    semaphore = asyncio.Semaphore(max(1, processor.compute.workers))
+
+    async def export_view(view: str, params: Dict[str, Any]):
+        method = processor.dashboard_view(view)
+        async with semaphore:
+            result = await method(**params)
+        entries[static_key(view, params, _defaults(method))] = writer.write(view, dumps(result))
+
+    await asyncio.gather(*(export_view(view, params)
+                           for view, params in export_requests(snapshot, args.limits, args.filters)))
+    for filters in filter_grid(snapshot.cube, args.filters):
+        await export_filtered_pages(processor, writer, entries, filters, args.page_size, args.max_pages)
+    writer.compress_pending(args.compress_workers)
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'snapshot': snapshot.key,
+        'row_count': len(snapshot.df),
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'entries': dict(sorted(entries.items())),
+    }
+    manifest_body = json.dumps(manifest, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    # Manifest punya nama tetap (bukan hash) dan ditulis paling akhir: klien lama tetap
+    # menemukan file lama, klien baru langsung melihat export yang lengkap
+    _write_atomic(os.path.join(args.output, MANIFEST_NAME + '.gz'),
+                  gzip.compress(manifest_body, compresslevel=GZIP_LEVEL, mtime=0))
+    _write_atomic(os.path.join(args.output, MANIFEST_NAME), manifest_body)
+
+    removed = prune(args.output, set(writer.files)) if args.prune else 0
+    return {
+        'entries': len(entries),
+        'files': len(writer.files),
+        'bytes': {
+            encoding: sum(sizes.get(encoding, 0) for sizes in writer.files.values())
+            for encoding in ('raw', 'gz', 'br')
+        },
+        'pruned': removed,
+        'elapsed_s': round(time.perf_counter() - started, 2),
+    }
+
+
+def prune(output_dir: str, keep: set) -> int:
+    """Hapus file hasil export lama yang tidak lagi dirujuk manifest"""
+    removed = 0
+    for root, _, files in os.walk(output_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, output_dir).replace(os.sep, '/')
+            base = relative[:-3] if relative.endswith(('.gz', '.br')) else relative
+            if base.startswith(MANIFEST_NAME) or base in keep:
+                continue
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def _filter_list(value: str) -> List[str]:
+    keys = [v.strip() for v in value.split(',') if v.strip()]
+    unknown = [key for key in keys if key not in FILTER_VALUES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Filter tidak dikenal: {', '.join(unknown)} (pilihan: {', '.join(FILTER_VALUES)})")
+    return keys
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export statis view dashboard Nike (JSON ber-hash + gzip/brotli)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_DIR, help="Direktori output (default: frontend/static-data)")
+    parser.add_argument("--limits", default=DEFAULT_LIMITS, type=_int_list,
+                        help="Limit untuk /top-products dan /state-analysis, dipisah koma")
+    parser.add_argument("--filters", default=DEFAULT_FILTER_DIMENSIONS, type=_filter_list,
+                        help="Dimensi filter yang kombinasi nilainya diekspor, dipisah koma (kosong = tanpa filter)")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="Ukuran halaman /filtered-data")
+    parser.add_argument("--max-pages", type=int, default=DEFAULT_MAX_PAGES,
+                        help="Maksimal halaman /filtered-data per kombinasi filter (0 = semua)")
+    parser.add_argument("--compress-workers", type=int, default=None,
+                        help="Jumlah proses untuk kompresi gzip/brotli (default: jumlah CPU)")
+    parser.add_argument("--prune", action="store_true", help="Hapus file export lama yang tidak dirujuk manifest")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+    # Processor sendiri (sumber dan cache snapshot sama dengan server), tanpa mengimpor aplikasi FastAPI
+    processor = NikeDataProcessor()
+    try:
+        report = asyncio.run(export_all(processor, args))
+    except HTTPException as e:
+        logger.error("Export gagal: %s", e.detail)
+        sys.exit(1)
+    finally:
+        processor.compute.shutdown()
+    logger.info("Export selesai: %d entri, %d file, %s byte (raw/gz/br), %d file lama dihapus, dalam %.1f s -> %s",
+                report['entries'], report['files'],
+                '/'.join(str(report['bytes'][encoding]) for encoding in ('raw', 'gz', 'br')),
+                report['pruned'], report['elapsed_s'], os.path.abspath(args.output))
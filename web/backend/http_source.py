@@ -0,0 +1,263 @@
+"""
+Sumber data berupa URL HTTP dengan klien async ber-pool.
+
+Satu httpx.AsyncClient per sumber berjalan di event loop miliknya sendiri (thread daemon), sehingga
+koneksi keep-alive dipakai ulang antar fetch dan antar percobaan ulang, sementara pemanggil
+(NikeDataProcessor._load_snapshot di thread executor, snapshot_loader, export_static) tetap memakai
+API sinkron SourceContent.
+
+- Revalidasi kondisional lewat ETag / Last-Modified; 304 berarti snapshot lama tetap dipakai.
+- Error koneksi, 429 dan 5xx dicoba ulang dengan exponential backoff + jitter (menghormati
+  Retry-After).
+- Body 200 tidak di-buffer: potongan body dialirkan lewat file object ke ChunkedIngestor, sehingga
+  parsing chunk pertama berjalan selagi sisa file masih diunduh. Content hash dihitung bertahap dan
+  baru diketahui setelah body habis dibaca.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+import httpx
+
+from data_source import SourceContent, SourceUnavailable
+from metrics import record_stage, stage
+
+logger = logging.getLogger(__name__)
+
+HTTP_TIMEOUT = float(os.getenv('NIKE_HTTP_TIMEOUT', '30'))
+HTTP_RETRIES = int(os.getenv('NIKE_HTTP_RETRIES', '3'))
+HTTP_BACKOFF = float(os.getenv('NIKE_HTTP_BACKOFF', '0.5'))
+# Batas jeda antar percobaan (juga untuk Retry-After dari server)
+HTTP_BACKOFF_MAX = 30.0
+# Koneksi idle tetap dibuka antar refresh (default httpx hanya 5 detik)
+HTTP_KEEPALIVE_EXPIRY = 120.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Ukuran potongan body yang dialirkan ke parser dan jumlah potongan yang boleh menunggu dibaca
+STREAM_CHUNK_BYTES = 1 << 20
+STREAM_MAX_PENDING = 16
+
+_END = object()
+
+
+class _BodyStream(io.RawIOBase):
+    """
+    File object biner yang dibaca thread ingestion selagi body masih diunduh di event loop.
+    Antrean potongan dibatasi, sehingga download ikut tertahan jika parser tertinggal.
+    """
+
+    def __init__(self, max_pending: int = STREAM_MAX_PENDING):
+        super().__init__()
+        self._chunks: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._view = memoryview(b'')
+        self._done = False
+        self._abandoned = threading.Event()
+
+    def readable(self) -> bool:
+        return True
+
+    def feed(self, item) -> bool:
+        """Taruh potongan body, penanda akhir atau error; False jika pembaca sudah menutup stream"""
+        while not self._abandoned.is_set():
+            try:
+                self._chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def readinto(self, buffer) -> int:
+        while not self._view:
+            if self._done:
+                return 0
+            item = self._chunks.get()
+            if item is _END:
+                self._done = True
+                return 0
+            if isinstance(item, BaseException):
+                self._done = True
+                raise item
+            self._view = memoryview(item)
+        n = min(len(buffer), len(self._view))
+        buffer[:n] = self._view[:n]
+        self._view = self._view[n:]
+        return n
+
+    def close(self):
+        self._abandoned.set()
+        super().close()
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    # Hanya bentuk detik; bentuk tanggal HTTP jarang dipakai untuk 429/503
+    value = response.headers.get('Retry-After', '')
+    try:
+        return min(max(float(value), 0.0), HTTP_BACKOFF_MAX)
+    except ValueError:
+        return None
+
+
+class HttpSource:
+    """Sumber data berupa URL HTTP dengan revalidasi ETag / Last-Modified dan body yang di-stream"""
+
+    def __init__(self, url: str, state_dir: Optional[str] = None, timeout: float = HTTP_TIMEOUT,
+                 retries: int = HTTP_RETRIES, backoff: float = HTTP_BACKOFF):
+        self.url = url
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.state_path = None
+        if state_dir:
+            name = hashlib.blake2b(url.encode(), digest_size=8).hexdigest()
+            self.state_path = os.path.join(state_dir, f"http-{name}.json")
+        self._state = self._load_state()
+        self._state_lock = threading.Lock()
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='http-source', daemon=True)
+        self._thread.start()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _load_state(self) -> Dict[str, str]:
+        if self.state_path and os.path.exists(self.state_path):
+            try:
+                with open(self.state_path) as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return {}
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _call(self, coro):
+        """Jalankan coroutine di event loop sumber dan tunggu hasilnya (dari thread pemanggil)"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _send(self, headers: Dict[str, str]) -> httpx.Response:
+        """GET dengan percobaan ulang; body belum dibaca (stream) agar bisa dialirkan ke parser"""
+        if self._client is None:
+            # Dibuat di event loop sumber: pool koneksi terikat ke loop ini
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=4, max_keepalive_connections=2,
+                                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY),
+                follow_redirects=True,
+            )
+        for attempt in range(self.retries + 1):
+            delay = min(self.backoff * 2 ** attempt, HTTP_BACKOFF_MAX) * random.uniform(0.5, 1.0)
+            try:
+                response = await self._client.send(self._client.build_request('GET', self.url, headers=headers),
+                                                   stream=True)
+            except httpx.TransportError as e:
+                error = str(e) or type(e).__name__
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    if response.status_code >= 400:
+                        await response.aread()
+                        raise SourceUnavailable(f"HTTP {response.status_code} dari {self.url}")
+                    return response
+                error = f"HTTP {response.status_code}"
+                retry_after = _retry_after(response)
+                delay = delay if retry_after is None else retry_after
+                # Body (pendek) dibaca habis agar koneksi bisa kembali ke pool
+                await response.aread()
+            if attempt < self.retries:
+                logger.warning("Fetch %s gagal (%s); coba lagi dalam %.1f detik", self.url, error, delay)
+                await asyncio.sleep(delay)
+        raise SourceUnavailable(f"Gagal mengambil {self.url} setelah {self.retries + 1} percobaan: {error}")
+
+    async def _pump(self, response: httpx.Response, stream: _BodyStream, content: SourceContent):
+        """Alirkan body ke stream sambil menghitung content hash; state disimpan jika body lengkap"""
+        started = time.perf_counter()
+        digest = hashlib.blake2b(digest_size=16)
+        loop = asyncio.get_running_loop()
+        try:
+            async for chunk in response.aiter_bytes(STREAM_CHUNK_BYTES):
+                digest.update(chunk)
+                # feed() bisa menunggu parser; jangan menahan event loop
+                if not await loop.run_in_executor(None, stream.feed, chunk):
+                    return
+            content.content_hash = digest.hexdigest()
+            with self._state_lock:
+                self._state = {
+                    'etag': response.headers.get('ETag', ''),
+                    'last_modified': response.headers.get('Last-Modified', ''),
+                    'content_hash': content.content_hash,
+                }
+                self._save_state()
+            record_stage('download_http', time.perf_counter() - started)
+            await loop.run_in_executor(None, stream.feed, _END)
+        except Exception as e:
+            if isinstance(e, httpx.HTTPError):
+                e = SourceUnavailable(f"Download {self.url} terputus: {str(e) or type(e).__name__}")
+            await loop.run_in_executor(None, stream.feed, e)
+        finally:
+            await response.aclose()
+
+    def _stream(self, response: httpx.Response, content: SourceContent) -> BinaryIO:
+        stream = _BodyStream()
+        asyncio.run_coroutine_threadsafe(self._pump(response, stream, content), self._loop)
+        return io.BufferedReader(stream, STREAM_CHUNK_BYTES)
+
+    def _open_body(self, pending: List[httpx.Response], content: SourceContent) -> BinaryIO:
+        # Respons dari fetch() dialirkan sekali; pembukaan berikutnya mengunduh ulang tanpa kondisi
+        response = pending.pop() if pending else self._call(self._send({}))
+        return self._stream(response, content)
+
+    def _content(self, content_hash: Optional[str], response: Optional[httpx.Response] = None) -> SourceContent:
+        pending = [response] if response is not None else []
+        content = SourceContent(content_hash, lambda: self._read_parts(content), self.url,
+                                open_part=lambda _: self._open_body(pending, content))
+        return content
+
+    def _read_parts(self, content: SourceContent) -> List[Tuple[str, bytes]]:
+        return [(name, f.read()) for name, f in content.open_parts()]
+
+    def fetch(self) -> SourceContent:
+        """
+        Revalidasi URL. Isi tidak berubah (304) atau server tidak terjangkau: content hash terakhir.
+        Isi baru (200): SourceContent dengan content_hash None yang body-nya di-stream lewat open_parts().
+        """
+        headers = {}
+        if self._state.get('content_hash'):
+            if self._state.get('etag'):
+                headers['If-None-Match'] = self._state['etag']
+            if self._state.get('last_modified'):
+                headers['If-Modified-Since'] = self._state['last_modified']
+
+        try:
+            with stage('fetch_http'):
+                response = self._call(self._send(headers))
+        except SourceUnavailable:
+            # Tanpa jaringan: tetap pakai hash terakhir agar snapshot cache bisa dipakai
+            if not self._state.get('content_hash'):
+                raise
+            return self._content(self._state['content_hash'])
+        if response.status_code == 304:
+            self._call(response.aread())
+            return self._content(self._state['content_hash'])
+        return self._content(None, response)
+
+    def close(self):
+        """Tutup pool koneksi dan hentikan event loop sumber"""
+        if self._client is not None:
+            self._call(self._client.aclose())
+            self._client = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
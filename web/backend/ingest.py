@@ -0,0 +1,152 @@
+"""
+Pipeline ingestion CSV bertahap (chunked) untuk NikeDataProcessor.
+
+File dibaca per potongan bytes yang selalu berakhir di batas baris, lalu setiap potongan
+di-parse dan dipreprocessing di process pool. Memori puncak dibatasi oleh ukuran chunk
+dikali jumlah chunk yang sedang diproses, bukan oleh ukuran file; hasil per chunk sudah
+dalam bentuk tabel ringkas (lihat sales_table) dan digabung tanpa kembali ke object dtype.
+"""
+
+import io
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Iterable, Iterator, List, Tuple
+
+import pandas as pd
+
+from metrics import capture_stages, record_stage, stage
+from sales_table import compact_sales_frame, concat_sales_frames
+
+REQUIRED_COLUMNS = ['Invoice Date', 'Product', 'Region', 'Retailer',
+                    'Sales Method', 'State', 'Price per Unit',
+                    'Total Sales', 'Units Sold']
+
+# Ukuran potongan CSV mentah per task dan jumlah proses parser
+INGEST_CHUNK_BYTES = int(os.getenv('NIKE_INGEST_CHUNK_BYTES', str(32 * 1024 * 1024)))
+INGEST_WORKERS = int(os.getenv('NIKE_INGEST_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+
+def preprocess_sales(df: pd.DataFrame) -> pd.DataFrame:
+    """Preprocessing data sesuai dengan notebook"""
+    # Membersihkan nama kolom
+    df.columns = df.columns.str.strip()
+
+    # Konversi tanggal sesuai notebook
+    df['Invoice Date'] = pd.to_datetime(df['Invoice Date'], dayfirst=True)
+    df['Year'] = df['Invoice Date'].dt.year
+    df['Month'] = df['Invoice Date'].dt.month
+
+    # Konversi kolom numerik
+    df['Price per Unit'] = pd.to_numeric(df['Price per Unit'], errors='coerce')
+    df['Total Sales'] = pd.to_numeric(df['Total Sales'], errors='coerce')
+    df['Units Sold'] = pd.to_numeric(df['Units Sold'], errors='coerce')
+
+    # Hapus data yang tidak valid
+    df = df.dropna(subset=['Price per Unit', 'Total Sales', 'Units Sold'])
+
+    # Representasi ringkas: kategori untuk dimensi, integer kecil, tanggal sebagai offset hari
+    return compact_sales_frame(df)
+
+
+def validate_header(header: bytes, name: str):
+    """Validasi kolom sesuai notebook sebelum isi file di-parse"""
+    columns = pd.read_csv(io.BytesIO(header), encoding='utf-8-sig', nrows=0).columns
+    for col in REQUIRED_COLUMNS:
+        if col not in columns:
+            raise ValueError(f"Kolom {col} tidak ditemukan dalam data ({name})")
+
+
+def parse_chunk(header: bytes, body: bytes) -> pd.DataFrame:
+    """Parse + preprocessing satu potongan CSV"""
+    with stage('read_csv'):
+        df = pd.read_csv(io.BytesIO(header + body), encoding='utf-8-sig')
+    with stage('preprocess'):
+        return preprocess_sales(df)
+
+
+def _parse_chunk_traced(header: bytes, body: bytes) -> Tuple[pd.DataFrame, List[Tuple[str, float]]]:
+    """parse_chunk di proses worker; span dikirim balik agar tercatat di metrik proses induk"""
+    with capture_stages() as spans:
+        df = parse_chunk(header, body)
+    return df, spans
+
+
+def _collect(future) -> pd.DataFrame:
+    df, spans = future.result()
+    for name, seconds in spans:
+        record_stage(name, seconds)
+    return df
+
+
+def _split_point(block: bytes) -> int:
+    """Posisi setelah newline terakhir yang tidak berada di dalam field ber-kutip"""
+    cut = block.rfind(b'\n')
+    while cut >= 0 and block.count(b'"', 0, cut) % 2:
+        cut = block.rfind(b'\n', 0, cut)
+    return cut + 1
+
+
+def iter_csv_chunks(name: str, f: BinaryIO, chunk_bytes: int) -> Iterator[Tuple[bytes, bytes]]:
+    """(header, isi) per potongan file; setiap isi berisi baris utuh saja"""
+    header = f.readline()
+    if not header.endswith(b'\n'):
+        header += b'\n'
+    validate_header(header, name)
+
+    pending = b''
+    while True:
+        block = f.read(chunk_bytes)
+        if not block:
+            break
+        pending += block
+        cut = _split_point(pending)
+        if cut:
+            yield header, pending[:cut]
+            pending = pending[cut:]
+    if pending.strip():
+        yield header, pending
+
+
+class ChunkedIngestor:
+    """Parse beberapa file CSV per chunk secara paralel dan gabungkan hasilnya berurutan"""
+
+    def __init__(self, chunk_bytes: int = INGEST_CHUNK_BYTES, workers: int = INGEST_WORKERS):
+        self.chunk_bytes = max(chunk_bytes, 1)
+        self.workers = max(workers, 1)
+
+    def _chunks(self, parts: Iterable[Tuple[str, BinaryIO]]) -> Iterator[Tuple[bytes, bytes]]:
+        for name, f in parts:
+            yield from iter_csv_chunks(name, f, self.chunk_bytes)
+
+    def ingest(self, parts: Iterable[Tuple[str, BinaryIO]]) -> pd.DataFrame:
+        """Tabel ringkas dari semua file; input kecil (satu chunk) diproses tanpa process pool"""
+        chunks = self._chunks(parts)
+        first = next(chunks, None)
+        if first is None:
+            raise ValueError("Sumber data tidak berisi baris data")
+        second = next(chunks, None)
+        if second is None or self.workers == 1:
+            frames = [parse_chunk(*first)]
+            if second is not None:
+                frames.append(parse_chunk(*second))
+                frames.extend(parse_chunk(*chunk) for chunk in chunks)
+            return concat_sales_frames(frames)
+        return concat_sales_frames(self._ingest_parallel([first, second], chunks))
+
+    def _ingest_parallel(self, head: List[Tuple[bytes, bytes]],
+                         rest: Iterator[Tuple[bytes, bytes]]) -> List[pd.DataFrame]:
+        # Batasi chunk yang sedang diproses agar bytes mentah tidak menumpuk di memori
+        max_pending = self.workers * 2
+        frames: List[pd.DataFrame] = []
+        pending: 'deque' = deque()
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for header, body in itertools.chain(head, rest):
+                if len(pending) >= max_pending:
+                    frames.append(_collect(pending.popleft()))
+                pending.append(pool.submit(_parse_chunk_traced, header, body))
+            while pending:
+                frames.append(_collect(pending.popleft()))
+        return frames
+
@@ -0,0 +1,150 @@
+"""
+Jalur respons JSON bersama untuk semua endpoint analisis.
+
+Encoder memakai orjson (dengan dukungan numpy) jika terpasang, dan encoder json stdlib dengan
+konversi numpy/pandas sebagai fallback. Bytes hasil encode (dan versi terkompresinya) disimpan
+per snapshot data dan parameter query, sehingga request berulang tidak menghitung, meng-encode,
+maupun mengompres ulang. ETag diturunkan dari kunci yang sama untuk revalidasi HTTP (304).
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson opsional
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli opsional
+    brotli = None
+
+# Payload lebih kecil dari ini tidak dikompres
+COMPRESS_MIN_BYTES = 1024
+
+
+def _default(obj: Any) -> Any:
+    """Konversi objek numpy/pandas yang tidak dikenal encoder"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (pd.Series, pd.Index, pd.Categorical)):
+        return np.asarray(obj, dtype=object).tolist()
+    if isinstance(obj, (pd.Timestamp, datetime, date)):
+        return obj.strftime('%Y-%m-%d')
+    raise TypeError(f"Objek {type(obj).__name__} tidak bisa di-serialize ke JSON")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, default=_default, ensure_ascii=False, allow_nan=False,
+                          separators=(',', ':')).encode('utf-8')
+
+
+def choose_encoding(accept_encoding: str, size: int) -> str:
+    """Content-Encoding terbaik yang didukung klien: 'br', 'gzip', atau 'identity'"""
+    if size < COMPRESS_MIN_BYTES:
+        return 'identity'
+    accepted = {
+        part.split(';')[0].strip().lower()
+        for part in accept_encoding.split(',')
+        if not part.strip().endswith(('q=0', 'q=0.0'))
+    }
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return 'identity'
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    return body
+
+
+def make_etag(key: Hashable) -> str:
+    """ETag (weak) dari kunci cache: berubah jika snapshot data atau parameter berubah"""
+    return 'W/"%s"' % hashlib.blake2b(repr(key).encode(), digest_size=12).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(',')}
+    return '*' in candidates or etag in candidates or etag[2:] in candidates
+
+
+class FastJSONResponse(Response):
+    """JSONResponse yang meng-encode numpy/pandas langsung; konten bytes dipakai apa adanya"""
+
+    media_type = 'application/json'
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        return dumps(content)
+
+
+class ResponseCache:
+    """Cache LRU bytes hasil encode, dibatasi total ukuran, dikunci per snapshot + parameter"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: 'OrderedDict[Hashable, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(snapshot_key: str, view: str, params: Dict[str, Any]) -> Hashable:
+        # Parameter bernilai None = default; filter bisa berisi list/dict, bentuk kanonis
+        # lewat json terurut agar view yang sama lewat endpoint tunggal maupun batch berbagi cache
+        params = {name: value for name, value in params.items() if value is not None}
+        return (snapshot_key, view, json.dumps(params, sort_keys=True, default=str))
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: Hashable, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= len(old)
+            self._entries[key] = body
+            self.total_bytes += len(body)
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+    def drop_snapshot(self, snapshot_key: str):
+        """Buang semua entri milik snapshot lama"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == snapshot_key]:
+                self.total_bytes -= len(self._entries.pop(key))
+
+    def __len__(self) -> int:
+        return len(self._entries)
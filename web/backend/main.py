@@ -1,16 +1,28 @@
-from fastapi import FastAPI, HTTPException
+import time
+
+# Awal import modul aplikasi (durasi import dilaporkan di /health dan /metrics)
+_import_started = time.perf_counter()
+
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import pandas as pd
-import numpy as np
-import requests
-from datetime import datetime, timedelta
-import json
-from typing import List, Dict, Any, Optional
+from fastapi.responses import Response, StreamingResponse
+from datetime import datetime
+from typing import Callable, List, Dict, Any, Optional
 import os
-import io
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import inspect
+import logging
+from email.utils import formatdate
+
+from analysis_views import (DEFAULT_DENSITY_BINS, DEFAULT_PAGE_SIZE, DEFAULT_SCATTER_POINTS, MAX_DENSITY_BINS,
+                            MAX_PAGE_SIZE, MAX_SCATTER_POINTS)
+from data_processor import DASHBOARD_VIEWS, WARMUP_MODE, DataSnapshot, NikeDataProcessor
+from json_response import (FastJSONResponse, ResponseCache, choose_encoding, compress, dumps,
+                           etag_matches, make_etag)
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, MetricsMiddleware, stage
+from query_engine import QueryError, parse_query
+from request_profiler import SlowRequestLog
+from row_export import OUTPUT_FORMATS, CursorError, arrow_available, frame_records, iter_arrow, iter_ndjson
+from startup import StartupTimings
 
 app = FastAPI(title="Nike Sales Data API", version="2.0.0", description="API untuk analisis data penjualan Nike U.S. sesuai spesifikasi Jupyter Notebook")
 
@@ -21,328 +33,130 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Total-Records", "X-Next-Cursor", "Server-Timing"],
 )
 
-# Constants sesuai dengan Jupyter Notebook
-CSV_URL = "https://raw.githubusercontent.com/ham407/Analisis-Penjualan-Produk-Nike-U.S.-Tahun-2020---2021/main/Nike%20Dataset.csv"
+# Batas total bytes respons JSON yang di-cache (per snapshot + parameter query)
+RESPONSE_CACHE_BYTES = int(os.getenv('NIKE_RESPONSE_CACHE_BYTES', str(64 * 1024 * 1024)))
 
-class NikeDataProcessor:
-    """Processor data Nike sesuai dengan logika dan spesifikasi Jupyter Notebook"""
-    
-    def __init__(self):
-        self.df = None
-        self.last_fetch = None
-        self.executor = ThreadPoolExecutor(max_workers=4)
-    
-    async def load_data(self) -> pd.DataFrame:
-        """Load data dari sumber eksternal sesuai notebook"""
-        if self.df is not None and self.last_fetch and (datetime.now() - self.last_fetch).seconds < 300:
-            return self.df
-        
-        try:
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                self.executor, 
-                lambda: requests.get(CSV_URL, timeout=30)
-            )
-            response.raise_for_status()
-            
-            # Process CSV data sesuai notebook
-            csv_content = response.text
-            self.df = pd.read_csv(io.StringIO(csv_content))
-            
-            # Validasi kolom sesuai notebook
-            required_columns = ['Invoice Date', 'Product', 'Region', 'Retailer', 
-                              'Sales Method', 'State', 'Price per Unit', 
-                              'Total Sales', 'Units Sold']
-            
-            for col in required_columns:
-                if col not in self.df.columns:
-                    raise HTTPException(status_code=500, detail=f"Kolom {col} tidak ditemukan dalam data")
-            
-            # Preprocessing data sesuai notebook
-            self.df = self._preprocess_data(self.df)
-            self.last_fetch = datetime.now()
-            
-            return self.df
-            
-        except requests.RequestException as e:
-            raise HTTPException(status_code=503, detail=f"Gagal mengambil data: {str(e)}")
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error processing data: {str(e)}")
-    
-    def _preprocess_data(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Preprocessing data sesuai dengan notebook"""
-        # Membersihkan nama kolom
-        df.columns = df.columns.str.strip()
-        
-        # Konversi tanggal sesuai notebook
-        df['Invoice Date'] = pd.to_datetime(df['Invoice Date'], dayfirst=True)
-        df['Year'] = df['Invoice Date'].dt.year
-        df['Month'] = df['Invoice Date'].dt.month
-        
-        # Konversi kolom numerik
-        df['Price per Unit'] = pd.to_numeric(df['Price per Unit'], errors='coerce')
-        df['Total Sales'] = pd.to_numeric(df['Total Sales'], errors='coerce')
-        df['Units Sold'] = pd.to_numeric(df['Units Sold'], errors='coerce')
-        
-        # Hapus data yang tidak valid
-        df = df.dropna(subset=['Price per Unit', 'Total Sales', 'Units Sold'])
-        
-        return df
-    
-    async def get_summary_statistics(self) -> Dict[str, Any]:
-        """Statistik summary sesuai notebook"""
-        df = await self.load_data()
-        
-        return {
-            "total_records": len(df),
-            "total_sales": float(df['Total Sales'].sum()),
-            "total_units": int(df['Units Sold'].sum()),
-            "avg_price_per_unit": float(df['Price per Unit'].mean()),
-            "unique_products": int(df['Product'].nunique()),
-            "unique_regions": int(df['Region'].nunique()),
-            "unique_retailers": int(df['Retailer'].nunique()),
-            "unique_states": int(df['State'].nunique()),
-            "data_period": {
-                "start_date": df['Invoice Date'].min().strftime('%Y-%m-%d'),
-                "end_date": df['Invoice Date'].max().strftime('%Y-%m-%d'),
-                "years": sorted(df['Year'].unique().tolist())
-            }
-        }
-    
-    async def get_monthly_trends(self, year: Optional[int] = None) -> Dict[str, Any]:
-        """Analisis tren bulanan sesuai notebook (Visualisasi 1)"""
-        df = await self.load_data()
-        
-        # Validasi data: pastikan tidak ada data outlier yang tidak realistis
-        # Batasi data dengan filter yang masuk akal untuk bisnis retail
-        df = df[(df['Total Sales'] > 0) & (df['Total Sales'] < 100000)]  # Batas realistis untuk transaksi retail
-        df = df[(df['Units Sold'] > 0) & (df['Units Sold'] < 1000)]      # Batas realistis untuk unit terjual
-        
-        if year:
-            df = df[df['Year'] == year]
-        
-        monthly_data = df.groupby(['Year', 'Month']).agg({
-            'Total Sales': 'sum',
-            'Units Sold': 'sum',
-            'Price per Unit': 'mean'
-        }).reset_index()
-        
-        # Format untuk chart
-        trends = {}
-        for year_val in monthly_data['Year'].unique():
-            year_data = monthly_data[monthly_data['Year'] == year_val]
-            trends[str(year_val)] = {
-                'months': year_data['Month'].tolist(),
-                'sales': year_data['Total Sales'].tolist(),
-                'units': year_data['Units Sold'].tolist(),
-                'avg_price': year_data['Price per Unit'].tolist()
-            }
-        
-        return trends
-    
-    async def get_top_products(self, limit: int = 10) -> Dict[str, Any]:
-        """Analisis top produk sesuai notebook (Visualisasi 2)"""
-        df = await self.load_data()
-        
-        # Validasi data untuk menghindari outlier
-        df = df[(df['Total Sales'] > 0) & (df['Total Sales'] < 100000)]
-        df = df[(df['Units Sold'] > 0) & (df['Units Sold'] < 1000)]
-        
-        product_performance = df.groupby('Product').agg({
-            'Total Sales': 'sum',
-            'Units Sold': 'sum',
-            'Price per Unit': 'mean',
-            'Invoice Date': 'count'
-        }).rename(columns={'Invoice Date': 'Transaction Count'})
-        
-        # Urutkan berdasarkan penjualan dan ambil top produk
-        top_products = product_performance.nlargest(limit, 'Total Sales')
-        
-        # Hitung persentase distribusi
-        total_sales_all = product_performance['Total Sales'].sum()
-        top_sales = top_products['Total Sales'].sum()
-        percentage = (top_sales / total_sales_all) * 100
-        
-        return {
-            'top_products': [
-                {
-                    'product': product,
-                    'total_sales': float(sales),
-                    'units_sold': int(units),
-                    'avg_price': float(avg_price),
-                    'transactions': int(transactions)
-                }
-                for product, (sales, units, avg_price, transactions) in top_products.iterrows()
-            ],
-            'summary': {
-                'total_products': len(product_performance),
-                'total_sales_all': float(total_sales_all),
-                'top_products_sales': float(top_sales),
-                'top_products_percentage': float(percentage),
-                'analysis': f'Top {limit} produk menyumbang {percentage:.1f}% dari total penjualan'
-            }
-        }
-    
-    async def get_region_distribution(self) -> Dict[str, Any]:
-        """Distribusi wilayah sesuai notebook (Visualisasi 3)"""
-        df = await self.load_data()
-        
-        region_stats = df.groupby('Region').agg({
-            'Total Sales': 'sum',
-            'Units Sold': 'sum',
-            'Price per Unit': 'mean',
-            'Invoice Date': 'count'
-        }).rename(columns={'Invoice Date': 'Transaction Count'})
-        
-        return {
-            'regions': region_stats.index.tolist(),
-            'sales': region_stats['Total Sales'].tolist(),
-            'units': region_stats['Units Sold'].tolist(),
-            'avg_price': region_stats['Price per Unit'].tolist(),
-            'transactions': region_stats['Transaction Count'].tolist(),
-            'sales_percentage': (region_stats['Total Sales'] / region_stats['Total Sales'].sum() * 100).tolist()
-        }
+# Header Cache-Control untuk respons analisis; klien/CDN merevalidasi lewat ETag
+HTTP_CACHE_CONTROL = os.getenv('NIKE_HTTP_CACHE_CONTROL', 'public, max-age=60, must-revalidate')
+
+# Profiling request lambat: ambang (ms, 0 = mati) dan fraksi request yang di-sample stack-nya
+SLOW_REQUEST_MS = float(os.getenv('NIKE_SLOW_REQUEST_MS', '0'))
+PROFILE_SAMPLE_RATE = float(os.getenv('NIKE_PROFILE_SAMPLE_RATE', '0'))
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_LOOKUPS = REGISTRY.counter(
+    'nike_response_cache_requests_total', 'Lookup cache respons JSON: hit, miss, not_modified (304)', ['result'])
+
+# Initialize processor
+processor = NikeDataProcessor()
+startup_timings = StartupTimings(_import_started)
+response_cache = ResponseCache(RESPONSE_CACHE_BYTES)
+processor.snapshot_listeners.append(lambda old, new: response_cache.drop_snapshot(old.key))
+
+def _snapshot_metric(value: Callable[[DataSnapshot], float]):
+    # Tidak ada sampel sebelum snapshot pertama dimuat
+    return lambda: value(processor.snapshot) if processor.snapshot is not None else None
+
+REGISTRY.gauge('nike_snapshot_age_seconds', 'Detik sejak sumber data terakhir diperiksa',
+               collect=_snapshot_metric(lambda s: s.age))
+REGISTRY.gauge('nike_snapshot_rows', 'Jumlah baris snapshot saat ini', collect=_snapshot_metric(lambda s: len(s.df)))
+REGISTRY.gauge('nike_snapshot_memory_bytes', 'Ukuran tabel snapshot di memori',
+               collect=_snapshot_metric(lambda s: s.memory['total_bytes']))
+REGISTRY.gauge('nike_snapshot_version', 'Versi snapshot saat ini', collect=_snapshot_metric(lambda s: s.version))
+REGISTRY.gauge('nike_startup_import_seconds', 'Durasi import modul aplikasi saat proses start',
+               collect=lambda: startup_timings.import_seconds)
+REGISTRY.gauge('nike_startup_warmup_seconds', 'Durasi warm-up snapshot saat startup',
+               collect=lambda: startup_timings.warmup_seconds)
+REGISTRY.gauge('nike_first_request_seconds', 'Durasi request pertama (selain probe) setelah proses start',
+               collect=lambda: startup_timings.first_request and startup_timings.first_request['duration_seconds'])
+REGISTRY.gauge('nike_response_cache_bytes', 'Total bytes di cache respons', collect=lambda: response_cache.total_bytes)
+REGISTRY.gauge('nike_response_cache_entries', 'Jumlah entri cache respons', collect=lambda: len(response_cache))
+REGISTRY.gauge('nike_compute_pending_tasks', 'Task compute pool yang berjalan atau antre',
+               collect=lambda: processor.compute.pending)
+REGISTRY.counter('nike_compute_rejected_total', 'Task ditolak karena compute pool penuh (503)',
+                 collect=lambda: processor.compute.rejected)
+REGISTRY.counter('nike_compute_timeouts_total', 'Task melewati deadline request (504)',
+                 collect=lambda: processor.compute.timed_out)
+
+slow_request_log = SlowRequestLog(SLOW_REQUEST_MS, PROFILE_SAMPLE_RATE) if SLOW_REQUEST_MS > 0 else None
+app.add_middleware(MetricsMiddleware, slow_log=slow_request_log, on_finish=startup_timings.request_finished)
+
+async def cached_json(request: Request, view: str, compute, **params) -> Response:
+    """Respons JSON sebuah view; bytes hasil encode di-cache per snapshot + parameter"""
+    snapshot = await processor.get_snapshot()
+    key = response_cache.make_key(snapshot.key, view, params)
     
-    async def get_price_correlation(self) -> Dict[str, Any]:
-        """Korelasi harga vs unit terjual sesuai notebook (Visualisasi 4)"""
-        df = await self.load_data()
-        
-        # Validasi data dan hapus outlier
-        df = df[(df['Price per Unit'] > 0) & (df['Price per Unit'] < 200)]  # Harga realistis untuk produk retail
-        df = df[(df['Units Sold'] > 0) & (df['Units Sold'] < 1000)]         # Unit terjual realistis
-        
-        # Hitung korelasi Pearson yang sebenarnya
-        correlation = df['Price per Unit'].corr(df['Units Sold'])
-        
-        # Sample data untuk scatter plot (maksimal 200 titik untuk performa)
-        sample_data = df.sample(min(200, len(df)), random_state=42)
-        
-        return {
-            'correlation': float(correlation) if not pd.isna(correlation) else 0.0,
-            'price_per_unit': sample_data['Price per Unit'].tolist(),
-            'units_sold': sample_data['Units Sold'].tolist(),
-            'total_sales': sample_data['Total Sales'].tolist(),
-            'products': sample_data['Product'].tolist(),
-            'sample_size': len(sample_data),
-            'interpretation': 'Korelasi Pearson antara harga per unit dan jumlah unit terjual'
-        }
+    async def build() -> bytes:
+        result = await compute(**params)
+        with stage('json_encode'):
+            return dumps(result)
     
-    async def get_state_analysis(self, limit: int = 15) -> Dict[str, Any]:
-        """Analisis per negara bagian sesuai notebook (Visualisasi 5)"""
-        df = await self.load_data()
-        
-        # Validasi data untuk menghindari outlier
-        df = df[(df['Total Sales'] > 0) & (df['Total Sales'] < 100000)]
-        df = df[(df['Units Sold'] > 0) & (df['Units Sold'] < 1000)]
-        
-        state_stats = df.groupby('State').agg({
-            'Total Sales': 'sum',
-            'Units Sold': 'sum',
-            'Region': 'first',
-            'Price per Unit': 'mean',
-            'Invoice Date': 'count'
-        }).rename(columns={'Invoice Date': 'Transaction Count'}).nlargest(limit, 'Total Sales')
-        
-        # Hitung persentase dan harga per unit
-        total_sales_all = df['Total Sales'].sum()
-        
-        return {
-            'state_analysis': [
-                {
-                    'state': state,
-                    'total_sales': float(sales),
-                    'units_sold': int(units),
-                    'region': region,
-                    'avg_price': float(avg_price),
-                    'transactions': int(transactions),
-                    'sales_percentage': float((sales / total_sales_all) * 100),
-                    'avg_price_per_unit': float(sales / units) if units > 0 else 0.0
-                }
-                for state, (sales, units, region, avg_price, transactions) in state_stats.iterrows()
-            ],
-            'summary': {
-                'total_states_analyzed': len(state_stats),
-                'total_sales_all': float(total_sales_all),
-                'analysis': f'Analisis penjualan untuk {len(state_stats)} negara bagian teratas'
-            }
-        }
+    return await conditional_json(request, snapshot, key, build)
+
+async def conditional_json(request: Request, snapshot: DataSnapshot, key, build) -> Response:
+    """
+    Respons JSON dengan ETag / Cache-Control / Last-Modified.
     
-    async def get_retailer_analysis(self) -> Dict[str, Any]:
-        """Analisis performa retailer"""
-        df = await self.load_data()
-        
-        retailer_stats = df.groupby('Retailer').agg({
-            'Total Sales': 'sum',
-            'Units Sold': 'sum',
-            'Price per Unit': 'mean',
-            'Invoice Date': 'count'
-        }).rename(columns={'Invoice Date': 'Transaction Count'})
-        
-        return {
-            'retailers': retailer_stats.index.tolist(),
-            'sales': retailer_stats['Total Sales'].tolist(),
-            'units': retailer_stats['Units Sold'].tolist(),
-            'avg_price': retailer_stats['Price per Unit'].tolist(),
-            'transactions': retailer_stats['Transaction Count'].tolist()
-        }
+    Request dengan If-None-Match yang cocok dijawab 304 tanpa menghitung apa pun. Bytes hasil
+    `build()` (dan versi gzip/brotli) di-cache dengan `key`.
+    """
+    headers = {
+        'ETag': make_etag(key),
+        'Cache-Control': HTTP_CACHE_CONTROL,
+        'Last-Modified': formatdate(snapshot.loaded_at.timestamp(), usegmt=True),
+        'Vary': 'Accept-Encoding',
+    }
+    if etag_matches(request.headers.get('if-none-match'), headers['ETag']):
+        RESPONSE_CACHE_LOOKUPS.inc(result='not_modified')
+        return Response(status_code=304, headers=headers)
     
-    async def get_sales_method_analysis(self) -> Dict[str, Any]:
-        """Analisis metode penjualan"""
-        df = await self.load_data()
-        
-        method_stats = df.groupby('Sales Method').agg({
-            'Total Sales': 'sum',
-            'Units Sold': 'sum',
-            'Price per Unit': 'mean',
-            'Invoice Date': 'count'
-        }).rename(columns={'Invoice Date': 'Transaction Count'})
-        
-        return {
-            'methods': method_stats.index.tolist(),
-            'sales': method_stats['Total Sales'].tolist(),
-            'units': method_stats['Units Sold'].tolist(),
-            'avg_price': method_stats['Price per Unit'].tolist(),
-            'transactions': method_stats['Transaction Count'].tolist()
-        }
+    body = response_cache.get(key)
+    if body is None:
+        RESPONSE_CACHE_LOOKUPS.inc(result='miss')
+        body = await build()
+        response_cache.put(key, body)
+    else:
+        RESPONSE_CACHE_LOOKUPS.inc(result='hit')
     
-    async def get_filtered_data(self, filters: Dict[str, Any]) -> Dict[str, Any]:
-        """Data dengan filter untuk frontend"""
-        df = await self.load_data()
-        
-        # Apply filters
-        filtered_df = df.copy()
-        
-        if 'years' in filters and filters['years']:
-            filtered_df = filtered_df[filtered_df['Year'].isin(filters['years'])]
-        
-        if 'regions' in filters and filters['regions']:
-            filtered_df = filtered_df[filtered_df['Region'].isin(filters['regions'])]
-        
-        if 'products' in filters and filters['products']:
-            filtered_df = filtered_df[filtered_df['Product'].isin(filters['products'])]
-        
-        if 'retailers' in filters and filters['retailers']:
-            filtered_df = filtered_df[filtered_df['Retailer'].isin(filters['retailers'])]
-        
-        # Convert to JSON serializable format
-        result_data = filtered_df.head(1000).to_dict('records')
-        for record in result_data:
-            for key, value in record.items():
-                if isinstance(value, (np.integer, np.floating)):
-                    record[key] = value.item()
-                elif isinstance(value, (pd.Timestamp, datetime)):
-                    record[key] = value.strftime('%Y-%m-%d')
-        
-        return {
-            'filtered_data': result_data,
-            'total_records': len(filtered_df),
-            'applied_filters': filters
-        }
+    encoding = choose_encoding(request.headers.get('accept-encoding', ''), len(body))
+    if encoding != 'identity':
+        encoded_key = key + (encoding,)
+        encoded = response_cache.get(encoded_key)
+        if encoded is None:
+            with stage('compress'):
+                encoded = compress(body, encoding)
+            response_cache.put(encoded_key, encoded)
+        body = encoded
+        headers['Content-Encoding'] = encoding
+    return FastJSONResponse(content=body, headers=headers)
 
-# Initialize processor
-processor = NikeDataProcessor()
+@app.on_event("startup")
+async def start_refresh():
+    """Warm-up snapshot (uvicorn baru menerima traffic setelah ini selesai) lalu mulai refresh periodik"""
+    started = time.perf_counter()
+    try:
+        source = await processor.warm_up(WARMUP_MODE)
+    except HTTPException as e:
+        # Snapshot dimuat ulang saat request pertama; jangan gagalkan startup
+        logger.warning("Warm-up snapshot gagal: %s", e.detail)
+        source = None
+    startup_timings.warmed_up(source, time.perf_counter() - started)
+    logger.info("Startup: import %.0f ms, warm-up %.0f ms (%s)", startup_timings.import_seconds * 1000,
+                startup_timings.warmup_seconds * 1000, source or 'snapshot dimuat saat request pertama')
+    processor.start_background_refresh()
+
+@app.on_event("shutdown")
+async def stop_refresh():
+    await processor.stop_background_refresh()
+    processor.compute.shutdown()
+    # Sumber HTTP memegang pool koneksi di event loop sendiri
+    close_source = getattr(processor.source, 'close', None)
+    if close_source is not None:
+        close_source()
 
 # API Endpoints sesuai dengan spesifikasi Jupyter Notebook
 
@@ -355,130 +169,327 @@ async def root():
         "endpoints": {
             "/summary": "Statistik summary data",
             "/monthly-trends": "Analisis tren bulanan",
+            "/time-series": "Time series dengan rentang tanggal, granularitas dan split dimensi bebas",
             "/top-products": "Analisis top produk",
             "/region-distribution": "Distribusi wilayah",
             "/price-correlation": "Korelasi harga vs unit terjual",
             "/state-analysis": "Analisis per negara bagian",
             "/retailer-analysis": "Analisis performa retailer",
             "/sales-method-analysis": "Analisis metode penjualan",
-            "/filtered-data": "Data dengan filter"
+            "/filtered-data": "Data dengan filter",
+            "/dashboard": "Batch beberapa view dashboard dalam satu request",
+            "/query": "Query agregasi generik (group-by, metric, filter, order-by, limit)"
         }
     }
 
+def analysis_filters(
+    years: Optional[List[int]] = Query(None),
+    month_from: Optional[int] = Query(None, ge=1, le=12),
+    month_to: Optional[int] = Query(None, ge=1, le=12),
+    regions: Optional[List[str]] = Query(None),
+    states: Optional[List[str]] = Query(None),
+    products: Optional[List[str]] = Query(None),
+    retailers: Optional[List[str]] = Query(None),
+    sales_methods: Optional[List[str]] = Query(None),
+) -> Optional[Dict[str, Any]]:
+    """Spesifikasi filter bersama untuk semua endpoint analysis (parameter list boleh diulang)"""
+    filters = {
+        'years': years, 'month_from': month_from, 'month_to': month_to,
+        'regions': regions, 'states': states, 'products': products,
+        'retailers': retailers, 'sales_methods': sales_methods,
+    }
+    filters = {key: value for key, value in filters.items() if value}
+    return filters or None
+
 @app.get("/summary")
-async def get_summary():
+async def get_summary(request: Request, filters: Optional[Dict[str, Any]] = Depends(analysis_filters)):
     """Endpoint untuk statistik summary sesuai notebook"""
     try:
-        summary = await processor.get_summary_statistics()
-        return JSONResponse(content=summary)
+        return await cached_json(request, 'summary', processor.get_summary_statistics, filters=filters)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting summary: {str(e)}")
 
 @app.get("/monthly-trends")
-async def get_monthly_trends(year: Optional[int] = None):
+async def get_monthly_trends(request: Request, year: Optional[int] = None,
+                             filters: Optional[Dict[str, Any]] = Depends(analysis_filters)):
     """Endpoint untuk analisis tren bulanan sesuai notebook"""
     try:
-        trends = await processor.get_monthly_trends(year)
-        return JSONResponse(content=trends)
+        return await cached_json(request, 'monthly-trends', processor.get_monthly_trends, year=year, filters=filters)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting monthly trends: {str(e)}")
 
+@app.get("/time-series")
+async def get_time_series(request: Request, start: Optional[str] = None, end: Optional[str] = None,
+                          granularity: str = 'month', split: Optional[str] = None,
+                          filters: Optional[Dict[str, Any]] = Depends(analysis_filters)):
+    """
+    Endpoint time series: `start`/`end` (YYYY-MM-DD, default seluruh data), `granularity`
+    (day, week, month, quarter) dan `split` opsional (region, state, retailer, product, sales_method).
+    """
+    try:
+        return await cached_json(request, 'time-series', processor.get_time_series, start=start, end=end,
+                                 granularity=granularity, split=split, filters=filters)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting time series: {str(e)}")
+
 @app.get("/top-products")
-async def get_top_products(limit: int = 10):
+async def get_top_products(request: Request, limit: int = 10,
+                           filters: Optional[Dict[str, Any]] = Depends(analysis_filters)):
     """Endpoint untuk analisis top produk sesuai notebook"""
     try:
-        top_products = await processor.get_top_products(limit)
-        return JSONResponse(content=top_products)
+        return await cached_json(request, 'top-products', processor.get_top_products, limit=limit, filters=filters)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting top products: {str(e)}")
 
 @app.get("/region-distribution")
-async def get_region_distribution():
+async def get_region_distribution(request: Request, filters: Optional[Dict[str, Any]] = Depends(analysis_filters)):
     """Endpoint untuk distribusi wilayah sesuai notebook"""
     try:
-        region_data = await processor.get_region_distribution()
-        return JSONResponse(content=region_data)
+        return await cached_json(request, 'region-distribution', processor.get_region_distribution, filters=filters)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting region distribution: {str(e)}")
 
 @app.get("/price-correlation")
-async def get_price_correlation():
-    """Endpoint untuk korelasi harga vs unit terjual sesuai notebook"""
+async def get_price_correlation(request: Request, mode: str = 'sample',
+                                points: int = Query(DEFAULT_SCATTER_POINTS, ge=1, le=MAX_SCATTER_POINTS),
+                                bins: int = Query(DEFAULT_DENSITY_BINS, ge=1, le=MAX_DENSITY_BINS),
+                                filters: Optional[Dict[str, Any]] = Depends(analysis_filters)):
+    """
+    Endpoint untuk korelasi harga vs unit terjual sesuai notebook.
+    
+    `mode`: sample (titik acak), stratified (sampel per produk) atau density (grid bins x bins).
+    """
     try:
-        correlation_data = await processor.get_price_correlation()
-        return JSONResponse(content=correlation_data)
+        return await cached_json(request, 'price-correlation', processor.get_price_correlation,
+                                 mode=mode, points=points, bins=bins, filters=filters)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting price correlation: {str(e)}")
 
 @app.get("/state-analysis")
-async def get_state_analysis(limit: int = 15):
+async def get_state_analysis(request: Request, limit: int = 15,
+                             filters: Optional[Dict[str, Any]] = Depends(analysis_filters)):
     """Endpoint untuk analisis per negara bagian sesuai notebook"""
     try:
-        state_data = await processor.get_state_analysis(limit)
-        return JSONResponse(content=state_data)
+        return await cached_json(request, 'state-analysis', processor.get_state_analysis, limit=limit, filters=filters)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting state analysis: {str(e)}")
 
 @app.get("/retailer-analysis")
-async def get_retailer_analysis():
+async def get_retailer_analysis(request: Request, filters: Optional[Dict[str, Any]] = Depends(analysis_filters)):
     """Endpoint untuk analisis performa retailer"""
     try:
-        retailer_data = await processor.get_retailer_analysis()
-        return JSONResponse(content=retailer_data)
+        return await cached_json(request, 'retailer-analysis', processor.get_retailer_analysis, filters=filters)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting retailer analysis: {str(e)}")
 
 @app.get("/sales-method-analysis")
-async def get_sales_method_analysis():
+async def get_sales_method_analysis(request: Request, filters: Optional[Dict[str, Any]] = Depends(analysis_filters)):
     """Endpoint untuk analisis metode penjualan"""
     try:
-        method_data = await processor.get_sales_method_analysis()
-        return JSONResponse(content=method_data)
+        return await cached_json(request, 'sales-method-analysis', processor.get_sales_method_analysis, filters=filters)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting sales method analysis: {str(e)}")
 
 @app.post("/filtered-data")
-async def get_filtered_data(filters: Dict[str, Any] = None):
-    """Endpoint untuk data dengan filter"""
+async def get_filtered_data(request: Request, filters: Dict[str, Any] = None, cursor: Optional[str] = None,
+                            page_size: Optional[int] = Query(None, ge=1),
+                            output_format: str = Query('records', alias='format')):
+    """
+    Endpoint untuk data dengan filter.
+    
+    Format `records` / `columns` mengembalikan satu halaman JSON (default 1000 baris,
+    maksimal 10000) dengan `next_cursor` untuk halaman berikutnya. Format `ndjson` / `arrow`
+    di-stream; tanpa `page_size` seluruh hasil filter dikirim.
+    """
     try:
         # Jika filters None atau kosong, gunakan filter default kosong
         if filters is None:
             filters = {}
-        filtered_data = await processor.get_filtered_data(filters)
-        return JSONResponse(content=filtered_data)
+        if output_format not in OUTPUT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Format tidak dikenal: {output_format} (pilihan: {', '.join(OUTPUT_FORMATS)})")
+        
+        if output_format in ('records', 'columns'):
+            return await cached_json(request, 'filtered-data', processor.get_filtered_data, filters=filters, cursor=cursor,
+                                     page_size=min(page_size or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE),
+                                     output_format=output_format)
+        
+        if output_format == 'arrow' and not arrow_available():
+            raise HTTPException(status_code=501, detail="Format arrow membutuhkan paket pyarrow")
+        snapshot, rows, total_records, next_cursor = await processor.select_filtered_rows(filters, cursor, page_size)
+        headers = {'X-Total-Records': str(total_records)}
+        if next_cursor:
+            headers['X-Next-Cursor'] = next_cursor
+        if output_format == 'ndjson':
+            return StreamingResponse(iter_ndjson(snapshot.df, rows), media_type='application/x-ndjson', headers=headers)
+        return StreamingResponse(iter_arrow(snapshot.df, rows), media_type='application/vnd.apache.arrow.stream', headers=headers)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting filtered data: {str(e)}")
 
+def _bind_view_params(view: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Validasi parameter view dan isi nilai default-nya (agar kunci cache sama dengan endpoint tunggal)"""
+    if view not in DASHBOARD_VIEWS:
+        raise HTTPException(status_code=400, detail=f"View tidak dikenal: {view} (pilihan: {', '.join(DASHBOARD_VIEWS)})")
+    try:
+        bound = inspect.signature(processor.dashboard_view(view)).bind(**params)
+    except TypeError as e:
+        raise HTTPException(status_code=400, detail=f"Parameter view {view} tidak valid: {str(e)}")
+    bound.apply_defaults()
+    return dict(bound.arguments)
+
+@app.post("/dashboard")
+async def get_dashboard(request: Request, batch: Dict[str, Any] = None):
+    """
+    Endpoint batch: beberapa view dashboard dalam satu respons.
+    
+    Body: {"views": ["summary", ...] atau {"top-products": {"limit": 5}, ...}, "filters": {...}}.
+    Tanpa `views` semua view dikembalikan. `filters` (opsional) dipakai bersama oleh semua view,
+    sehingga mask filter di cube cukup dihitung sekali.
+    """
+    try:
+        batch = batch or {}
+        views = batch.get('views') or list(DASHBOARD_VIEWS)
+        if isinstance(views, list):
+            views = {view: {} for view in views}
+        filters = batch.get('filters') or None
+        
+        requested = {}
+        for view, params in views.items():
+            params = dict(params or {})
+            if filters is not None:
+                params.setdefault('filters', filters)
+            requested[view] = _bind_view_params(view, params)
+        
+        snapshot = await processor.get_snapshot()
+        key = response_cache.make_key(snapshot.key, 'dashboard', requested)
+        
+        async def build() -> bytes:
+            parts = []
+            for view, params in requested.items():
+                # Bagian per view di-cache dengan kunci yang sama seperti endpoint tunggalnya
+                view_key = response_cache.make_key(snapshot.key, view, params)
+                body = response_cache.get(view_key)
+                if body is None:
+                    result = await processor.dashboard_view(view)(**params)
+                    with stage('json_encode'):
+                        body = dumps(result)
+                    response_cache.put(view_key, body)
+                parts.append(dumps(view) + b':' + body)
+            return b'{' + b','.join(parts) + b'}'
+        
+        return await conditional_json(request, snapshot, key, build)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting dashboard: {str(e)}")
+
+@app.post("/query")
+async def query(request: Request, body: Dict[str, Any] = None):
+    """
+    Endpoint query agregasi generik.
+    
+    Body: {"group_by": ["Retailer", "Sales Method"], "metrics": ["sum:Units Sold", "mean:Price per Unit",
+    "max:Total Sales", "count", "weighted_price"], "filters": {...}, "order_by": ["-sum:Units Sold"],
+    "limit": 10, "valid_only": false, "plan": "auto"}. Plan eksekusi (cube atau scan) dipilih dari
+    estimasi biaya dan dilaporkan di field `plan`; durasi request di header Server-Timing.
+    """
+    try:
+        spec = parse_query(body)
+    except QueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    started = time.perf_counter()
+    try:
+        response = await cached_json(request, 'query', processor.run_query, **spec)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error running query: {str(e)}")
+    # Durasi request ini (eksekusi, cache hit atau 304) di header, bukan di body yang di-cache
+    response.headers['Server-Timing'] = f"query;dur={(time.perf_counter() - started) * 1000:.3f}"
+    return response
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    """
+    Health check endpoint (tidak pernah menunggu compute pool maupun load snapshot).
+    `ready` bernilai true jika snapshot sudah dimuat sehingga request analisis tidak menunggu ingestion.
+    """
+    snapshot = processor.snapshot
+    return {
+        "status": "healthy",
+        "ready": snapshot is not None,
+        "timestamp": datetime.now().isoformat(),
+        "snapshot": None if snapshot is None else {
+            "key": snapshot.key, "version": snapshot.version, "rows": len(snapshot.df), "age_seconds": round(snapshot.age, 1)
+        },
+        "startup": startup_timings.report(),
+        "compute": processor.compute.stats(),
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Metrik proses ini dalam format teks Prometheus"""
+    return Response(content=REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/debug-slow-requests")
+async def debug_slow_requests():
+    """Request lambat terakhir beserta durasi per tahap (aktif jika NIKE_SLOW_REQUEST_MS > 0)"""
+    if slow_request_log is None:
+        raise HTTPException(status_code=404, detail="Profiling request lambat tidak aktif (set NIKE_SLOW_REQUEST_MS)")
+    return FastJSONResponse(content=slow_request_log.snapshot())
 
 @app.get("/debug-data")
 async def debug_data():
     """Endpoint untuk debugging data yang tersedia"""
     try:
-        df = await processor.load_data()
+        snapshot = await processor.get_snapshot()
+        df = snapshot.df
+        cube = snapshot.cube
         
         # Cek data yang tersedia
         available_data = {
             "total_records": len(df),
-            "years_available": sorted(df['Year'].unique().tolist()) if 'Year' in df.columns else [],
-            "regions_available": df['Region'].unique().tolist() if 'Region' in df.columns else [],
-            "products_available": df['Product'].unique().tolist()[:20] if 'Product' in df.columns else [],  # Batasi 20 produk pertama
-            "retailers_available": df['Retailer'].unique().tolist() if 'Retailer' in df.columns else [],
-            "states_available": df['State'].unique().tolist()[:20] if 'State' in df.columns else [],  # Batasi 20 state pertama
+            "years_available": cube.categories['Year'].tolist(),
+            "regions_available": df['Region'].unique().tolist(),
+            "products_available": df['Product'].unique().tolist()[:20],  # Batasi 20 produk pertama
+            "retailers_available": df['Retailer'].unique().tolist(),
+            "states_available": df['State'].unique().tolist()[:20],  # Batasi 20 state pertama
             "date_range": {
-                "start": df['Invoice Date'].min().strftime('%Y-%m-%d') if 'Invoice Date' in df.columns else None,
-                "end": df['Invoice Date'].max().strftime('%Y-%m-%d') if 'Invoice Date' in df.columns else None
+                "start": cube.date_min.strftime('%Y-%m-%d'),
+                "end": cube.date_max.strftime('%Y-%m-%d')
             },
-            "sample_data": df.head(5).to_dict('records') if len(df) > 0 else []
+            "memory": snapshot.memory,
+            "snapshot": {"key": snapshot.key, "version": snapshot.version, "mode": processor.mode},
+            "sample_data": frame_records(df.head(5))
         }
         
-        return JSONResponse(content=available_data)
+        return FastJSONResponse(content=available_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting debug data: {str(e)}")
 
+startup_timings.imported()
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -0,0 +1,269 @@
+"""
+Metrik proses backend dalam format teks Prometheus (endpoint /metrics).
+
+Registry kecil tanpa dependensi: counter, gauge dan histogram berlabel, plus gauge/counter
+yang nilainya diambil saat scrape (callback). `stage()` mencatat durasi satu tahap hot path
+(fetch sumber, read_csv, preprocessing, perhitungan view, encode JSON, ...) ke histogram
+`nike_stage_duration_seconds`; span yang terjadi di dalam satu request juga dikumpulkan agar
+request lambat bisa diurai per tahap (lihat request_profiler).
+
+Setiap proses punya registry sendiri: pada deployment multi-worker, setiap worker uvicorn
+melaporkan metriknya sendiri.
+"""
+
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Batas bucket (detik) untuk latency request dan durasi tahap (ingestion bisa sampai menit)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STAGE_BUCKETS = LATENCY_BUCKETS + (60.0, 120.0, 300.0, 600.0)
+
+LabelValues = Tuple[str, ...]
+
+# Span tahap milik request yang sedang berjalan (None jika tidak sedang dikumpulkan)
+_request_spans: 'contextvars.ContextVar[Optional[List[Tuple[str, float]]]]' = \
+    contextvars.ContextVar('nike_request_spans', default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 collect: Optional[Callable[[], Any]] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Callback saat scrape: angka (tanpa label) atau {tuple nilai label: angka}
+        self.collect = collect
+        self._values: Dict[LabelValues, Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Label {self.name} harus {self.labelnames}, bukan {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> Iterator[Tuple[LabelValues, float]]:
+        if self.collect is not None:
+            collected = self.collect()
+            if collected is None:
+                return
+            if not isinstance(collected, dict):
+                collected = {(): collected}
+            yield from collected.items()
+            return
+        with self._lock:
+            items = list(self._values.items())
+        yield from items
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, value in self._samples():
+            lines.append(f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}')
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        # Disimpan per bucket (bukan kumulatif); kumulatif dihitung saat render
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][slot] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        for values, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}')
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Kumpulan metrik satu proses, dirender berurutan sesuai pendaftaran"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metrik {metric.name} sudah terdaftar")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                collect: Optional[Callable[[], Any]] = None) -> Counter:
+        return self._register(Counter(name, documentation, labelnames, collect))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              collect: Optional[Callable[[], Any]] = None) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames, collect))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> bytes:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'nike_stage_duration_seconds', 'Durasi tahap hot path (fetch, read_csv, preprocess, view.*, json_encode, ...)',
+    ['stage'], buckets=STAGE_BUCKETS)
+REQUEST_SECONDS = REGISTRY.histogram(
+    'nike_http_request_duration_seconds', 'Latency request HTTP per route', ['method', 'route', 'status'])
+
+
+def _process_rss_bytes() -> Optional[int]:
+    # /proc hanya ada di Linux; di platform lain metrik ini tidak punya sampel
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+REGISTRY.gauge('process_resident_memory_bytes', 'Resident memory proses ini', collect=_process_rss_bytes)
+
+
+def record_stage(name: str, seconds: float):
+    """Catat durasi satu tahap (juga ke daftar span request yang sedang berjalan, jika ada)"""
+    STAGE_SECONDS.observe(seconds, stage=name)
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str):
+    """Span timing untuk satu tahap hot path"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+@contextmanager
+def capture_stages() -> Iterator[List[Tuple[str, float]]]:
+    """Kumpulkan span yang tercatat di konteks ini (mis. untuk dikirim balik dari proses worker)"""
+    spans: List[Tuple[str, float]] = []
+    token = _request_spans.set(spans)
+    try:
+        yield spans
+    finally:
+        _request_spans.reset(token)
+
+
+def _route_label(scope: Dict[str, Any]) -> str:
+    # Template path (mis. /summary), bukan URL mentah, agar kardinalitas label tetap kecil
+    route = scope.get('route')
+    return getattr(route, 'path', None) or 'unmatched'
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI: histogram latency per route/method/status, dan penguraian span per tahap
+    untuk request lambat jika `slow_log` (request_profiler.SlowRequestLog) diberikan.
+    `on_finish(scope, route, status, elapsed)` dipanggil setelah setiap request HTTP.
+    """
+
+    def __init__(self, app, slow_log=None, on_finish: Optional[Callable[..., None]] = None):
+        self.app = app
+        self.slow_log = slow_log
+        self.on_finish = on_finish
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = {'code': 500}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+            await send(message)
+
+        profile = self.slow_log.start(scope) if self.slow_log is not None else None
+        started = time.perf_counter()
+        with capture_stages() as spans:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                elapsed = time.perf_counter() - started
+                route = _route_label(scope)
+                REQUEST_SECONDS.observe(elapsed, method=scope['method'], route=route, status=status['code'])
+                if self.slow_log is not None:
+                    self.slow_log.finish(profile, scope, route, status['code'], elapsed, spans)
+                if self.on_finish is not None:
+                    self.on_finish(scope, route, status['code'], elapsed)
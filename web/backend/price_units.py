@@ -0,0 +1,224 @@
+"""
+Sampel dan grid densitas harga vs unit terjual untuk /price-correlation.
+
+Korelasi Pearson dihitung dari statistik cukup di cube (lihat SalesCube.moment_sums). Untuk
+scatter, snapshot menyimpan sampel terstratifikasi per Product yang dihitung sekali: setiap baris
+mendapat prioritas acak deterministik dari posisinya, dan per stratum disimpan K baris dengan
+prioritas terkecil (bottom-k). Sampel ini bisa difilter lewat bitmap index tanpa menyentuh tabel,
+dan hasil gabungan dua sampel (snapshot lama + batch baru) sama dengan sampel dari seluruh baris.
+Filter selektif yang menyisakan terlalu sedikit kandidat di sampel diambil dari tabel dengan
+prioritas yang sama.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from aggregate_cube import correlation_rows_mask
+from bitmap_index import BitmapIndex
+
+# Dimensi stratifikasi dan jumlah baris yang disimpan per stratum
+STRATUM_COLUMN = 'Product'
+SAMPLE_PER_STRATUM = 2000
+
+SAMPLE_FIELDS = {'Price per Unit': 'price', 'Units Sold': 'units', 'Total Sales': 'total'}
+
+
+def row_priorities(positions: np.ndarray) -> np.ndarray:
+    """Prioritas acak [0, 1) yang hanya bergantung pada posisi baris (hash splitmix64)"""
+    z = positions.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+class PriceUnitsSample:
+    """Sampel bottom-k per stratum, terurut per stratum lalu prioritas"""
+
+    def __init__(self, df: pd.DataFrame, offset: int = 0):
+        codes, categories = _stratum_codes(df[STRATUM_COLUMN])
+        # Baris tanpa nilai stratum tidak ikut sampel (juga tidak dihitung di alokasi)
+        local = np.flatnonzero(correlation_rows_mask(df).to_numpy() & (codes >= 0))
+        columns = {field: df[column].to_numpy()[local] for column, field in SAMPLE_FIELDS.items()}
+        self.row_count = offset + len(df)
+        self.categories = np.asarray(categories, dtype=object)
+        self.price_range = self._range(columns['price'])
+        self.units_range = self._range(columns['units'])
+        self._set(local.astype(np.int64) + offset, codes[local].astype(np.int32), columns)
+
+    @staticmethod
+    def _range(values: np.ndarray) -> Optional[Tuple[float, float]]:
+        return (float(values.min()), float(values.max())) if len(values) else None
+
+    def _set(self, rows: np.ndarray, strata: np.ndarray, columns: Dict[str, np.ndarray]):
+        """Simpan K baris dengan prioritas terkecil per stratum"""
+        priority = row_priorities(rows)
+        order = np.lexsort((priority, strata))
+        strata = strata[order]
+        starts = np.flatnonzero(np.r_[True, strata[1:] != strata[:-1]]) if len(strata) else np.zeros(0, np.int64)
+        rank = np.arange(len(strata)) - np.repeat(starts, np.diff(np.r_[starts, len(strata)]))
+        keep = order[rank < SAMPLE_PER_STRATUM]
+        self.rows = rows[keep]
+        self.strata = strata[rank < SAMPLE_PER_STRATUM]
+        self.columns = {field: values[keep] for field, values in columns.items()}
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Array + metadata sampel untuk SnapshotStore.store_arrays"""
+        arrays = {'rows': self.rows, 'strata': self.strata}
+        arrays.update({f'column:{field}': values for field, values in self.columns.items()})
+        meta = {
+            'row_count': self.row_count,
+            'categories': self.categories.tolist(),
+            'price_range': self.price_range,
+            'units_range': self.units_range,
+        }
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> 'PriceUnitsSample':
+        sample = cls.__new__(cls)
+        sample.row_count = meta['row_count']
+        sample.categories = np.asarray(meta['categories'], dtype=object)
+        sample.rows, sample.strata = arrays['rows'], arrays['strata']
+        sample.columns = {field: arrays[f'column:{field}'] for field in SAMPLE_FIELDS.values()}
+        sample.price_range = tuple(meta['price_range']) if meta['price_range'] else None
+        sample.units_range = tuple(meta['units_range']) if meta['units_range'] else None
+        return sample
+
+    def appended(self, df: pd.DataFrame) -> 'PriceUnitsSample':
+        """Sampel untuk baris lama + batch `df`; sama dengan sampel yang dibangun dari seluruh baris"""
+        parts = (self, PriceUnitsSample(df, offset=self.row_count))
+        labels = [part.categories.astype(str) for part in parts]
+        categories = np.unique(np.concatenate(labels))
+        strata = np.concatenate([
+            np.searchsorted(categories, part_labels)[part.strata]
+            for part, part_labels in zip(parts, labels)
+        ]).astype(np.int32)
+
+        merged = PriceUnitsSample.__new__(PriceUnitsSample)
+        merged.row_count = parts[1].row_count
+        merged.categories = categories.astype(object)
+        merged.price_range = _merge_ranges(part.price_range for part in parts)
+        merged.units_range = _merge_ranges(part.units_range for part in parts)
+        merged._set(np.concatenate([part.rows for part in parts]), strata,
+                    {field: np.concatenate([part.columns[field] for part in parts])
+                     for field in SAMPLE_FIELDS.values()})
+        return merged
+
+    def select(self, df: pd.DataFrame, index: BitmapIndex, bits: Optional[np.ndarray], points: int,
+               stratum_rows: Dict[Any, int]) -> Tuple[Dict[str, np.ndarray], np.ndarray, Dict[Any, Dict[str, int]]]:
+        """
+        Kolom (price, units, total) dan produk untuk maksimal `points` titik yang lolos filter. Jatah
+        setiap stratum sebanding dengan jumlah barisnya di data terfilter (`stratum_rows`). Jika
+        kandidat di sampel snapshot kurang dari jatah (filter selektif), stratum itu diambil dari
+        baris terfilter di tabel dengan prioritas yang sama, jadi hasilnya tetap bottom-k per stratum.
+        """
+        passing = index.contains(bits, self.rows)
+        quotas = _quotas(stratum_rows, points)
+        table = _TableStrata(df, index, bits)
+        parts, strata = [], {}
+        for code, value in enumerate(self.categories):
+            quota = quotas.get(value, 0)
+            if not quota:
+                continue
+            candidates = np.flatnonzero(passing & (self.strata == code))[:quota]
+            if len(candidates) < quota and len(candidates) < stratum_rows[value]:
+                columns = table.draw(value, quota)
+            else:
+                columns = {field: values[candidates] for field, values in self.columns.items()}
+            count = len(columns['price'])
+            parts.append((columns, np.full(count, code, dtype=np.int32)))
+            strata[value] = {'rows': stratum_rows[value], 'points': count}
+        columns = {
+            field: np.concatenate([part[field] for part, _ in parts]) if parts else values[:0]
+            for field, values in self.columns.items()
+        }
+        codes = np.concatenate([part_codes for _, part_codes in parts]) if parts else np.zeros(0, np.int32)
+        return columns, self.categories[codes], strata
+
+
+class _TableStrata:
+    """Baris korelasi terfilter per stratum di tabel snapshot; posisi baris dihitung saat pertama dibutuhkan"""
+
+    def __init__(self, df: pd.DataFrame, index: BitmapIndex, bits: Optional[np.ndarray]):
+        self.df, self.index, self.bits = df, index, bits
+        self._rows: Optional[np.ndarray] = None
+        self._codes: Optional[np.ndarray] = None
+        self._categories: Optional[pd.Index] = None
+
+    def draw(self, value: Any, quota: int) -> Dict[str, np.ndarray]:
+        """`quota` baris dengan prioritas terkecil di stratum `value` (urut prioritas, seperti sampel)"""
+        if self._rows is None:
+            self._rows = self.index.rows(self.bits)
+            codes, self._categories = _stratum_codes(self.df[STRATUM_COLUMN])
+            self._codes = codes[self._rows]
+        rows = self._rows[self._codes == self._categories.get_loc(value)]
+        price = self.df['Price per Unit'].to_numpy()[rows]
+        units = self.df['Units Sold'].to_numpy()[rows]
+        rows = rows[(price > 0) & (price < 200) & (units > 0) & (units < 1000)]
+        rows = rows[np.argsort(row_priorities(rows), kind='stable')[:quota]]
+        return {field: self.df[column].to_numpy()[rows] for column, field in SAMPLE_FIELDS.items()}
+
+
+def _stratum_codes(series: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    codes, categories = pd.factorize(series, sort=True)
+    return codes, pd.Index(categories)
+
+
+def _quotas(stratum_rows: Dict[Any, int], points: int) -> Dict[Any, int]:
+    """
+    Jatah titik per stratum dengan total tepat min(points, jumlah baris). Setiap stratum mendapat
+    satu titik (stratum terbesar lebih dulu jika points kurang), sisanya dibagi sebanding jumlah
+    baris dengan metode sisa terbesar dan tidak melebihi jumlah baris stratum.
+    """
+    values = [value for value, rows in stratum_rows.items() if rows > 0]
+    rows = np.array([stratum_rows[value] for value in values], dtype=np.int64)
+    budget = int(min(points, rows.sum())) if len(rows) else 0
+    if budget < len(values):
+        largest = np.argsort(-rows, kind='stable')[:budget]
+        return {values[i]: 1 for i in largest}
+    spare = rows - 1
+    remaining = budget - len(values)
+    if not remaining:
+        return dict.fromkeys(values, 1)
+    ideal = remaining * spare / spare.sum()
+    extra = np.floor(ideal).astype(np.int64)
+    leftover = remaining - int(extra.sum())
+    extra[np.argsort(-(ideal - extra), kind='stable')[:leftover]] += 1
+    return {value: 1 + int(n) for value, n in zip(values, extra)}
+
+
+def _merge_ranges(ranges) -> Optional[Tuple[float, float]]:
+    ranges = [r for r in ranges if r is not None]
+    if not ranges:
+        return None
+    return min(r[0] for r in ranges), max(r[1] for r in ranges)
+
+
+def _bin_edges(value_range: Optional[Tuple[float, float]], bins: int) -> Tuple[np.ndarray, float]:
+    # Lebar bin bulat (data harga/unit berupa bilangan bulat) agar satu nilai tidak terbelah
+    low, high = value_range or (0.0, 0.0)
+    width = max(1.0, float(np.ceil((high - low + 1) / bins)))
+    return low + width * np.arange(bins + 1), width
+
+
+def density_grid(price: np.ndarray, units: np.ndarray, sample: PriceUnitsSample, bins: int) -> Dict[str, Any]:
+    """Histogram 2D harga x unit (baris korelasi saja) dengan tepi bin tetap per snapshot"""
+    included = (price > 0) & (price < 200) & (units > 0) & (units < 1000)
+    price, units = price[included], units[included]
+    price_edges, price_width = _bin_edges(sample.price_range, bins)
+    units_edges, units_width = _bin_edges(sample.units_range, bins)
+    x = np.clip(((price - price_edges[0]) // price_width).astype(np.int64), 0, bins - 1)
+    y = np.clip(((units - units_edges[0]) // units_width).astype(np.int64), 0, bins - 1)
+    counts = np.bincount(x * bins + y, minlength=bins * bins).reshape(bins, bins)
+    return {
+        'price_edges': price_edges.tolist(),
+        'units_edges': units_edges.tolist(),
+        # counts[i][j] = jumlah transaksi dengan harga di bin i dan unit di bin j
+        'counts': counts.tolist(),
+        'max_count': int(counts.max()) if counts.size else 0,
+    }
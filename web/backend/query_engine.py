@@ -0,0 +1,429 @@
+"""
+Query agregasi generik untuk /query: group-by dimensi, metric, filter, urutan dan limit bebas.
+
+Setiap query bisa dijawab dengan dua plan:
+
+- `cube`: menjumlahkan sel SalesCube (sum, count, min/max per sel sudah tersedia), biayanya
+  sebanding dengan jumlah sel cube yang lolos filter;
+- `scan`: memindai kolom tabel untuk baris yang lolos filter (dipilih lewat bitmap index),
+  biayanya sebanding dengan jumlah baris terfilter. Plan ini wajib untuk group-by 'Invoice Date'
+  yang tidak ada di cube.
+
+Pada plan `auto` executor memperkirakan biaya keduanya (jumlah sel terfilter / baris terfilter dari
+popcount bitmap, dikali jumlah array yang disentuh) dan memilih yang termurah. Dengan `limit`, top-K dipilih
+lewat np.partition alih-alih mengurutkan semua grup. Plan yang dipakai, alasannya dan estimasi biaya
+dilaporkan di field `plan` pada respons; durasi per request ada di header Server-Timing.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from aggregate_cube import CUBE_DIMENSIONS, DENSE_ROLLUP_LIMIT, EXTREME_COLUMNS, valid_sales_mask
+from sales_table import DAY_COLUMN, FILTER_DIMENSIONS, MEASURE_COLUMNS, MONTH_RANGE_KEYS, format_days
+
+# Dimensi yang hanya bisa dijawab dengan scan (tidak disimpan di cube)
+DATE_DIMENSION = 'Invoice Date'
+QUERY_DIMENSIONS = CUBE_DIMENSIONS + [DATE_DIMENSION]
+
+# Nama pendek yang diterima di body query -> nama kolom
+DIMENSION_ALIASES = {
+    'year': 'Year', 'month': 'Month', 'region': 'Region', 'state': 'State', 'retailer': 'Retailer',
+    'product': 'Product', 'sales_method': 'Sales Method', 'date': DATE_DIMENSION,
+}
+MEASURE_ALIASES = {'sales': 'Total Sales', 'units': 'Units Sold', 'price': 'Price per Unit'}
+
+AGGREGATIONS = ('sum', 'mean', 'min', 'max')
+# Metric tanpa kolom: jumlah transaksi dan harga rata-rata tertimbang unit (Σ harga x unit / Σ unit)
+COUNT_METRIC = 'count'
+WEIGHTED_PRICE_METRIC = 'weighted_price'
+
+QUERY_PLANS = ('auto', 'cube', 'scan')
+QUERY_FIELDS = ('group_by', 'metrics', 'filters', 'order_by', 'limit', 'valid_only', 'plan')
+DEFAULT_METRICS = ['sum:Total Sales', COUNT_METRIC]
+MAX_QUERY_LIMIT = 10000
+
+# Kolom tabel -> measure cube (jumlah per sel) dan nama min/max per sel
+CUBE_SUMS = {'Total Sales': 'sales', 'Units Sold': 'units', 'Price per Unit': 'price_sum'}
+CUBE_EXTREMES = {column: name for name, column in EXTREME_COLUMNS.items()}
+
+# Biaya relatif (satuan: satu nilai array dibaca berurutan), dikalibrasi dengan benchmark 1 juta baris:
+# nilai baris terfilter diambil acak lewat posisi dari bitmap, dan mengubah bitmap menjadi posisi
+# baris membaca seluruh bitset (kira-kira 1/4 unit per baris tabel).
+SCAN_GATHER_COST = 6.0
+BITMAP_ROW_COST = 0.25
+
+
+class QueryError(ValueError):
+    """Spesifikasi query tidak valid (dijawab 400)"""
+
+
+def _as_list(value: Any, field: str) -> List[Any]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    if not isinstance(value, list):
+        raise QueryError(f"{field} harus berupa string atau list")
+    return value
+
+
+def _dimension(name: Any) -> str:
+    if isinstance(name, str):
+        name = DIMENSION_ALIASES.get(name, name)
+    if name not in QUERY_DIMENSIONS:
+        raise QueryError(f"Dimensi tidak dikenal: {name} (pilihan: {', '.join(QUERY_DIMENSIONS)})")
+    return name
+
+
+def _metric(spec: Any) -> str:
+    if spec in (COUNT_METRIC, WEIGHTED_PRICE_METRIC):
+        return spec
+    aggregation, _, column = spec.partition(':') if isinstance(spec, str) else ('', '', '')
+    column = MEASURE_ALIASES.get(column, column)
+    if aggregation not in AGGREGATIONS or column not in MEASURE_COLUMNS:
+        raise QueryError(
+            f"Metric tidak dikenal: {spec} (format: <{'|'.join(AGGREGATIONS)}>:<kolom>, "
+            f"{COUNT_METRIC} atau {WEIGHTED_PRICE_METRIC}; kolom: {', '.join(MEASURE_COLUMNS)})")
+    return f"{aggregation}:{column}"
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _filters(filters: Any) -> Optional[Dict[str, Any]]:
+    """Validasi filter: list string/bilangan bulat per dimensi, month_from/month_to bilangan bulat 1-12"""
+    if not filters:
+        return None
+    if not isinstance(filters, dict):
+        raise QueryError("filters harus berupa object")
+    unknown = [key for key in filters if key not in FILTER_DIMENSIONS and key not in MONTH_RANGE_KEYS]
+    if unknown:
+        raise QueryError(f"Filter tidak dikenal: {', '.join(unknown)}")
+    for key in FILTER_DIMENSIONS:
+        values = filters.get(key)
+        if values is not None and (not isinstance(values, list) or
+                                   not all(isinstance(v, str) or _is_int(v) for v in values)):
+            raise QueryError(f"Filter {key} harus berupa list string atau bilangan bulat")
+    for key in MONTH_RANGE_KEYS:
+        value = filters.get(key)
+        if value is not None and (not _is_int(value) or not 1 <= value <= 12):
+            raise QueryError(f"{key} harus bilangan bulat 1-12")
+    # Nilai kosong sama dengan tanpa filter (kunci cache sama)
+    return {key: value for key, value in filters.items() if value is not None and value != []} or None
+
+
+def parse_query(body: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Validasi dan normalisasi body /query (nama pendek -> nama kolom, nilai default terisi),
+    sehingga query yang setara mendapat kunci cache yang sama.
+    """
+    body = body or {}
+    unknown = [field for field in body if field not in QUERY_FIELDS]
+    if unknown:
+        raise QueryError(f"Field tidak dikenal: {', '.join(unknown)} (pilihan: {', '.join(QUERY_FIELDS)})")
+
+    group_by = [_dimension(name) for name in _as_list(body.get('group_by'), 'group_by')]
+    if len(set(group_by)) != len(group_by):
+        raise QueryError("group_by tidak boleh berisi dimensi yang sama dua kali")
+    metrics = list(dict.fromkeys(_metric(spec) for spec in _as_list(body.get('metrics'), 'metrics')))
+    metrics = metrics or list(DEFAULT_METRICS)
+
+    order_by = []
+    for spec in _as_list(body.get('order_by'), 'order_by'):
+        descending = isinstance(spec, str) and spec.startswith('-')
+        name = spec[1:] if descending else spec
+        try:
+            name = _metric(name)
+        except QueryError:
+            name = _dimension(name) if isinstance(name, str) and DIMENSION_ALIASES.get(name, name) in group_by else name
+        if name not in metrics and name not in group_by:
+            raise QueryError(f"order_by {spec} harus berupa metric atau dimensi group_by query ini")
+        order_by.append(('-' if descending else '') + name)
+
+    limit = body.get('limit')
+    if limit is not None and (not _is_int(limit) or not 1 <= limit <= MAX_QUERY_LIMIT):
+        raise QueryError(f"limit harus bilangan bulat 1-{MAX_QUERY_LIMIT}")
+    plan = body.get('plan') or 'auto'
+    if plan not in QUERY_PLANS:
+        raise QueryError(f"Plan tidak dikenal: {plan} (pilihan: {', '.join(QUERY_PLANS)})")
+    if plan == 'cube' and DATE_DIMENSION in group_by:
+        raise QueryError(f"Plan cube tidak mendukung group-by {DATE_DIMENSION}")
+
+    return {
+        'group_by': group_by,
+        'metrics': metrics,
+        'filters': _filters(body.get('filters')),
+        'order_by': order_by,
+        'limit': limit,
+        'valid_only': bool(body.get('valid_only', False)),
+        'plan': plan,
+    }
+
+
+def _components(metrics: List[str]) -> Tuple[List[str], List[str], List[str]]:
+    """Kolom yang perlu dijumlahkan, dicari minimum dan dicari maksimum untuk metric query"""
+    sums, minima, maxima = [], [], []
+    for metric in metrics:
+        aggregation, _, column = metric.partition(':')
+        if aggregation in ('sum', 'mean'):
+            sums.append(column)
+        elif aggregation == 'min':
+            minima.append(column)
+        elif aggregation == 'max':
+            maxima.append(column)
+        elif metric == WEIGHTED_PRICE_METRIC:
+            sums.append('Units Sold')
+    return list(dict.fromkeys(sums)), list(dict.fromkeys(minima)), list(dict.fromkeys(maxima))
+
+
+def _group_ids(codes: List[np.ndarray], shape: Tuple[int, ...], n_items: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(grup tiap item, kunci grup terurut) dari kode dimensi; bincount langsung jika ruang kombinasi kecil"""
+    if not codes:
+        return np.zeros(n_items, dtype=np.int64), np.zeros(min(n_items, 1), dtype=np.int64)
+    flat = np.ravel_multi_index(codes, shape) if len(codes) > 1 else codes[0].astype(np.int64)
+    if int(np.prod(shape)) <= DENSE_ROLLUP_LIMIT:
+        present = np.bincount(flat, minlength=int(np.prod(shape))) > 0
+        keys = np.flatnonzero(present)
+        compact = np.cumsum(present) - 1
+        return compact[flat], keys
+    keys, group = np.unique(flat, return_inverse=True)
+    return group, keys
+
+
+def _aggregate(codes: List[np.ndarray], categories: List[np.ndarray], counts: np.ndarray,
+               sums: Dict[str, np.ndarray], minima: Dict[str, np.ndarray],
+               maxima: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """
+    Agregasi item (sel cube atau baris tabel) per kombinasi kode dimensi. `counts` = jumlah
+    transaksi per item (count sel, atau 1 per baris); sums/minima/maxima per kolom tabel.
+    """
+    shape = tuple(len(values) for values in categories)
+    group, keys = _group_ids(codes, shape, len(counts))
+    n_groups = len(keys)
+    result = {
+        'count': np.bincount(group, weights=counts, minlength=n_groups).astype(np.int64),
+        'sums': {
+            column: np.bincount(group, weights=values, minlength=n_groups).astype(
+                np.int64 if np.issubdtype(values.dtype, np.integer) else np.float64)
+            for column, values in sums.items()
+        },
+    }
+    if minima or maxima:
+        order = np.argsort(group, kind='stable')
+        starts = np.flatnonzero(np.r_[True, np.diff(group[order]) != 0]) if len(order) else order
+        result['min'] = {column: np.minimum.reduceat(values[order], starts) if len(order) else values
+                         for column, values in minima.items()}
+        result['max'] = {column: np.maximum.reduceat(values[order], starts) if len(order) else values
+                         for column, values in maxima.items()}
+    labels = np.unravel_index(keys, shape) if codes else []
+    result['labels'] = [values[dim_codes] for values, dim_codes in zip(categories, labels)]
+    return result
+
+
+def _cube_items(cube, spec: Dict[str, Any], sums: List[str], minima: List[str], maxima: List[str]):
+    """Sel cube yang terpilih filter (tanpa sel NA pada dimensi group-by) beserta measure-nya"""
+    selected = cube.filter_mask(spec['filters'])
+    selected = np.ones(len(cube), dtype=bool) if selected is None else selected.copy()
+    if spec['valid_only']:
+        selected &= cube.valid
+    for dim in spec['group_by']:
+        if dim in cube.na_codes:
+            selected &= cube.codes[dim] != cube.na_codes[dim]
+
+    def cells(values: np.ndarray, dtype=None) -> np.ndarray:
+        values = values[selected]
+        return values.astype(dtype) if dtype is not None else values
+
+    codes = [cells(cube.codes[dim]) for dim in spec['group_by']]
+    categories = [np.asarray(cube.categories[dim]) for dim in spec['group_by']]
+    counts = cells(cube.measures['count'])
+    summed = {column: cells(cube.measures[CUBE_SUMS[column]], cube.measure_dtypes[CUBE_SUMS[column]])
+              for column in sums}
+    if WEIGHTED_PRICE_METRIC in spec['metrics']:
+        summed['price_units'] = cells(cube.measures['price_units'], np.float64)
+    return (codes, categories, counts, summed,
+            {column: cells(cube.extremes[f'min:{CUBE_EXTREMES[column]}']) for column in minima},
+            {column: cells(cube.extremes[f'max:{CUBE_EXTREMES[column]}']) for column in maxima})
+
+
+def _column_codes(series: pd.Series, rows: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Kode (-1 = kosong) dan nilai unik satu kolom untuk baris terpilih"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        return (codes if rows is None else codes[rows]), np.asarray(series.cat.categories)
+    values = series.to_numpy()
+    codes, uniques = pd.factorize(values if rows is None else values[rows])
+    return codes, np.asarray(uniques)
+
+
+def _scan_items(snapshot, bits: Optional[np.ndarray], spec: Dict[str, Any],
+                sums: List[str], minima: List[str], maxima: List[str]):
+    """Kolom tabel untuk baris yang lolos filter (hanya kolom yang dibutuhkan query)"""
+    df = snapshot.df
+    rows = None if bits is None else snapshot.index.rows(bits)
+
+    def column(name: str) -> np.ndarray:
+        values = df[name].to_numpy()
+        return values if rows is None else values[rows]
+
+    codes, categories = [], []
+    for dim in spec['group_by']:
+        dim_codes, values = _column_codes(df[DAY_COLUMN if dim == DATE_DIMENSION else dim], rows)
+        codes.append(dim_codes)
+        categories.append(format_days(values).astype(object) if dim == DATE_DIMENSION else values)
+
+    needed = {*sums, *minima, *maxima, 'Units Sold'}
+    if spec['valid_only']:
+        needed.add('Total Sales')
+    if WEIGHTED_PRICE_METRIC in spec['metrics']:
+        needed.add('Price per Unit')
+    columns = {name: column(name) for name in needed}
+    # Baris tanpa nilai pada dimensi group-by tidak masuk grup mana pun (seperti groupby)
+    keep = np.ones(len(columns['Units Sold']), dtype=bool)
+    for dim_codes in codes:
+        keep &= dim_codes >= 0
+    if spec['valid_only']:
+        keep &= np.asarray(valid_sales_mask(columns))
+    if not keep.all():
+        codes = [dim_codes[keep] for dim_codes in codes]
+        columns = {name: values[keep] for name, values in columns.items()}
+
+    def widened(values: np.ndarray) -> np.ndarray:
+        return values.astype(np.int64 if np.issubdtype(values.dtype, np.integer) else np.float64)
+
+    summed = {name: widened(columns[name]) for name in sums}
+    if WEIGHTED_PRICE_METRIC in spec['metrics']:
+        summed['price_units'] = columns['Price per Unit'].astype(np.float64) * columns['Units Sold']
+    return (codes, categories, np.ones(len(columns['Units Sold']), dtype=np.int64), summed,
+            {name: widened(columns[name]) for name in minima},
+            {name: widened(columns[name]) for name in maxima})
+
+
+def _metric_values(aggregated: Dict[str, Any], metric: str) -> np.ndarray:
+    count = aggregated['count']
+    if metric == COUNT_METRIC:
+        return count
+    if metric == WEIGHTED_PRICE_METRIC:
+        units = aggregated['sums']['Units Sold']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(units != 0, aggregated['sums']['price_units'] / np.where(units != 0, units, 1), np.nan)
+    aggregation, _, column = metric.partition(':')
+    if aggregation == 'sum':
+        return aggregated['sums'][column]
+    if aggregation == 'mean':
+        return aggregated['sums'][column] / count
+    return aggregated[aggregation][column]
+
+
+def _sort_keys(spec: Dict[str, Any], labels: Dict[str, np.ndarray], values: Dict[str, np.ndarray]) -> List[np.ndarray]:
+    """Kunci urut numerik (prioritas pertama lebih dulu); NaN selalu di akhir, dimensi sebagai tie-breaker"""
+    keys = []
+    explicit = {entry.lstrip('-') for entry in spec['order_by']}
+    ordered = spec['order_by'] + [dim for dim in spec['group_by'] if dim not in explicit]
+    for entry in ordered:
+        descending = entry.startswith('-')
+        name = entry[1:] if descending else entry
+        if name in labels:
+            # Rank padat nilai dimensi (string / angka) agar bisa dinegasikan untuk urutan turun
+            key = np.unique(labels[name], return_inverse=True)[1].astype(np.float64)
+        else:
+            key = values[name].astype(np.float64)
+        key = -key if descending else key
+        # NaN (mis. mean tanpa transaksi) selalu di akhir, apa pun arah urutannya
+        keys.append(np.where(np.isnan(key), np.inf, key))
+    return keys
+
+
+def _top_groups(keys: List[np.ndarray], n_groups: int, limit: Optional[int]) -> np.ndarray:
+    """
+    Posisi grup terurut. Dengan limit, np.partition mencari nilai ke-K kunci utama, lalu hanya
+    grup sampai nilai itu (K + grup yang seri) yang diurutkan: O(n + K log K), tanpa loop Python.
+    """
+    if not keys:
+        return np.arange(min(n_groups, limit or n_groups))
+    if limit is None or limit >= n_groups:
+        return np.lexsort(keys[::-1])
+    primary = keys[0]
+    threshold = np.partition(primary, limit - 1)[limit - 1]
+    candidates = np.flatnonzero(primary <= threshold)
+    # lexsort stabil: grup yang seri di semua kunci tetap berurutan menurut kode grup
+    order = np.lexsort([key[candidates] for key in keys[::-1]])
+    return candidates[order[:limit]]
+
+
+def estimate_costs(snapshot, spec: Dict[str, Any], bits: Optional[np.ndarray]) -> Dict[str, Any]:
+    """Estimasi biaya plan cube dan scan (None jika plan tidak bisa menjawab query)"""
+    sums, minima, maxima = _components(spec['metrics'])
+    # Array yang disentuh per item: kode dimensi + kolom metric (+ count/flag valid)
+    width = len(spec['group_by']) + len(sums) + len(minima) + len(maxima) + 2
+    index, cube = snapshot.index, snapshot.cube
+    filtered_rows = index.count(bits)
+    # Mask sel cube diingat per filter, jadi menghitung sel terpilih di sini tidak mengulang kerja plan cube
+    mask = cube.filter_mask(spec['filters'])
+    cube_cells = len(cube) if mask is None else int(np.count_nonzero(mask))
+    cube_cost = None if DATE_DIMENSION in spec['group_by'] else float(len(cube) + cube_cells * width)
+    if bits is None:
+        scan_cost = float(filtered_rows * width)
+    else:
+        scan_cost = filtered_rows * width * SCAN_GATHER_COST + index.row_count * BITMAP_ROW_COST
+    return {'cube': cube_cost, 'scan': float(scan_cost), 'cube_cells': cube_cells, 'filtered_rows': filtered_rows}
+
+
+def choose_plan(requested: str, costs: Dict[str, Any]) -> Tuple[str, str]:
+    """(plan, alasan) untuk plan yang diminta dan estimasi biayanya"""
+    if requested != 'auto':
+        return requested, 'diminta'
+    if costs['cube'] is None:
+        return 'scan', f'group-by {DATE_DIMENSION} tidak tersedia di cube'
+    if costs['scan'] < costs['cube']:
+        return 'scan', 'estimasi biaya scan baris terfilter lebih kecil'
+    return 'cube', 'estimasi biaya rollup sel cube lebih kecil'
+
+
+def run_query(snapshot, group_by: List[str], metrics: List[str], filters: Optional[Dict[str, Any]] = None,
+              order_by: Optional[List[str]] = None, limit: Optional[int] = None,
+              valid_only: bool = False, plan: str = 'auto') -> Dict[str, Any]:
+    """Eksekusi query yang sudah dinormalisasi parse_query atas sebuah snapshot"""
+    spec = {'group_by': group_by, 'metrics': metrics, 'filters': filters, 'order_by': order_by or [],
+            'valid_only': valid_only}
+    bits = snapshot.index.filter(filters) if filters else None
+    costs = estimate_costs(snapshot, spec, bits)
+    chosen, reason = choose_plan(plan, costs)
+
+    sums, minima, maxima = _components(metrics)
+    if chosen == 'cube':
+        items = _cube_items(snapshot.cube, spec, sums, minima, maxima)
+    else:
+        items = _scan_items(snapshot, bits, spec, sums, minima, maxima)
+    aggregated = _aggregate(*items)
+    labels = dict(zip(group_by, aggregated['labels']))
+    values = {metric: _metric_values(aggregated, metric) for metric in metrics}
+
+    n_groups = len(aggregated['count'])
+    top = _top_groups(_sort_keys(spec, labels, values), n_groups, limit)
+    columns = {name: labels[name][top].tolist() for name in group_by}
+    for metric in metrics:
+        selected = values[metric][top]
+        if np.issubdtype(selected.dtype, np.floating) and np.isnan(selected).any():
+            columns[metric] = [None if np.isnan(v) else v for v in selected.tolist()]
+        else:
+            columns[metric] = selected.tolist()
+    names = list(columns)
+
+    return {
+        'group_by': group_by,
+        'metrics': metrics,
+        'rows': [dict(zip(names, row)) for row in zip(*columns.values())],
+        'total_groups': n_groups,
+        'plan': {
+            'plan': chosen,
+            'requested': plan,
+            'reason': reason,
+            'estimated_cost': {'cube': costs['cube'], 'scan': costs['scan']},
+            'cube_cells': costs['cube_cells'],
+            'filtered_rows': costs['filtered_rows'],
+        },
+    }
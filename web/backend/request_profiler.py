@@ -0,0 +1,122 @@
+"""
+Profiling request lambat (opsional, diaktifkan lewat NIKE_SLOW_REQUEST_MS).
+
+Setiap request yang melewati ambang dicatat (log + ring buffer untuk /debug-slow-requests)
+bersama penguraian durasi per tahap dari span metrics.stage(). Sebagian request (sample rate)
+juga dijalankan dengan stack sampler: thread yang mengambil stack semua thread proses setiap
+beberapa milidetik, sehingga waktu di compute pool maupun event loop terlihat tanpa overhead
+profiler deterministik. Hasil sampler hanya disimpan jika request tersebut ternyata lambat.
+"""
+
+import logging
+import os
+import random
+import sys
+import threading
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Interval sampling stack dan batas kedalaman / jumlah stack yang dilaporkan
+PROFILE_INTERVAL = 0.005
+PROFILE_MAX_DEPTH = 40
+PROFILE_TOP = 15
+
+# Frame daun thread yang sedang menganggur (event loop menunggu I/O, worker pool menunggu task)
+IDLE_FRAMES = {('selectors.py', 'select'), ('threading.py', 'wait'), ('thread.py', '_worker'),
+               ('queue.py', 'get'), ('threading.py', '_wait_for_tstate_lock')}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class StackSampler:
+    """Sampling stack semua thread (kecuali sampler sendiri) sampai stop() dipanggil"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self.leaves: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self) -> 'StackSampler':
+        self._thread.start()
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < PROFILE_MAX_DEPTH:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                self.leaves[labels[0]] += 1
+                self.stacks[';'.join(reversed(labels))] += 1
+            self.samples += 1
+
+    def stop(self) -> Dict[str, Any]:
+        self._stop.set()
+        self._thread.join()
+        return {
+            'interval_ms': self.interval * 1000,
+            'samples': self.samples,
+            'top_frames': [{'frame': f, 'samples': n} for f, n in self.leaves.most_common(PROFILE_TOP)],
+            'top_stacks': [{'stack': s, 'samples': n} for s, n in self.stacks.most_common(PROFILE_TOP)],
+        }
+
+
+class SlowRequestLog:
+    """Catatan request yang lebih lambat dari ambang, dengan span per tahap dan profil opsional"""
+
+    def __init__(self, threshold_ms: float, sample_rate: float = 0.0, keep: int = 50):
+        self.threshold = threshold_ms / 1000
+        self.sample_rate = sample_rate
+        self.entries: 'deque[Dict[str, Any]]' = deque(maxlen=keep)
+        self.slow_count = 0
+
+    def start(self, scope: Dict[str, Any]) -> Optional[StackSampler]:
+        """Mulai stack sampler untuk request ini jika terpilih sampling"""
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return StackSampler().start()
+        return None
+
+    def finish(self, sampler: Optional[StackSampler], scope: Dict[str, Any], route: str, status: int,
+               elapsed: float, spans: List[Tuple[str, float]]):
+        profile = sampler.stop() if sampler is not None else None
+        if elapsed < self.threshold:
+            return
+        stages: Dict[str, float] = {}
+        for name, seconds in spans:
+            stages[name] = stages.get(name, 0.0) + seconds
+        entry = {
+            'time': datetime.now().isoformat(),
+            'method': scope['method'],
+            'path': scope['path'],
+            'query': scope.get('query_string', b'').decode('latin-1'),
+            'route': route,
+            'status': status,
+            'duration_ms': round(elapsed * 1000, 2),
+            'stages_ms': {name: round(seconds * 1000, 2) for name, seconds in stages.items()},
+            'profile': profile,
+        }
+        self.entries.append(entry)
+        self.slow_count += 1
+        logger.warning("Request lambat %s %s: %.1f ms (%s)", entry['method'], entry['path'], entry['duration_ms'],
+                       ', '.join(f"{name}={ms:.1f}ms" for name, ms in entry['stages_ms'].items()) or 'tanpa span')
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'threshold_ms': self.threshold * 1000,
+            'sample_rate': self.sample_rate,
+            'slow_requests': self.slow_count,
+            'recent': list(reversed(self.entries)),
+        }
@@ -0,0 +1,117 @@
+"""
+Serialisasi baris tabel penjualan untuk /filtered-data: cursor keyset, JSON per kolom,
+NDJSON dan Arrow IPC yang di-stream per batch.
+
+Konversi dilakukan per kolom (vectorized), bukan per sel.
+"""
+
+import base64
+import io
+import json
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+from sales_table import DAY_COLUMN, format_days
+
+OUTPUT_FORMATS = ('records', 'columns', 'ndjson', 'arrow')
+STREAM_BATCH_ROWS = 10000
+
+
+class CursorError(ValueError):
+    """Cursor tidak valid atau berasal dari snapshot lain"""
+
+
+def encode_cursor(snapshot_key: str, last_row: int) -> str:
+    payload = json.dumps({'s': snapshot_key[:16], 'r': int(last_row)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, snapshot_key: str, row_count: int) -> int:
+    """Posisi baris terakhir dari halaman sebelumnya (-1 sampai row_count - 1)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        snapshot_prefix, last_row = payload['s'], int(payload['r'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise CursorError(f"Cursor tidak valid: {cursor}") from e
+    if snapshot_prefix != snapshot_key[:16]:
+        raise CursorError("Cursor berasal dari snapshot data lama, mulai ulang dari halaman pertama")
+    if not -1 <= last_row < row_count:
+        raise CursorError(f"Cursor tidak valid: posisi baris {last_row} di luar tabel ({row_count} baris)")
+    return last_row
+
+
+def frame_columns(df: pd.DataFrame) -> Dict[str, List[Any]]:
+    """Kolom tabel ke list Python (Invoice Date sebagai string 'YYYY-MM-DD')"""
+    columns: Dict[str, List[Any]] = {}
+    for name in df.columns:
+        series = df[name]
+        if name == DAY_COLUMN:
+            columns['Invoice Date'] = format_days(series.to_numpy()).tolist()
+        elif isinstance(series.dtype, pd.CategoricalDtype):
+            categories = np.asarray(series.cat.categories, dtype=object)
+            columns[name] = categories.take(series.cat.codes.to_numpy()).tolist()
+        else:
+            columns[name] = series.to_numpy().tolist()
+    return columns
+
+
+def frame_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Baris tabel ke list dict (format records)"""
+    columns = frame_columns(df)
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+def _export_frame(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.rename(columns={DAY_COLUMN: 'Invoice Date'})
+    df['Invoice Date'] = format_days(df['Invoice Date'].to_numpy())
+    return df
+
+
+def iter_ndjson(df: pd.DataFrame, rows: np.ndarray, batch_rows: int = STREAM_BATCH_ROWS) -> Iterator[bytes]:
+    """Stream baris terpilih sebagai NDJSON, satu batch per chunk"""
+    for start in range(0, len(rows), batch_rows):
+        batch = _export_frame(df.take(rows[start:start + batch_rows]))
+        text = batch.to_json(orient='records', lines=True, force_ascii=False)
+        # Versi pandas lama tidak menambahkan newline di akhir baris terakhir
+        yield (text if text.endswith('\n') else text + '\n').encode()
+
+
+def arrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def iter_arrow(df: pd.DataFrame, rows: np.ndarray, batch_rows: int = STREAM_BATCH_ROWS) -> Iterator[bytes]:
+    """Stream baris terpilih sebagai Arrow IPC stream (membutuhkan pyarrow)"""
+    import pyarrow as pa
+
+    def to_batch(frame: pd.DataFrame) -> 'pa.RecordBatch':
+        batch = pa.RecordBatch.from_pandas(frame.drop(columns=[DAY_COLUMN]), preserve_index=False)
+        dates = pa.array(frame[DAY_COLUMN].to_numpy(), type=pa.int32()).cast(pa.date32())
+        return pa.RecordBatch.from_arrays([dates] + batch.columns, names=['Invoice Date'] + batch.schema.names)
+
+    sink = io.BytesIO()
+    writer = None
+    for start in range(0, max(len(rows), 1), batch_rows):
+        batch = to_batch(df.take(rows[start:start + batch_rows]))
+        if writer is None:
+            writer = pa.ipc.new_stream(sink, batch.schema)
+        writer.write_batch(batch)
+        yield _drain(sink)
+    writer.close()
+    yield _drain(sink)
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    """Ambil isi buffer lalu kosongkan, agar memori dibatasi satu batch"""
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
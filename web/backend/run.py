@@ -3,6 +3,7 @@
 Script untuk menjalankan backend FastAPI
 """
 
+import argparse
 import subprocess
 import sys
 import os
@@ -17,7 +18,7 @@ def install_requirements():
         print(f"✗ Gagal menginstall dependencies: {e}")
         sys.exit(1)
 
-def run_server():
+def run_server(workers: int = 1):
     """Jalankan server FastAPI"""
     print("Menjalankan server FastAPI...")
     print("Server akan berjalan di: http://localhost:8001")
@@ -25,28 +26,52 @@ def run_server():
     print("Tekan Ctrl+C untuk menghentikan server")
     print("-" * 50)
     
+    command = [
+        sys.executable, "-m", "uvicorn", 
+        "main:app", 
+        "--host", "0.0.0.0", 
+        "--port", "8001",
+    ]
+    env = dict(os.environ)
+    loader = None
+    if workers > 1:
+        # Satu proses loader mem-publish snapshot, worker hanya memory-map (tanpa --reload)
+        print(f"Mode multi-worker: {workers} worker + 1 proses loader snapshot")
+        loader = subprocess.Popen([sys.executable, "snapshot_loader.py"])
+        env["NIKE_SNAPSHOT_MODE"] = "attach"
+        command += ["--workers", str(workers)]
+    else:
+        command.append("--reload")
+    
     try:
-        subprocess.run([
-            sys.executable, "-m", "uvicorn", 
-            "main:app", 
-            "--host", "0.0.0.0", 
-            "--port", "8001",
-            "--reload"
-        ])
+        subprocess.run(command, env=env)
     except KeyboardInterrupt:
         print("\nServer dihentikan")
     except Exception as e:
         print(f"Error: {e}")
+    finally:
+        if loader is not None:
+            loader.terminate()
+            loader.wait()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Jalankan backend Nike Sales Data")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("NIKE_WORKERS", "1")),
+                        help="Jumlah worker uvicorn; >1 memakai snapshot bersama dari proses loader")
+    parser.add_argument("--skip-install", action="store_true", help="Jangan install requirements.txt")
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
+    
     # Pastikan kita berada di direktori yang benar
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
     
     print("=== Nike Sales Data Backend ===")
     
     # Install dependencies jika requirements.txt ada
-    if os.path.exists("requirements.txt"):
+    if os.path.exists("requirements.txt") and not args.skip_install:
         install_requirements()
     
     # Jalankan server
-    run_server()
\ No newline at end of file
+    run_server(args.workers)
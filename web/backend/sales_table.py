@@ -0,0 +1,121 @@
+"""
+Representasi ringkas tabel penjualan setelah preprocessing.
+
+Kolom dimensi disimpan sebagai kategori (kode int8/int16), Year/Month sebagai integer kecil,
+measure di-downcast ke int32/float32 jika tidak ada nilai yang berubah, dan tanggal invoice
+disimpan sebagai offset hari sejak 1970-01-01 (kolom `Invoice Day`, int32).
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+DIMENSION_COLUMNS = ['Product', 'Region', 'Retailer', 'Sales Method', 'State']
+MEASURE_COLUMNS = ['Price per Unit', 'Total Sales', 'Units Sold']
+DAY_COLUMN = 'Invoice Day'
+
+# Kunci filter (frontend / API) -> kolom tabel
+FILTER_DIMENSIONS = {
+    'years': 'Year',
+    'regions': 'Region',
+    'states': 'State',
+    'products': 'Product',
+    'retailers': 'Retailer',
+    'sales_methods': 'Sales Method',
+}
+# Rentang bulan (1-12, inklusif) sebagai bagian dari spesifikasi filter
+MONTH_RANGE_KEYS = ('month_from', 'month_to')
+
+
+def _downcast_measure(series: pd.Series) -> pd.Series:
+    """Downcast ke int32 / float32 hanya jika konversinya lossless"""
+    values = series.to_numpy()
+    if np.issubdtype(values.dtype, np.integer) or (
+        np.issubdtype(values.dtype, np.floating) and np.all(np.mod(values, 1) == 0)
+    ):
+        info = np.iinfo(np.int32)
+        if len(values) == 0 or (values.min() >= info.min and values.max() <= info.max):
+            return series.astype(np.int32)
+    if np.issubdtype(values.dtype, np.floating):
+        as_float32 = values.astype(np.float32)
+        if np.array_equal(as_float32.astype(values.dtype), values):
+            return series.astype(np.float32)
+    return series
+
+
+def compact_sales_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Ubah hasil preprocessing menjadi representasi kolumnar yang ringkas"""
+    df = df.reset_index(drop=True)
+    days = df['Invoice Date'].to_numpy().astype('datetime64[D]').astype(np.int32)
+    df.insert(0, DAY_COLUMN, days)
+    df = df.drop(columns=['Invoice Date'])
+
+    for col in DIMENSION_COLUMNS:
+        df[col] = df[col].astype('category')
+    df['Year'] = df['Year'].astype(np.int16)
+    df['Month'] = df['Month'].astype(np.int8)
+    for col in MEASURE_COLUMNS:
+        df[col] = _downcast_measure(df[col])
+    return df
+
+
+def concat_sales_frames(frames: Sequence[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Gabungkan beberapa tabel ringkas (chunk / batch invoice) tanpa kembali ke object dtype.
+    Kategori digabung lalu diurutkan, sehingga hasilnya sama dengan compact_sales_frame atas
+    seluruh data sekaligus.
+    """
+    frames = [frame for frame in frames if len(frame)] or list(frames[:1])
+    if len(frames) == 1:
+        return frames[0]
+
+    columns: Dict[str, Any] = {}
+    for col in frames[0].columns:
+        parts = [frame[col] for frame in frames]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            columns[col] = union_categoricals(parts, sort_categories=True)
+        else:
+            columns[col] = np.concatenate([part.to_numpy() for part in parts])
+    df = pd.DataFrame(columns)
+    for col in MEASURE_COLUMNS:
+        df[col] = _downcast_measure(df[col])
+    return df
+
+
+def normalize_filter_value(value: Any) -> Any:
+    """Tahun bisa datang sebagai string dari query/JSON; samakan ke int"""
+    if isinstance(value, (np.integer, int)) or (isinstance(value, str) and value.isdigit()):
+        return int(value)
+    return value
+
+
+def filter_months(filters: Optional[Dict[str, Any]]) -> Optional[List[int]]:
+    """Daftar bulan dari month_from/month_to pada filter; None jika tidak dibatasi"""
+    if not filters:
+        return None
+    month_from, month_to = (filters.get(key) for key in MONTH_RANGE_KEYS)
+    if month_from is None and month_to is None:
+        return None
+    return list(range(max(1, int(month_from or 1)), min(12, int(month_to or 12)) + 1))
+
+
+def days_to_dates(days: Iterable[int]) -> np.ndarray:
+    """Offset hari (int) ke array datetime64[D]"""
+    return np.asarray(days, dtype=np.int64).astype('datetime64[D]')
+
+
+def format_days(days: Iterable[int]) -> np.ndarray:
+    """Offset hari ke string 'YYYY-MM-DD' (vectorized)"""
+    return np.datetime_as_string(days_to_dates(days), unit='D')
+
+
+def memory_report(df: pd.DataFrame) -> Dict[str, Any]:
+    """Ukuran tabel di memori (total dan per baris)"""
+    total = int(df.memory_usage(deep=True, index=False).sum())
+    return {
+        'total_bytes': total,
+        'bytes_per_row': round(total / len(df), 2) if len(df) else 0.0,
+        'columns': {col: str(dtype) for col, dtype in df.dtypes.items()},
+    }
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Proses loader untuk deployment multi-worker.
+
+Loader satu-satunya proses yang membaca sumber data: ia membangun snapshot (tabel ringkas,
+cube, bitmap index), menyimpannya ke cache kolumnar, lalu mem-publish versi baru lewat
+pointer CURRENT.json. Worker uvicorn dengan NIKE_SNAPSHOT_MODE=attach hanya memory-map
+snapshot tersebut, sehingga RAM tidak berlipat sesuai jumlah worker.
+
+Dengan --once loader membangun dan mem-publish snapshot sekali lalu keluar. Cache yang
+dihasilkan bisa dikemas bersama deploy sebagai artifact prebuilt: server dengan NIKE_WARMUP
+memuatnya saat startup tanpa parse CSV.
+
+Jalankan: python snapshot_loader.py [--once] (otomatis oleh `python run.py --workers N`)
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+
+from fastapi import HTTPException
+
+from data_processor import CACHE_DIR, DATA_SOURCE, MAX_STALENESS, REFRESH_INTERVAL, NikeDataProcessor
+
+logger = logging.getLogger('snapshot_loader')
+
+
+async def run_loader(processor: NikeDataProcessor):
+    """Refresh dan publish snapshot setiap refresh_interval sampai proses dihentikan"""
+    published_key = None
+    while True:
+        try:
+            snapshot = await processor.refresh()
+            if snapshot.key != published_key:
+                published_key = snapshot.key
+                published = processor.store.read_published()
+                logger.info("Snapshot %s dipublish (versi %s, %d baris)",
+                            snapshot.key, published and published['version'], len(snapshot.df))
+        except HTTPException as e:
+            logger.warning("Gagal memuat snapshot: %s", e.detail)
+        await asyncio.sleep(processor.refresh_interval)
+
+
+async def build_once(processor: NikeDataProcessor) -> bool:
+    """Bangun dan publish snapshot sekali (artifact prebuilt untuk deploy)"""
+    try:
+        snapshot = await processor.refresh()
+    except HTTPException as e:
+        logger.error("Gagal membangun snapshot: %s", e.detail)
+        return False
+    finally:
+        processor.compute.shutdown()
+    logger.info("Snapshot %s (%d baris) dipublish di %s", snapshot.key, len(snapshot.df), processor.store.cache_dir)
+    return True
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bangun dan publish snapshot data Nike")
+    parser.add_argument("--once", action="store_true", help="Publish sekali lalu keluar (artifact prebuilt)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+    loader = NikeDataProcessor(DATA_SOURCE, CACHE_DIR, REFRESH_INTERVAL, MAX_STALENESS, mode='load')
+    if args.once:
+        sys.exit(0 if asyncio.run(build_once(loader)) else 1)
+    try:
+        asyncio.run(run_loader(loader))
+    except KeyboardInterrupt:
+        pass
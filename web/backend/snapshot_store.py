@@ -0,0 +1,204 @@
+"""
+Cache snapshot kolumnar di disk untuk data yang sudah dipreprocessing.
+
+Setiap kolom disimpan sebagai file .npy (kolom kategori/teks sebagai kode + daftar kategori
+di meta.json), sehingga cold start cukup memory-map file tanpa parse CSV ulang.
+
+Agregat turunan (cube, bitmap index, sampel harga vs unit) ikut disimpan di direktori snapshot,
+dan pointer CURRENT.json menandai snapshot yang sedang dipublikasikan beserta nomor versinya. Dengan begitu
+satu proses loader bisa mem-publish snapshot dan beberapa worker uvicorn cukup memory-map
+file yang sama (read-only, dibagi lewat page cache) tanpa parse maupun agregasi ulang.
+"""
+
+import json
+import os
+import shutil
+import time
+import hashlib
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Naikkan jika logika ingest.preprocess_sales atau format penyimpanan berubah
+SNAPSHOT_FORMAT_VERSION = 4
+
+PUBLISHED_POINTER = 'CURRENT.json'
+
+
+def _smallest_code_dtype(n_categories: int) -> np.dtype:
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+class SnapshotStore:
+    """Penyimpanan snapshot kolumnar (.npy) yang dikunci dengan content hash sumber data"""
+
+    def __init__(self, cache_dir: str, keep: int = 3):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.keep = keep
+
+    def snapshot_key(self, content_hash: str) -> str:
+        return hashlib.blake2b(
+            f"{content_hash}:{SNAPSHOT_FORMAT_VERSION}".encode(), digest_size=16
+        ).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, key: str) -> Optional[pd.DataFrame]:
+        """Memory-map snapshot dari disk; None jika belum ada atau rusak"""
+        path = self._path(key)
+        meta_path = os.path.join(path, 'meta.json')
+        if not os.path.exists(meta_path):
+            return None
+
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            # Snapshot yang dipublish versi lama (mis. artifact prebuilt) tidak dipakai
+            if meta.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+                return None
+            columns: Dict[str, Any] = {}
+            for col in meta['columns']:
+                values = np.load(os.path.join(path, col['file']), mmap_mode='r')
+                if col['kind'] == 'category':
+                    dtype = pd.CategoricalDtype(col['categories'])
+                    # Kode ditulis sendiri oleh store() dengan dtype indexer pandas: dipakai langsung
+                    # (tanpa salinan), dan tanpa validasi yang membaca semua halaman mmap saat load
+                    columns[col['name']] = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+                elif col['kind'] == 'string':
+                    # Kode -1 (nilai kosong) jatuh ke elemen terakhir, yaitu None
+                    lookup = np.asarray(col['categories'] + [None], dtype=object)
+                    columns[col['name']] = lookup.take(values)
+                elif col['kind'] == 'datetime':
+                    columns[col['name']] = values.view(col['dtype'])
+                else:
+                    columns[col['name']] = values
+            df = pd.DataFrame(columns, copy=False)
+        except (OSError, ValueError, KeyError):
+            return None
+
+        # Tandai sebagai baru dipakai agar tidak ikut dihapus saat prune
+        os.utime(path)
+        return df
+
+    def store(self, key: str, df: pd.DataFrame):
+        """Tulis snapshot secara atomik (direktori sementara lalu rename)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        final_path = self._path(key)
+        tmp_path = f"{final_path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        meta_columns = []
+        for i, name in enumerate(df.columns):
+            series = df[name]
+            col: Dict[str, Any] = {'name': name, 'file': f"col_{i}.npy"}
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                col['kind'] = 'category'
+                col['categories'] = series.cat.categories.tolist()
+                values = series.cat.codes.to_numpy()
+            elif pd.api.types.is_datetime64_any_dtype(series):
+                col['kind'] = 'datetime'
+                col['dtype'] = str(series.dtype)
+                values = series.to_numpy().view(np.int64)
+            elif pd.api.types.is_numeric_dtype(series):
+                col['kind'] = 'numeric'
+                values = series.to_numpy()
+            else:
+                codes, categories = pd.factorize(series, sort=True)
+                col['kind'] = 'string'
+                col['categories'] = [str(c) for c in categories]
+                values = codes.astype(_smallest_code_dtype(len(categories)))
+            np.save(os.path.join(tmp_path, col['file']), np.ascontiguousarray(values))
+            meta_columns.append(col)
+
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump({
+                'format_version': SNAPSHOT_FORMAT_VERSION,
+                'rows': len(df),
+                'created_at': time.time(),
+                'columns': meta_columns,
+            }, f)
+
+        if os.path.exists(final_path):
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        else:
+            os.replace(tmp_path, final_path)
+        self._prune()
+
+    def store_arrays(self, key: str, name: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+        """Simpan kumpulan array turunan (mis. agregat) di dalam direktori snapshot `key`"""
+        path = os.path.join(self._path(key), name)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        files = {}
+        for i, (array_name, values) in enumerate(arrays.items()):
+            files[array_name] = f"arr_{i}.npy"
+            np.save(os.path.join(tmp_path, files[array_name]), np.ascontiguousarray(values))
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump({'arrays': files, 'meta': meta}, f)
+
+        if os.path.exists(path):
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        else:
+            os.replace(tmp_path, path)
+
+    def load_arrays(self, key: str, name: str) -> Optional[Tuple[Dict[str, np.ndarray], Dict[str, Any]]]:
+        """Memory-map array turunan; None jika belum disimpan atau rusak"""
+        path = os.path.join(self._path(key), name)
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                saved = json.load(f)
+            arrays = {
+                array_name: np.load(os.path.join(path, file), mmap_mode='r')
+                for array_name, file in saved['arrays'].items()
+            }
+        except (OSError, ValueError, KeyError):
+            return None
+        return arrays, saved['meta']
+
+    def has_arrays(self, key: str, name: str) -> bool:
+        return os.path.exists(os.path.join(self._path(key), name, 'meta.json'))
+
+    def publish(self, key: str, parts: Optional[Dict[str, str]] = None) -> int:
+        """
+        Jadikan snapshot `key` versi terbaru untuk worker lain; versi naik jika key berubah.
+        `parts` (hash per file sumber) ikut disimpan agar snapshot yang dimuat dari pointer ini
+        tetap bisa di-append batch invoice baru.
+        """
+        published = self.read_published()
+        if published is not None and published['key'] == key:
+            return published['version']
+        version = (published['version'] + 1) if published else 1
+        pointer_path = os.path.join(self.cache_dir, PUBLISHED_POINTER)
+        tmp_path = f"{pointer_path}.tmp-{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump({'key': key, 'version': version, 'published_at': time.time(), 'parts': parts or {}}, f)
+        os.replace(tmp_path, pointer_path)
+        os.utime(self._path(key))
+        return version
+
+    def read_published(self) -> Optional[Dict[str, Any]]:
+        """Pointer snapshot yang sedang dipublikasikan: {'key', 'version', 'published_at', 'parts'}"""
+        try:
+            with open(os.path.join(self.cache_dir, PUBLISHED_POINTER)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _prune(self):
+        """Hapus snapshot lama, simpan `keep` snapshot yang terakhir dipakai"""
+        entries = [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if os.path.isdir(os.path.join(self.cache_dir, name)) and '.tmp-' not in name
+        ]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for path in entries[self.keep:]:
+            shutil.rmtree(path, ignore_errors=True)
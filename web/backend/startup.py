@@ -0,0 +1,62 @@
+"""
+Pengukuran cold start satu proses backend.
+
+Mencatat durasi import modul aplikasi, warm-up snapshot saat startup (sebelum uvicorn menerima
+traffic) dan request pertama setelah proses hidup. Hasilnya dilaporkan di /health dan sebagai
+gauge di /metrics, sehingga dampak deploy (autoscaling / serverless) bisa dipantau.
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+# Probe health/metrics tidak dihitung sebagai request pertama
+PROBE_PATHS = ('/health', '/metrics')
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+class StartupTimings:
+    """Durasi import, warm-up dan request pertama relatif terhadap awal import (perf_counter)"""
+
+    def __init__(self, started: float):
+        self.started = started
+        self.import_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        # 'artifact' (snapshot prebuilt di cache), 'source' (ingestion penuh) atau None
+        self.warmup_source: Optional[str] = None
+        self.first_request: Optional[Dict[str, Any]] = None
+
+    def imported(self):
+        self.import_seconds = time.perf_counter() - self.started
+
+    def warmed_up(self, source: Optional[str], seconds: float):
+        self.warmup_source = source
+        self.warmup_seconds = seconds
+
+    def request_finished(self, scope: Dict[str, Any], route: str, status: int, elapsed: float):
+        """Callback MetricsMiddleware: catat request pertama (selain probe)"""
+        if self.first_request is not None or scope['path'] in PROBE_PATHS:
+            return
+        self.first_request = {
+            'path': scope['path'],
+            'route': route,
+            'status': status,
+            'duration_seconds': elapsed,
+            'since_start_seconds': time.perf_counter() - self.started,
+        }
+
+    def report(self) -> Dict[str, Any]:
+        first = self.first_request
+        return {
+            'import_ms': _ms(self.import_seconds),
+            'warmup_ms': _ms(self.warmup_seconds),
+            'warmup_source': self.warmup_source,
+            'first_request': None if first is None else {
+                'path': first['path'],
+                'status': first['status'],
+                'duration_ms': _ms(first['duration_seconds']),
+                'since_start_ms': _ms(first['since_start_seconds']),
+            },
+        }
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Generator data penjualan sintetis dengan bentuk yang sama seperti Nike Dataset.csv.
+
+Kolom, format tanggal (dd-mm-YYYY), BOM di header, kategori produk/retailer/metode penjualan dan
+pemetaan state -> region mengikuti dataset asli; proporsi kategori dan sebaran harga/unit
+didekati dari statistik dataset asli. Data ditulis per chunk dengan seed per chunk, sehingga
+file puluhan juta baris bisa dibuat dengan memori tetap dan hasilnya selalu sama untuk
+(rows, seed, chunk_rows) yang sama.
+
+Jalankan: python synthetic_data.py 1000000 data/nike-1m.csv [--seed 7]
+"""
+
+import argparse
+import os
+from typing import Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ingest import REQUIRED_COLUMNS
+
+DEFAULT_SEED = 20240601
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+PRODUCTS = ["Men's Street Footwear", "Men's Athletic Footwear", "Men's Apparel",
+            "Women's Street Footwear", "Women's Athletic Footwear", "Women's Apparel"]
+# Rata-rata harga per produk pada dataset asli
+PRODUCT_PRICE_MEAN = np.array([44.2, 43.8, 49.9, 40.3, 41.1, 51.1])
+PRICE_STD = 13.5
+PRICE_RANGE = (7, 110)
+
+RETAILERS = ['Foot Locker', 'West Gear', 'Sports Direct', "Kohl's", 'Amazon', 'Walmart']
+RETAILER_WEIGHTS = np.array([0.272, 0.254, 0.214, 0.110, 0.088, 0.062])
+
+SALES_METHODS = ['Online', 'Outlet', 'In-store']
+SALES_METHOD_WEIGHTS = np.array([0.507, 0.307, 0.186])
+# Rata-rata unit terjual per metode penjualan pada dataset asli
+SALES_METHOD_UNITS_MEAN = np.array([19.6, 27.7, 39.9])
+UNITS_MAX = 128
+
+# State -> (region, bobot relatif jumlah baris) seperti di dataset asli
+STATE_REGIONS = {
+    'Alabama': ('South', 3), 'Arizona': ('West', 3), 'Arkansas': ('South', 3),
+    'California': ('West', 6), 'Colorado': ('West', 2), 'Connecticut': ('Northeast', 3),
+    'Delaware': ('Northeast', 2), 'Florida': ('Southeast', 5), 'Georgia': ('Southeast', 3),
+    'Idaho': ('West', 3), 'Illinois': ('Midwest', 2), 'Indiana': ('Midwest', 2),
+    'Iowa': ('Midwest', 2), 'Kansas': ('Midwest', 2), 'Kentucky': ('Southeast', 2),
+    'Louisiana': ('South', 3), 'Maine': ('Northeast', 2), 'Maryland': ('Northeast', 2),
+    'Massachusetts': ('Northeast', 3), 'Michigan': ('Midwest', 2), 'Minnesota': ('Midwest', 2),
+    'Mississippi': ('South', 3), 'Missouri': ('Midwest', 2), 'Montana': ('Midwest', 2),
+    'Nebraska': ('Midwest', 2), 'Nevada': ('West', 3), 'New Hampshire': ('Northeast', 3),
+    'New Jersey': ('Northeast', 2), 'New Mexico': ('West', 3), 'New York': ('Northeast', 5),
+    'North Carolina': ('Southeast', 2), 'North Dakota': ('Midwest', 2), 'Ohio': ('Midwest', 2),
+    'Oklahoma': ('South', 3), 'Oregon': ('West', 3), 'Pennsylvania': ('Northeast', 3),
+    'Rhode Island': ('Northeast', 3), 'South Carolina': ('Southeast', 2), 'South Dakota': ('Midwest', 2),
+    'Tennessee': ('South', 3), 'Texas': ('South', 6), 'Utah': ('West', 3),
+    'Vermont': ('Northeast', 3), 'Virginia': ('Southeast', 3), 'Washington': ('West', 2),
+    'West Virginia': ('Northeast', 2), 'Wisconsin': ('Midwest', 2), 'Wyoming': ('West', 2),
+}
+STATES = list(STATE_REGIONS)
+STATE_WEIGHTS = np.array([weight for _, weight in STATE_REGIONS.values()], dtype=float)
+STATE_WEIGHTS /= STATE_WEIGHTS.sum()
+REGIONS = sorted({region for region, _ in STATE_REGIONS.values()})
+_STATE_REGION_CODES = np.array([REGIONS.index(STATE_REGIONS[state][0]) for state in STATES])
+
+# Rentang tanggal invoice; tahun pertama lebih jarang seperti dataset asli (2020: ~14% baris)
+DATE_START = '2020-01-01'
+DATE_END = '2021-12-31'
+FIRST_YEAR_SHARE = 0.14
+
+# Sebagian besar Total Sales di dataset asli ~10% dari harga x unit, sisanya ~harga x unit
+TOTAL_SALES_TENTH_SHARE = 0.59
+
+
+def _day_weights(days: pd.DatetimeIndex) -> np.ndarray:
+    first_year = days.year == days[0].year
+    if first_year.all():
+        return np.full(len(days), 1.0 / len(days))
+    weights = np.where(first_year, FIRST_YEAR_SHARE / first_year.sum(),
+                       (1 - FIRST_YEAR_SHARE) / (~first_year).sum())
+    return weights / weights.sum()
+
+
+def generate_frame(rows: int, seed: int = DEFAULT_SEED, chunk: int = 0,
+                   date_start: str = DATE_START, date_end: str = DATE_END) -> pd.DataFrame:
+    """Satu chunk data sintetis (kolom sama seperti CSV asli, dimensi sebagai kategori)"""
+    rng = np.random.default_rng([seed, chunk])
+    days = pd.date_range(date_start, date_end, freq='D')
+
+    product = rng.integers(0, len(PRODUCTS), rows)
+    state = rng.choice(len(STATES), rows, p=STATE_WEIGHTS)
+    retailer = rng.choice(len(RETAILERS), rows, p=RETAILER_WEIGHTS)
+    method = rng.choice(len(SALES_METHODS), rows, p=SALES_METHOD_WEIGHTS)
+    day = rng.choice(len(days), rows, p=_day_weights(days))
+
+    price = np.clip(np.rint(rng.normal(PRODUCT_PRICE_MEAN[product], PRICE_STD)), *PRICE_RANGE)
+    # Gamma (shape 3) memberi ekor kanan seperti distribusi unit asli
+    units = np.clip(np.rint(rng.gamma(3.0, SALES_METHOD_UNITS_MEAN[method] / 3.0)), 0, UNITS_MAX)
+    factor = np.where(rng.random(rows) < TOTAL_SALES_TENTH_SHARE,
+                      rng.uniform(0.09, 0.11, rows), rng.uniform(0.96, 1.0, rows))
+    total = np.rint(price * units * factor)
+
+    date_labels = days.strftime('%d-%m-%Y')
+    return pd.DataFrame({
+        'Invoice Date': pd.Categorical.from_codes(day, categories=date_labels),
+        'Product': pd.Categorical.from_codes(product, categories=PRODUCTS),
+        'Region': pd.Categorical.from_codes(_STATE_REGION_CODES[state], categories=REGIONS),
+        'Retailer': pd.Categorical.from_codes(retailer, categories=RETAILERS),
+        'Sales Method': pd.Categorical.from_codes(method, categories=SALES_METHODS),
+        'State': pd.Categorical.from_codes(state, categories=STATES),
+        'Price per Unit': price.astype(np.int32),
+        'Total Sales': total.astype(np.int64),
+        'Units Sold': units.astype(np.int32),
+    }, columns=REQUIRED_COLUMNS)
+
+
+def iter_frames(rows: int, seed: int = DEFAULT_SEED,
+                chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[Tuple[int, pd.DataFrame]]:
+    """(indeks chunk, frame) sampai total `rows` baris"""
+    chunk_rows = max(chunk_rows, 1)
+    for chunk, start in enumerate(range(0, rows, chunk_rows)):
+        yield chunk, generate_frame(min(chunk_rows, rows - start), seed, chunk)
+
+
+def write_csv(path: str, rows: int, seed: int = DEFAULT_SEED, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> int:
+    """Tulis CSV sintetis (atomik: file sementara lalu rename); kembalikan ukuran file dalam bytes"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        # BOM seperti file asli (dibaca dengan encoding utf-8-sig)
+        f.write('\ufeff')
+        for chunk, frame in iter_frames(rows, seed, chunk_rows):
+            frame.to_csv(f, index=False, header=(chunk == 0), lineterminator='\n')
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def parse_rows(value: str) -> int:
+    """Jumlah baris dengan sufiks opsional: 10k, 2.5m, 50M"""
+    value = value.strip().lower().replace('_', '')
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(value[-1:], 1)
+    if multiplier != 1:
+        value = value[:-1]
+    return int(float(value) * multiplier)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Buat CSV penjualan Nike sintetis")
+    parser.add_argument("rows", type=parse_rows, help="Jumlah baris, mis. 10k, 1m, 50m")
+    parser.add_argument("output", help="Path file CSV keluaran")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed generator")
+    parser.add_argument("--chunk-rows", type=parse_rows, default=DEFAULT_CHUNK_ROWS,
+                        help="Jumlah baris per chunk yang dibuat di memori")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    size = write_csv(args.output, args.rows, args.seed, args.chunk_rows)
+    print(f"{args.rows} baris ditulis ke {args.output} ({size / 1024 / 1024:.1f} MB)")
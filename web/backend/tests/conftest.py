@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modul backend berupa file datar di direktori induk
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
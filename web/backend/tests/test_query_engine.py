@@ -0,0 +1,200 @@
+"""SalesCube hasil merge dan query /query: plan cube = plan scan = rebuild penuh, top-K dan validasi body"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregate_cube import CUBE_DIMENSIONS, SalesCube
+from data_processor import DataSnapshot
+from ingest import preprocess_sales
+from query_engine import (DEFAULT_METRICS, MAX_QUERY_LIMIT, QueryError, _sort_keys, _top_groups, parse_query,
+                          run_query)
+from sales_table import concat_sales_frames
+from synthetic_data import generate_frame
+
+ROWS = 20000
+METRICS = ['sum:Total Sales', 'sum:Units Sold', 'mean:Price per Unit', 'count', 'weighted_price',
+           'min:Total Sales', 'max:Total Sales', 'min:Units Sold', 'max:Units Sold',
+           'min:Price per Unit', 'max:Price per Unit']
+QUERIES = [
+    {'group_by': []},
+    {'group_by': ['Retailer']},
+    {'group_by': ['Year', 'Month']},
+    {'group_by': ['Region', 'Sales Method'], 'valid_only': True},
+    {'group_by': ['State', 'Product'], 'filters': {'retailers': ["Kohl's", 'Amazon']}},
+    {'group_by': ['Month'], 'filters': {'years': [2021], 'month_from': 3, 'month_to': 8}},
+    {'group_by': ['Product'], 'filters': {'regions': ['West']}, 'valid_only': True},
+]
+
+
+def _batch(rows: int, chunk: int, date_start: str, date_end: str) -> pd.DataFrame:
+    frame = generate_frame(rows, chunk=chunk, date_start=date_start, date_end=date_end)
+    frame['Invoice Date'] = frame['Invoice Date'].astype(str)
+    return preprocess_sales(frame)
+
+
+@pytest.fixture(scope='module')
+def batches():
+    # Batch kedua berisi tahun baru: kategori Year berbeda sehingga kode sel harus dipetakan ulang
+    return (_batch(ROWS, 0, '2020-01-01', '2020-12-31'),
+            _batch(ROWS // 4, 1, '2021-01-01', '2021-06-30'))
+
+
+@pytest.fixture(scope='module')
+def full(batches):
+    return DataSnapshot(concat_sales_frames(list(batches)), 'full', 1)
+
+
+@pytest.fixture(scope='module')
+def appended(batches):
+    first, second = batches
+    return DataSnapshot(first, 'first', 1).appended(second, 'appended', 2, {})
+
+
+def cube_cells(cube: SalesCube) -> pd.DataFrame:
+    """Sel cube sebagai tabel berlabel, terurut menurut dimensi (urutan sel / kode bisa berbeda)"""
+    data = {dim: cube.categories[dim][cube.codes[dim]] for dim in CUBE_DIMENSIONS}
+    data['valid'] = cube.valid
+    data.update(cube.measures)
+    data.update({f'moment:{name}': values for name, values in cube.moments.items()})
+    data.update(cube.extremes)
+    data['day_min'], data['day_max'] = cube.day_min, cube.day_max
+    return pd.DataFrame(data).sort_values(CUBE_DIMENSIONS + ['valid']).reset_index(drop=True)
+
+
+def assert_same_rows(actual, expected):
+    assert len(actual) == len(expected)
+    for got, want in zip(actual, expected):
+        assert got.keys() == want.keys()
+        for name, value in want.items():
+            if isinstance(value, float):
+                assert got[name] == pytest.approx(value, rel=1e-9), name
+            else:
+                assert got[name] == value, name
+
+
+def test_merged_cube_matches_rebuild(full, appended):
+    merged, rebuilt = appended.cube, full.cube
+    pd.testing.assert_frame_equal(cube_cells(merged), cube_cells(rebuilt), check_exact=False, rtol=1e-9)
+    assert merged.row_count == rebuilt.row_count
+    assert (merged.date_min, merged.date_max) == (rebuilt.date_min, rebuilt.date_max)
+    assert merged.state_region == rebuilt.state_region
+    assert merged.measure_dtypes == rebuilt.measure_dtypes
+
+
+@pytest.mark.parametrize('query', QUERIES)
+@pytest.mark.parametrize('name', ['full', 'appended'])
+def test_cube_plan_matches_scan(request, name, query):
+    snapshot = request.getfixturevalue(name)
+    cube = run_query(snapshot, metrics=METRICS, plan='cube', **query)
+    scan = run_query(snapshot, metrics=METRICS, plan='scan', **query)
+    assert cube['plan']['plan'] == 'cube' and scan['plan']['plan'] == 'scan'
+    assert cube['total_groups'] == scan['total_groups'] > 0
+    assert_same_rows(cube['rows'], scan['rows'])
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_appended_snapshot_matches_rebuild(full, appended, query):
+    assert_same_rows(run_query(appended, metrics=METRICS, plan='cube', **query)['rows'],
+                     run_query(full, metrics=METRICS, plan='cube', **query)['rows'])
+
+
+def test_scan_matches_groupby(full):
+    df = full.df
+    result = run_query(full, ['Retailer'], ['sum:Total Sales', 'min:Price per Unit', 'max:Units Sold', 'count'],
+                       plan='scan')
+    expected = df.groupby('Retailer', observed=True).agg(
+        sales=('Total Sales', 'sum'), price=('Price per Unit', 'min'),
+        units=('Units Sold', 'max'), count=('Total Sales', 'size'))
+    for row in result['rows']:
+        want = expected.loc[row['Retailer']]
+        assert (row['sum:Total Sales'], row['min:Price per Unit'], row['max:Units Sold'], row['count']) == \
+            tuple(int(v) for v in want)
+
+
+@pytest.mark.parametrize('limit', [1, 3, 10, 57, 200])
+def test_top_groups_matches_full_sort(limit):
+    rng = np.random.default_rng(limit)
+    # Nilai kecil -> banyak grup seri di kunci utama; inf meniru NaN yang dipindah ke akhir
+    primary = rng.integers(0, 8, 200).astype(np.float64)
+    primary[rng.random(200) < 0.1] = np.inf
+    keys = [primary, rng.integers(0, 3, 200).astype(np.float64), np.arange(200, dtype=np.float64)[::-1]]
+    expected = np.lexsort(keys[::-1])[:limit]
+    np.testing.assert_array_equal(_top_groups(keys, 200, limit), expected)
+
+
+def test_top_groups_ties_keep_group_order():
+    keys = [np.array([1.0, 0.0, 1.0, 0.0, 1.0])]
+    np.testing.assert_array_equal(_top_groups(keys, 5, 3), [1, 3, 0])
+    np.testing.assert_array_equal(_top_groups(keys, 5, None), [1, 3, 0, 2, 4])
+
+
+def test_sort_keys_put_nan_last_in_both_directions():
+    labels = {'Retailer': np.array(['A', 'B', 'C'], dtype=object)}
+    values = {'weighted_price': np.array([2.0, np.nan, 5.0])}
+    for order_by, expected in ((['weighted_price'], [0, 2, 1]), (['-weighted_price'], [2, 0, 1])):
+        spec = {'order_by': order_by, 'group_by': ['Retailer']}
+        np.testing.assert_array_equal(_top_groups(_sort_keys(spec, labels, values), 3, None), expected)
+
+
+@pytest.mark.parametrize('order_by', [['-count'], ['count'], ['-sum:Total Sales'], ['-State'], ['max:Units Sold']])
+@pytest.mark.parametrize('plan', ['cube', 'scan'])
+def test_limit_is_prefix_of_full_order(full, order_by, plan):
+    query = {'group_by': ['State', 'Sales Method'], 'metrics': ['count', 'sum:Total Sales', 'max:Units Sold'],
+             'order_by': order_by, 'plan': plan}
+    everything = run_query(full, **query)['rows']
+    for limit in (1, 5, 40):
+        assert run_query(full, limit=limit, **query)['rows'] == everything[:limit]
+
+    # Urutan: kunci order_by, lalu dimensi group-by menaik sebagai tie-breaker
+    name = order_by[0].lstrip('-')
+    sign = -1 if order_by[0].startswith('-') else 1
+    if name in query['group_by']:
+        expected = sorted(everything, key=lambda row: row['State'], reverse=sign < 0)
+    else:
+        expected = sorted(everything, key=lambda row: (sign * row[name], row['State'], row['Sales Method']))
+    assert everything == expected
+
+
+def test_parse_query_normalizes_aliases():
+    query = parse_query({'group_by': 'retailer', 'metrics': ['sum:sales', 'count', 'sum:Total Sales'],
+                         'order_by': ['-sum:sales', 'retailer'],
+                         'filters': {'states': [], 'years': [2021], 'month_from': None}, 'limit': 5})
+    assert query == {
+        'group_by': ['Retailer'], 'metrics': ['sum:Total Sales', 'count'],
+        'filters': {'years': [2021]}, 'order_by': ['-sum:Total Sales', 'Retailer'],
+        'limit': 5, 'valid_only': False, 'plan': 'auto',
+    }
+    assert parse_query({})['metrics'] == DEFAULT_METRICS
+    assert parse_query({'filters': {'states': []}})['filters'] is None
+
+
+@pytest.mark.parametrize('body', [
+    {'unknown': 1},
+    {'group_by': 'city'},
+    {'group_by': ['year', 'Year']},
+    {'group_by': 5},
+    {'metrics': ['median:sales']},
+    {'metrics': ['sum:Invoice Date']},
+    {'metrics': [{'sum': 'sales'}]},
+    {'order_by': ['-region']},
+    {'order_by': ['sum:units']},
+    {'limit': 0},
+    {'limit': MAX_QUERY_LIMIT + 1},
+    {'limit': '10'},
+    {'limit': True},
+    {'plan': 'index'},
+    {'group_by': 'date', 'plan': 'cube'},
+    {'filters': ['retailers']},
+    {'filters': {'cities': ['Paris']}},
+    {'filters': {'retailers': "Kohl's"}},
+    {'filters': {'retailers': [["Kohl's"]]}},
+    {'filters': {'years': [2021.0]}},
+    {'filters': {'years': [True]}},
+    {'filters': {'month_from': 0}},
+    {'filters': {'month_to': 13}},
+    {'filters': {'month_from': '3'}},
+])
+def test_parse_query_rejects_invalid_body(body):
+    with pytest.raises(QueryError):
+        parse_query(body)
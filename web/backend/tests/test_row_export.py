@@ -0,0 +1,34 @@
+"""Cursor keyset /filtered-data: hanya cursor dari snapshot yang sama dan posisi baris di dalam tabel"""
+
+import base64
+import json
+
+import pytest
+
+from row_export import CursorError, decode_cursor, encode_cursor
+
+KEY = '0123456789abcdef0123456789abcdef'
+
+
+def raw_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('row', [-1, 0, 41, 99])
+def test_round_trip(row):
+    assert decode_cursor(encode_cursor(KEY, row), KEY, 100) == row
+
+
+@pytest.mark.parametrize('row', [-2, -10**9, 100, 10**12])
+def test_rejects_rows_outside_table(row):
+    with pytest.raises(CursorError):
+        decode_cursor(encode_cursor(KEY, row), KEY, 100)
+
+
+@pytest.mark.parametrize('cursor', [
+    'not-base64!', raw_cursor([1, 2]), raw_cursor({'s': KEY[:16]}), raw_cursor({'s': KEY[:16], 'r': 'x'}),
+    encode_cursor('f' * 32, 5),
+])
+def test_rejects_malformed_or_foreign_cursor(cursor):
+    with pytest.raises(CursorError):
+        decode_cursor(cursor, KEY, 100)
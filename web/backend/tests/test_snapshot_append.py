@@ -0,0 +1,127 @@
+"""Append batch invoice baru ke snapshot lama harus sama dengan membangun ulang seluruh snapshot"""
+
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregate_cube import CUBE_DIMENSIONS
+from bitmap_index import INDEX_COLUMNS
+from data_processor import SNAPSHOT_LOADS, NikeDataProcessor
+from synthetic_data import write_csv
+
+FILTERS = [
+    {'retailers': ["Kohl's", 'Amazon']},
+    {'years': [2021], 'month_from': 2, 'month_to': 5},
+    {'states': ['Texas', 'Ohio'], 'sales_methods': ['Online']},
+    {'regions': ['West'], 'products': ["Men's Apparel"]},
+]
+
+
+def loads(source: str) -> float:
+    """Nilai counter nike_snapshot_loads_total untuk satu asal snapshot"""
+    for line in SNAPSHOT_LOADS.render():
+        match = re.fullmatch(r'\S+\{source="(\w+)"\} (\S+)', line)
+        if match and match.group(1) == source:
+            return float(match.group(2))
+    return 0.0
+
+
+def make_processor(source_dir, cache_dir) -> NikeDataProcessor:
+    processor = NikeDataProcessor(source_spec=str(source_dir), cache_dir=str(cache_dir))
+    # File uji kecil: parse di proses ini, tanpa membuka process pool
+    processor.ingestor.workers = 1
+    return processor
+
+
+@pytest.fixture(scope='module')
+def snapshots(tmp_path_factory):
+    source_dir = tmp_path_factory.mktemp('invoices')
+    write_csv(str(source_dir / 'a.csv'), 3000, seed=1)
+    write_csv(str(source_dir / 'b.csv'), 2000, seed=2)
+    processor = make_processor(source_dir, tmp_path_factory.mktemp('cache'))
+    first = processor._load_snapshot(None, 1)
+
+    # File baru ditambahkan, file lama tidak berubah -> hanya c.csv yang di-ingest
+    write_csv(str(source_dir / 'c.csv'), 1500, seed=3)
+    content = processor.source.fetch()
+    assert NikeDataProcessor._appended_parts(first, content.part_hashes) == ['c.csv']
+    before = loads('append')
+    appended = processor._load_snapshot(first, 2)
+    assert loads('append') == before + 1
+
+    rebuild = make_processor(source_dir, tmp_path_factory.mktemp('cache-rebuild'))
+    before = loads('ingest')
+    full = rebuild._load_snapshot(None, 1)
+    assert loads('ingest') == before + 1
+    yield first, appended, full
+    for p in (processor, rebuild):
+        p.compute.shutdown()
+        p.executor.shutdown()
+
+
+def test_appended_parts_requires_unchanged_files(snapshots):
+    first, appended, _ = snapshots
+    assert NikeDataProcessor._appended_parts(first, dict(first.parts)) == []
+    assert NikeDataProcessor._appended_parts(first, {**appended.parts, 'a.csv': 'changed'}) == []
+    assert NikeDataProcessor._appended_parts(None, appended.parts) == []
+    assert set(appended.parts) == {'a.csv', 'b.csv', 'c.csv'}
+
+
+def test_table_matches_rebuild(snapshots):
+    _, appended, full = snapshots
+    pd.testing.assert_frame_equal(appended.df, full.df)
+
+
+def test_cube_matches_rebuild(snapshots):
+    _, appended, full = snapshots
+
+    def cells(cube) -> pd.DataFrame:
+        data = {dim: cube.categories[dim][cube.codes[dim]] for dim in CUBE_DIMENSIONS}
+        data['valid'] = cube.valid
+        data.update(cube.measures)
+        data.update({f'moment:{name}': values for name, values in cube.moments.items()})
+        data.update(cube.extremes)
+        data['day_min'], data['day_max'] = cube.day_min, cube.day_max
+        return pd.DataFrame(data).sort_values(CUBE_DIMENSIONS + ['valid']).reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(cells(appended.cube), cells(full.cube), check_exact=False, rtol=1e-9)
+    for name in ('row_count', 'date_min', 'date_max', 'state_region', 'measure_dtypes', 'na_codes'):
+        assert getattr(appended.cube, name) == getattr(full.cube, name), name
+
+
+def test_index_matches_rebuild(snapshots):
+    _, appended, full = snapshots
+    assert (appended.index.row_count, appended.index.n_words) == (full.index.row_count, full.index.n_words)
+    for column in INDEX_COLUMNS:
+        merged, rebuilt = appended.index.bitmaps[column], full.index.bitmaps[column]
+        assert set(merged) == set(rebuilt), column
+        for value, bits in rebuilt.items():
+            np.testing.assert_array_equal(merged[value], bits, err_msg=f'{column}={value}')
+    for filters in FILTERS:
+        np.testing.assert_array_equal(appended.index.rows(appended.index.filter(filters)),
+                                      full.index.rows(full.index.filter(filters)))
+
+
+def test_sample_matches_rebuild(snapshots):
+    _, appended, full = snapshots
+    merged, rebuilt = appended.sample, full.sample
+    assert merged.row_count == rebuilt.row_count
+    assert (merged.price_range, merged.units_range) == (rebuilt.price_range, rebuilt.units_range)
+    np.testing.assert_array_equal(merged.rows, rebuilt.rows)
+    np.testing.assert_array_equal(merged.categories[merged.strata], rebuilt.categories[rebuilt.strata])
+    for field, values in rebuilt.columns.items():
+        np.testing.assert_array_equal(merged.columns[field], values, err_msg=field)
+
+
+def test_series_matches_rebuild(snapshots):
+    _, appended, full = snapshots
+    merged, rebuilt = appended.series, full.series
+    assert (merged.day_start, merged.n_days) == (rebuilt.day_start, rebuilt.n_days)
+    assert merged.categories.keys() == rebuilt.categories.keys()
+    for dim, categories in rebuilt.categories.items():
+        assert list(merged.categories[dim]) == list(categories), dim
+        for name, prefix in rebuilt.prefix[dim].items():
+            np.testing.assert_allclose(merged.prefix[dim][name], prefix, rtol=1e-9, err_msg=f'{dim}:{name}')
+            assert merged.prefix[dim][name].dtype == prefix.dtype, f'{dim}:{name}'
@@ -46,6 +46,9 @@ class NikeDashboard {
             // Or use hardcoded backend URL
             // this.apiBaseUrl = 'https://your-backend-url.com';
         }
+        // Static export of the dashboard views (backend/export_static.py), served by server.js / CDN
+        this.staticDataUrl = 'static-data';
+        this.staticManifest = null;
         this.charts = {};
         this.zoomChart = null;
         this.filters = {
@@ -68,6 +71,7 @@ class NikeDashboard {
         this.showLoading();
         
         try {
+            await this.loadStaticManifest();
             await this.loadFilterOptions();
             await this.loadDashboardData();
             this.updateLastUpdated();
@@ -203,7 +207,7 @@ class NikeDashboard {
         try {
             console.log('Loading filter options...');
             // Load summary data to get available filter options
-            const summaryResponse = await this.fetchData('/summary');
+            const summaryResponse = await this.fetchView('summary');
             console.log('Summary data loaded:', summaryResponse);
             
             // Populate year filter
@@ -221,9 +225,9 @@ class NikeDashboard {
 
             // Load region, product, and retailer options from other endpoints
             const [regionData, topProductsData, retailerData] = await Promise.all([
-                this.fetchData('/region-distribution'),
-                this.fetchData('/top-products'),
-                this.fetchData('/retailer-analysis')
+                this.fetchView('region-distribution'),
+                this.fetchView('top-products'),
+                this.fetchView('retailer-analysis')
             ]);
 
             // Populate region filter
@@ -267,72 +271,134 @@ class NikeDashboard {
 
     async loadDashboardData() {
         try {
-            // Check if filters are applied
+            // Filters are applied server-side; every view comes from one batch request
             const hasFilters = Object.values(this.filters).some(filter => filter.length > 0);
             console.log('Loading dashboard data. Filters applied:', hasFilters, this.filters);
-            
-            if (hasFilters) {
-                // Use filtered data endpoint when filters are applied
-                const filteredData = await this.fetchData('/filtered-data', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify(this.filters)
-                });
-                
-                // Update summary with filtered data
-                this.renderSummaryCards({
-                    total_records: filteredData.total_records,
-                    total_sales: filteredData.filtered_data.reduce((sum, item) => sum + (item['Total Sales'] || 0), 0),
-                    total_units: filteredData.filtered_data.reduce((sum, item) => sum + (item['Units Sold'] || 0), 0),
-                    avg_price_per_unit: filteredData.filtered_data.reduce((sum, item) => sum + (item['Price per Unit'] || 0), 0) / filteredData.filtered_data.length,
-                    unique_products: new Set(filteredData.filtered_data.map(item => item.Product)).size,
-                    unique_regions: new Set(filteredData.filtered_data.map(item => item.Region)).size
-                });
-                
-                // Process filtered data for charts
-                this.renderFilteredCharts(filteredData.filtered_data);
-                
-            } else {
-                // Load all chart data in parallel when no filters
-                const [
-                    summaryData,
-                    monthlyTrendsData,
-                    topProductsData,
-                    regionData,
-                    priceCorrelationData,
-                    stateData,
-                    salesMethodData,
-                    retailerData
-                ] = await Promise.all([
-                    this.fetchData('/summary'),
-                    this.fetchData('/monthly-trends'),
-                    this.fetchData('/top-products'),
-                    this.fetchData('/region-distribution'),
-                    this.fetchData('/price-correlation'),
-                    this.fetchData('/state-analysis'),
-                    this.fetchData('/sales-method-analysis'),
-                    this.fetchData('/retailer-analysis')
-                ]);
-
-                // Render all charts with full data
-                this.renderSummaryCards(summaryData);
-                this.renderMonthlyTrendsChart(monthlyTrendsData);
-                this.renderTopProductsChart(topProductsData);
-                this.renderRegionDistributionChart(regionData);
-                this.renderPriceCorrelationChart(priceCorrelationData);
-                this.renderStateAnalysisChart(stateData);
-                this.renderSalesMethodChart(salesMethodData);
-                this.renderRetailerPerformanceChart(retailerData);
+
+            const views = {
+                'summary': {},
+                'monthly-trends': {},
+                'top-products': {},
+                'region-distribution': {},
+                // Stratified sample: every product stays visible in the scatter plot
+                'price-correlation': { mode: 'stratified', points: 600 },
+                'state-analysis': {},
+                'sales-method-analysis': {},
+                'retailer-analysis': {}
+            };
+            const filters = hasFilters ? this.filters : null;
+
+            // Exported filter combinations are served from static files; anything else goes to the backend
+            const dashboardData = await this.fetchStaticViews(views, filters) || await this.fetchData('/dashboard', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ views, filters })
+            });
+            const summaryData = dashboardData['summary'];
+            const monthlyTrendsData = dashboardData['monthly-trends'];
+            const topProductsData = dashboardData['top-products'];
+            const regionData = dashboardData['region-distribution'];
+            const priceCorrelationData = dashboardData['price-correlation'];
+            const stateData = dashboardData['state-analysis'];
+            const salesMethodData = dashboardData['sales-method-analysis'];
+            const retailerData = dashboardData['retailer-analysis'];
+
+            this.renderSummaryCards(summaryData);
+            if (hasFilters && summaryData.total_records === 0) {
+                console.log('No data found for filters, showing empty charts with zero values');
+                this.renderEmptyCharts();
+                return;
             }
 
+            this.renderMonthlyTrendsChart(monthlyTrendsData);
+            this.renderTopProductsChart(topProductsData);
+            this.renderRegionDistributionChart(regionData);
+            this.renderPriceCorrelationChart(priceCorrelationData);
+            this.renderStateAnalysisChart(stateData);
+            this.renderSalesMethodChart(salesMethodData);
+            this.renderRetailerPerformanceChart(retailerData);
+
         } catch (error) {
             console.error('Error loading dashboard data:', error);
             this.showError('Failed to load dashboard data');
         }
     }
 
+    async loadStaticManifest() {
+        try {
+            const response = await fetch(`${this.staticDataUrl}/manifest.json`, { cache: 'no-cache' });
+            this.staticManifest = response.ok ? await response.json() : null;
+        } catch (error) {
+            this.staticManifest = null;
+        }
+        if (this.staticManifest) {
+            console.log(`Static export loaded: ${Object.keys(this.staticManifest.entries).length} views (snapshot ${this.staticManifest.snapshot})`);
+        }
+    }
+
+    // Must match static_key() in backend/export_static.py
+    staticKey(view, params = {}) {
+        const canonical = (value) => {
+            if (Array.isArray(value)) {
+                return `[${value.map(canonical).join(',')}]`;
+            }
+            if (value && typeof value === 'object') {
+                return `{${Object.keys(value).sort().map(key => `${JSON.stringify(key)}:${canonical(value[key])}`).join(',')}}`;
+            }
+            return JSON.stringify(value);
+        };
+        const explicit = {};
+        Object.entries(params).forEach(([name, value]) => {
+            if (name === 'filters' && value) {
+                const filters = {};
+                Object.entries(value).forEach(([key, values]) => {
+                    if (Array.isArray(values) && values.length > 0) {
+                        filters[key] = values.map(String).sort();
+                    } else if (!Array.isArray(values) && values !== null && values !== undefined && values !== '') {
+                        filters[key] = values;
+                    }
+                });
+                value = Object.keys(filters).length > 0 ? filters : null;
+            }
+            if (value !== null && value !== undefined) {
+                explicit[name] = value;
+            }
+        });
+        return `${view}:${canonical(explicit)}`;
+    }
+
+    async fetchStatic(view, params = {}) {
+        const file = this.staticManifest && this.staticManifest.entries[this.staticKey(view, params)];
+        if (!file) {
+            return null;
+        }
+        try {
+            const response = await fetch(`${this.staticDataUrl}/${file}`);
+            return response.ok ? await response.json() : null;
+        } catch (error) {
+            return null;
+        }
+    }
+
+    async fetchStaticViews(views, filters) {
+        if (!this.staticManifest) {
+            return null;
+        }
+        const names = Object.keys(views);
+        const results = await Promise.all(names.map(view => this.fetchStatic(view, { ...views[view], filters })));
+        if (results.some(result => result === null)) {
+            return null;
+        }
+        console.log('Dashboard views served from static export');
+        return Object.fromEntries(names.map((view, i) => [view, results[i]]));
+    }
+
+    async fetchView(view) {
+        return await this.fetchStatic(view) || await this.fetchData(`/${view}`);
+    }
+
     async fetchData(endpoint, options = {}) {
         console.log(`Making ${options.method || 'GET'} request to: ${endpoint}`);
         const response = await fetch(`${this.apiBaseUrl}${endpoint}`, options);
@@ -659,7 +725,7 @@ class NikeDashboard {
         // Handle different data structures
         let chartData;
         if (Array.isArray(data) && data.length > 0) {
-            // Array of objects structure from processFilteredPriceCorrelation
+            // Array of objects structure
             chartData = data.map(item => ({
                 x: item.price_per_unit,
                 y: item.units_sold
@@ -969,20 +1035,9 @@ class NikeDashboard {
         this.showLoading();
         try {
             console.log('Applying filters:', this.filters);
-            
-            // Apply filters to get filtered data
-            const filteredData = await this.fetchData('/filtered-data', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify(this.filters)
-            });
 
-            console.log('Filtered data received:', filteredData);
-            
-            // Update charts with filtered data
-            this.refreshCharts();
+            // Reload every chart with the filters applied server-side
+            await this.loadDashboardData();
             
         } catch (error) {
             console.error('Error applying filters:', error);
@@ -1031,35 +1086,6 @@ class NikeDashboard {
         }
     }
 
-    async refreshCharts() {
-        try {
-            console.log('Refreshing charts with filters:', this.filters);
-            const response = await fetch(`${this.apiBaseUrl}/filtered-data`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(this.filters)
-            });
-
-            const result = await response.json();
-            console.log('Filtered data response:', result);
-            
-            if (result.filtered_data && result.filtered_data.length > 0) {
-                console.log(`Found ${result.filtered_data.length} filtered records`);
-                this.loadDashboardData(result.filtered_data);
-            } else {
-                console.log('No data found for filters:', this.filters);
-                console.log('Total filtered records:', result.total_records);
-                console.log('Showing empty charts with zero values instead of error');
-                this.renderEmptyCharts();
-            }
-        } catch (error) {
-            console.error('Error refreshing charts:', error);
-            this.showError('Error refreshing charts');
-        }
-    }
-
     renderEmptyCharts() {
         // Render all charts with zero values when no data is found
         console.log('Rendering empty charts with zero values');
@@ -1131,227 +1157,6 @@ class NikeDashboard {
         }
     }
     
-    renderFilteredCharts(filteredData) {
-        // Process filtered data for charts
-        console.log('Rendering filtered charts with', filteredData.length, 'records');
-        
-        if (!filteredData || filteredData.length === 0) {
-            console.log('No data found for filters, showing empty charts with zero values');
-            this.renderEmptyCharts();
-            return;
-        }
-        
-        try {
-            // Process data for monthly trends
-            const monthlyData = this.processFilteredMonthlyTrends(filteredData);
-            this.renderMonthlyTrendsChart(monthlyData);
-            
-            // Process data for top products
-            const topProductsData = this.processFilteredTopProducts(filteredData);
-            this.renderTopProductsChart(topProductsData);
-            
-            // Process data for region distribution
-            const regionData = this.processFilteredRegions(filteredData);
-            this.renderRegionDistributionChart(regionData);
-            
-            // Process data for price correlation
-            const priceData = this.processFilteredPriceCorrelation(filteredData);
-            this.renderPriceCorrelationChart(priceData);
-            
-            // Process data for state analysis
-            const stateData = this.processFilteredStates(filteredData);
-            this.renderStateAnalysisChart(stateData);
-            
-            // Process data for sales method
-            const methodData = this.processFilteredSalesMethods(filteredData);
-            this.renderSalesMethodChart(methodData);
-            
-            // Process data for retailer analysis
-            const retailerData = this.processFilteredRetailers(filteredData);
-            this.renderRetailerPerformanceChart(retailerData);
-            
-        } catch (error) {
-            console.error('Error rendering filtered charts:', error);
-            this.showError('Error displaying filtered data');
-        }
-    }
-    
-    processFilteredMonthlyTrends(filteredData) {
-        // Group by year and month
-        const monthlyStats = {};
-        
-        filteredData.forEach(item => {
-            const date = new Date(item['Invoice Date']);
-            const year = date.getFullYear();
-            const month = date.getMonth() + 1;
-            
-            if (!monthlyStats[year]) {
-                monthlyStats[year] = {};
-            }
-            if (!monthlyStats[year][month]) {
-                monthlyStats[year][month] = { sales: 0, units: 0 };
-            }
-            
-            monthlyStats[year][month].sales += item['Total Sales'] || 0;
-            monthlyStats[year][month].units += item['Units Sold'] || 0;
-        });
-        
-        // Convert to chart format
-        const result = {};
-        Object.keys(monthlyStats).forEach(year => {
-            const months = [];
-            const sales = [];
-            const units = [];
-            
-            for (let month = 1; month <= 12; month++) {
-                months.push(month);
-                sales.push(monthlyStats[year][month]?.sales || 0);
-                units.push(monthlyStats[year][month]?.units || 0);
-            }
-            
-            result[year] = { months, sales, units };
-        });
-        
-        return result;
-    }
-    
-    processFilteredTopProducts(filteredData) {
-        // Group by product
-        const productStats = {};
-        
-        filteredData.forEach(item => {
-            const product = item.Product;
-            if (!productStats[product]) {
-                productStats[product] = { sales: 0, units: 0, transactions: 0 };
-            }
-            
-            productStats[product].sales += item['Total Sales'] || 0;
-            productStats[product].units += item['Units Sold'] || 0;
-            productStats[product].transactions += 1;
-        });
-        
-        // Convert to top products format
-        const topProducts = Object.entries(productStats)
-            .map(([product, stats]) => ({
-                product,
-                total_sales: stats.sales,
-                units_sold: stats.units,
-                transactions: stats.transactions
-            }))
-            .sort((a, b) => b.total_sales - a.total_sales)
-            .slice(0, 10);
-        
-        return { top_products: topProducts };
-    }
-    
-    processFilteredRegions(filteredData) {
-        // Group by region
-        const regionStats = {};
-        
-        filteredData.forEach(item => {
-            const region = item.Region;
-            if (!regionStats[region]) {
-                regionStats[region] = { sales: 0, units: 0, transactions: 0 };
-            }
-            
-            regionStats[region].sales += item['Total Sales'] || 0;
-            regionStats[region].units += item['Units Sold'] || 0;
-            regionStats[region].transactions += 1;
-        });
-        
-        return {
-            regions: Object.keys(regionStats),
-            sales: Object.values(regionStats).map(stats => stats.sales),
-            units: Object.values(regionStats).map(stats => stats.units),
-            transactions: Object.values(regionStats).map(stats => stats.transactions)
-        };
-    }
-    
-    processFilteredPriceCorrelation(filteredData) {
-        return filteredData.map(item => ({
-            price_per_unit: item['Price per Unit'],
-            units_sold: item['Units Sold'],
-            total_sales: item['Total Sales']
-        }));
-    }
-    
-    processFilteredStates(filteredData) {
-        // Group by state
-        const stateStats = {};
-        
-        filteredData.forEach(item => {
-            const state = item.State;
-            const region = item.Region;
-            if (!stateStats[state]) {
-                stateStats[state] = { sales: 0, units: 0, transactions: 0, region: region };
-            }
-            
-            stateStats[state].sales += item['Total Sales'] || 0;
-            stateStats[state].units += item['Units Sold'] || 0;
-            stateStats[state].transactions += 1;
-        });
-        
-        // Convert to state analysis format
-        const topStates = Object.entries(stateStats)
-            .map(([state, stats]) => ({
-                state,
-                region: stats.region,
-                total_sales: stats.sales,
-                units_sold: stats.units,
-                transactions: stats.transactions
-            }))
-            .sort((a, b) => b.total_sales - a.total_sales)
-            .slice(0, 15);
-        
-        return { top_states: topStates };
-    }
-    
-    processFilteredSalesMethods(filteredData) {
-        // Group by sales method
-        const methodStats = {};
-        
-        filteredData.forEach(item => {
-            const method = item['Sales Method'];
-            if (!methodStats[method]) {
-                methodStats[method] = { sales: 0, units: 0, transactions: 0 };
-            }
-            
-            methodStats[method].sales += item['Total Sales'] || 0;
-            methodStats[method].units += item['Units Sold'] || 0;
-            methodStats[method].transactions += 1;
-        });
-        
-        return {
-            methods: Object.keys(methodStats),
-            sales: Object.values(methodStats).map(stats => stats.sales),
-            units: Object.values(methodStats).map(stats => stats.units),
-            transactions: Object.values(methodStats).map(stats => stats.transactions)
-        };
-    }
-    
-    processFilteredRetailers(filteredData) {
-        // Group by retailer
-        const retailerStats = {};
-        
-        filteredData.forEach(item => {
-            const retailer = item.Retailer;
-            if (!retailerStats[retailer]) {
-                retailerStats[retailer] = { sales: 0, units: 0, transactions: 0 };
-            }
-            
-            retailerStats[retailer].sales += item['Total Sales'] || 0;
-            retailerStats[retailer].units += item['Units Sold'] || 0;
-            retailerStats[retailer].transactions += 1;
-        });
-        
-        return {
-            retailers: Object.keys(retailerStats),
-            sales: Object.values(retailerStats).map(stats => stats.sales),
-            units: Object.values(retailerStats).map(stats => stats.units),
-            transactions: Object.values(retailerStats).map(stats => stats.transactions)
-        };
-    }
-
     handleChartControl(chartType, action) {
         console.log(`Chart control: ${action} for ${chartType}`);
         const chart = this.charts[chartType];
@@ -1,13 +1,44 @@
 const express = require('express');
+const fs = require('fs');
 const path = require('path');
 const cors = require('cors');
 
 const app = express();
 const PORT = process.env.PORT || 8080;
 
+// Static export of the dashboard views (python backend/export_static.py)
+const STATIC_DATA_DIR = path.join(__dirname, 'static-data');
+const PRECOMPRESSED = [['br', '.br'], ['gzip', '.gz']];
+
 // Middleware
 app.use(cors());
 app.use(express.json());
+
+// Serve exported JSON with the pre-compressed variant the client accepts. File names carry a
+// content hash, so they are cached forever; only the manifest is revalidated on every load.
+app.get('/static-data/*', (req, res) => {
+    const file = path.join(STATIC_DATA_DIR, path.normalize(req.params[0]));
+    if (!file.startsWith(STATIC_DATA_DIR + path.sep) || !file.endsWith('.json') || !fs.existsSync(file)) {
+        return res.status(404).json({ error: 'Static data not found' });
+    }
+    const accepted = (req.headers['accept-encoding'] || '').split(',').map(part => part.split(';')[0].trim());
+    let served = file;
+    for (const [encoding, suffix] of PRECOMPRESSED) {
+        if (accepted.includes(encoding) && fs.existsSync(file + suffix)) {
+            served = file + suffix;
+            res.set('Content-Encoding', encoding);
+            break;
+        }
+    }
+    const isManifest = path.basename(file) === 'manifest.json';
+    res.set({
+        'Content-Type': 'application/json; charset=utf-8',
+        'Vary': 'Accept-Encoding',
+        'Cache-Control': isManifest ? 'no-cache' : 'public, max-age=31536000, immutable'
+    });
+    res.sendFile(served);
+});
+
 app.use(express.static(path.join(__dirname)));
 
 // Routes